@@ -1,40 +1,42 @@
 """Adverse Event Monitor Agent - Monitors FAERS database."""
-from pydantic_ai import Agent
-from pydantic_ai.models.anthropic import AnthropicModel
-from pydantic import BaseModel
+import asyncio
+import io
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from itertools import chain
 from typing import Optional
 import httpx
+import orjson
 from datetime import datetime
 from ..core.config import settings
+from ..core.http import faers_client
+from ..core.llm import ClaudeAgent
+from ..core.llm_cache import cached_run, prompt_version
 
+logger = logging.getLogger(__name__)
 
-class AdverseEventAnalysis(BaseModel):
-    """AI analysis of adverse event."""
-    severity_assessment: str
-    device_relationship: str
-    risk_score: int  # 0-100
-    recommendations: list[str]
-    requires_action: bool
+# Sample-event descriptions in safety-report prompts are cut to this length
+_SAMPLE_DESCRIPTION_CHARS = 200
 
+# Returned without an LLM call when there is nothing to analyse
+_EMPTY_SAFETY_REPORT_TEMPLATE = """# Safety Report: {device_name}
 
-class AdverseEventAgent:
-    """Agent for monitoring and analyzing adverse events."""
+**Reporting Period:** {time_period}
 
-    def __init__(self):
-        """Initialize the adverse event agent."""
-        self.model = AnthropicModel(
-            model_name=settings.CLAUDE_MODEL,
-            
-        )
-        self.agent = Agent(
-            model=self.model,
-            system_prompt=self._get_system_prompt(),
-            result_type=str
-        )
+## 1. EXECUTIVE SUMMARY
+No adverse events were reported for {device_name} during {time_period}.
+
+## 2. RECOMMENDATIONS
+- Continue routine post-market surveillance
+- Re-run this report when new adverse events are received
 
-    def _get_system_prompt(self) -> str:
-        """Get system prompt for adverse event analysis."""
-        return """You are a medical device safety expert specializing in adverse event monitoring and analysis.
+## 3. REGULATORY CONSIDERATIONS
+No adverse events were identified that require Medical Device Reporting (21 CFR Part 803) during this period."""
+
+_AE_SYSTEM_PROMPT = """You are a medical device safety expert specializing in adverse event monitoring and analysis.
 
 Your role is to analyze adverse events from the FDA Adverse Event Reporting System (FAERS) and other sources.
 
@@ -67,21 +69,11 @@ Remember:
 - Flag systematic issues
 - Follow FDA adverse event guidelines"""
 
-    async def analyze_adverse_event(
-        self,
-        event_data: dict
-    ) -> dict:
-        """Analyze an adverse event and generate risk assessment."""
-        prompt = f"""Analyze the following adverse event:
+_RISK_SCORE_RE = re.compile(r'(?:risk\s+)?score[:\s]+(\d+)', re.IGNORECASE)
 
-**Event Details:**
-- Device Name: {event_data.get('device_name')}
-- Event Type: {event_data.get('event_type')}
-- Severity: {event_data.get('severity')}
-- Description: {event_data.get('description')}
-- Patient Age: {event_data.get('patient_age', 'Unknown')}
-- Patient Sex: {event_data.get('patient_sex', 'Unknown')}
-- Event Date: {event_data.get('event_date', 'Unknown')}
+# Fixed instruction scaffold sent ahead of the event data as a cacheable
+# prefix; must stay byte-identical between calls for the cache to hit.
+_ANALYSIS_HEADER = """Analyze the adverse event described at the end of this message.
 
 Provide a comprehensive analysis including:
 
@@ -116,11 +108,57 @@ Provide a comprehensive analysis including:
    - Justification
 
 Format response as structured analysis with clear sections."""
+_ANALYSIS_VERSION = prompt_version(_ANALYSIS_HEADER)
+
+# (key, label, placeholder) triples rendered into the variable tail, sorted
+# by key so the prompt is canonical regardless of how the caller built
+# event_data.  Every field is always rendered; a missing value shows its
+# placeholder, so the model sees that patient details are unknown.
+_ADVERSE_EVENT_FIELDS = (
+    ("description", "Description", None),
+    ("device_name", "Device Name", None),
+    ("event_date", "Event Date", "Unknown"),
+    ("event_type", "Event Type", None),
+    ("patient_age", "Patient Age", "Unknown"),
+    ("patient_sex", "Patient Sex", "Unknown"),
+    ("severity", "Severity", None),
+)
+
+
+@dataclass(slots=True)
+class AdverseEventAnalysis:
+    """AI analysis of adverse event."""
+    severity_assessment: str
+    device_relationship: str
+    risk_score: int  # 0-100
+    recommendations: list[str]
+    requires_action: bool
 
-        result = await self.agent.run(prompt)
+
+class AdverseEventAgent:
+    """Agent for monitoring and analyzing adverse events."""
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        """Initialize the adverse event agent."""
+        self._client = http_client or faers_client
+        self.agent = ClaudeAgent(system_prompt=_AE_SYSTEM_PROMPT)
+
+    async def analyze_adverse_event(
+        self,
+        event_data: dict
+    ) -> dict:
+        """Analyze an adverse event and generate risk assessment."""
+        prompt = "**Event Details:**\n" + "\n".join(
+            f"- {label}: {event_data.get(key, placeholder)}"
+            for key, label, placeholder in _ADVERSE_EVENT_FIELDS
+        )
+
+        analysis_text = await cached_run(
+            self.agent, prompt, f"adverse_event:analysis:{_ANALYSIS_VERSION}",
+            cached_prefix=_ANALYSIS_HEADER,
+        )
 
         # Parse response and extract risk score
-        analysis_text = result.data
         risk_score = self._extract_risk_score(analysis_text)
 
         return {
@@ -133,31 +171,57 @@ Format response as structured analysis with clear sections."""
         self,
         device_name: str,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        max_pages: Optional[int] = None
     ) -> list[dict]:
-        """Monitor FAERS database for device-related adverse events."""
+        """Monitor FAERS database for device-related adverse events.
+
+        The first page reports the total match count; any further pages (up to
+        ``max_pages``, default ``settings.FAERS_MAX_PAGES``) are fetched
+        concurrently over the shared client.
+        """
+        # Build FAERS API query
+        query = self._build_faers_query(device_name, start_date, end_date)
+
         try:
-            # Build FAERS API query
-            query = self._build_faers_query(device_name, start_date, end_date)
-
-            # Call FAERS API
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    settings.FAERS_API_URL,
-                    params=query,
-                    timeout=30.0
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    return self._parse_faers_response(data)
-                else:
-                    return []
-
-        except Exception as e:
-            print(f"Error querying FAERS: {e}")
+            # Call FAERS API over the shared keep-alive client
+            response = await self._client.get(settings.FAERS_API_URL, params=query)
+            if response.status_code != 200:
+                return []
+            first_page = orjson.loads(response.content)
+        except (httpx.HTTPError, ValueError):
+            logger.exception("FAERS query failed for device=%s", device_name)
             return []
 
+        page_size = query["limit"]
+        total = first_page.get("meta", {}).get("results", {}).get("total", 0)
+        pages = min(math.ceil(total / page_size), max_pages or settings.FAERS_MAX_PAGES)
+
+        remaining = []
+        if pages > 1:
+            semaphore = asyncio.Semaphore(settings.FAERS_CONCURRENCY)
+
+            async def fetch_page(page: int) -> dict:
+                async with semaphore:
+                    try:
+                        page_response = await self._client.get(
+                            settings.FAERS_API_URL,
+                            params={**query, "skip": page * page_size},
+                        )
+                        if page_response.status_code == 200:
+                            return orjson.loads(page_response.content)
+                    except (httpx.HTTPError, ValueError):
+                        logger.exception(
+                            "FAERS page %d query failed for device=%s", page, device_name
+                        )
+                    return {}
+
+            remaining = await asyncio.gather(*(fetch_page(page) for page in range(1, pages)))
+
+        return list(chain.from_iterable(
+            self._parse_faers_response(data) for data in (first_page, *remaining)
+        ))
+
     async def generate_safety_report(
         self,
         events: list[dict],
@@ -165,6 +229,11 @@ Format response as structured analysis with clear sections."""
         time_period: str
     ) -> str:
         """Generate comprehensive safety report from adverse events."""
+        if not events:
+            return _EMPTY_SAFETY_REPORT_TEMPLATE.format(
+                device_name=device_name, time_period=time_period
+            )
+
         prompt = f"""Generate a comprehensive safety report for {device_name} covering {time_period}.
 
 **Adverse Events ({len(events)} total):**
@@ -210,8 +279,7 @@ Create a detailed safety report with:
 
 Use tables and charts descriptions where appropriate."""
 
-        result = await self.agent.run(prompt)
-        return result.data
+        return await cached_run(self.agent, prompt, "adverse_event:safety_report")
 
     def _build_faers_query(
         self,
@@ -236,14 +304,20 @@ Use tables and charts descriptions where appropriate."""
         results = data.get("results", [])
 
         for result in results:
+            patient = result.get("patient") or {}
+            drug = (patient.get("drug") or ({},))[0]
+            openfda = drug.get("openfda") or {}
+            device_names = openfda.get("device_name") or ("Unknown",)
+            reaction = (patient.get("reaction") or ({},))[0]
+
             event = {
                 "event_id": result.get("safetyreportid"),
-                "device_name": result.get("patient", {}).get("drug", [{}])[0].get("openfda", {}).get("device_name", ["Unknown"])[0],
-                "event_type": result.get("patient", {}).get("reaction", [{}])[0].get("reactionmeddrapt", "Unknown"),
+                "device_name": device_names[0],
+                "event_type": reaction.get("reactionmeddrapt", "Unknown"),
                 "severity": result.get("serious", "Unknown"),
-                "description": result.get("patient", {}).get("reaction", [{}])[0].get("reactionmeddrapt", ""),
-                "patient_age": result.get("patient", {}).get("patientonsetage"),
-                "patient_sex": result.get("patient", {}).get("patientsex"),
+                "description": reaction.get("reactionmeddrapt", ""),
+                "patient_age": patient.get("patientonsetage"),
+                "patient_sex": patient.get("patientsex"),
                 "reported_date": result.get("receivedate")
             }
             events.append(event)
@@ -253,8 +327,7 @@ Use tables and charts descriptions where appropriate."""
     def _extract_risk_score(self, analysis_text: str) -> int:
         """Extract risk score from analysis text."""
         # Simple extraction - look for "Risk Score: XX" or "Score: XX"
-        import re
-        match = re.search(r'(?:risk\s+)?score[:\s]+(\d+)', analysis_text, re.IGNORECASE)
+        match = _RISK_SCORE_RE.search(analysis_text)
         if match:
             return min(100, max(0, int(match.group(1))))
         return 50  # Default moderate risk
@@ -265,27 +338,23 @@ Use tables and charts descriptions where appropriate."""
             return "No events to report"
 
         # Group by severity
-        by_severity = {}
-        for event in events:
-            severity = event.get('severity', 'Unknown')
-            by_severity[severity] = by_severity.get(severity, 0) + 1
-
-        summary = [f"Total Events: {len(events)}\n"]
-        summary.append("Severity Distribution:")
-        for severity, count in by_severity.items():
-            summary.append(f"  - {severity}: {count}")
-
-        # Sample events
-        summary.append("\nSample Events:")
+        by_severity = Counter(event.get('severity', 'Unknown') for event in events)
+
+        buf = io.StringIO()
+        write = buf.write
+        write(f"Total Events: {len(events)}\n\n")
+        write("Severity Distribution:\n")
+        for severity, count in by_severity.most_common():
+            write(f"  - {severity}: {count}\n")
+
+        # Sample events, one compact line each to keep prompt tokens down
+        write("\nSample Events (# | type | severity | description):\n")
         for i, event in enumerate(events[:5], 1):
-            summary.append(f"""
-Event {i}:
-- Type: {event.get('event_type')}
-- Severity: {event.get('severity')}
-- Description: {event.get('description')}
-""")
-
-        return "\n".join(summary)
+            get = event.get
+            description = (get('description') or '')[:_SAMPLE_DESCRIPTION_CHARS]
+            write(f"{i}. {get('event_type') or '?'} | {get('severity') or '?'} | {description}\n")
+
+        return buf.getvalue()
 
 
 # Global agent instance
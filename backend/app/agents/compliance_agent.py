@@ -1,38 +1,13 @@
 """Compliance Agent - 21 CFR Part 11 compliance checker."""
-from pydantic_ai import Agent
-from pydantic_ai.models.anthropic import AnthropicModel
-from pydantic import BaseModel
+import io
+import re
+from dataclasses import dataclass
 from typing import Optional
 from ..core.config import settings
+from ..core.llm import ClaudeAgent
+from ..core.llm_cache import cached_run, prompt_version
 
-
-class ComplianceCheckResult(BaseModel):
-    """Result of compliance check."""
-    compliant: bool
-    score: int  # 0-100
-    issues: list[dict]
-    recommendations: list[str]
-    audit_items: list[str]
-
-
-class ComplianceAgent:
-    """Agent for checking 21 CFR Part 11 compliance."""
-
-    def __init__(self):
-        """Initialize the compliance agent."""
-        self.model = AnthropicModel(
-            model_name=settings.CLAUDE_MODEL,
-            
-        )
-        self.agent = Agent(
-            model=self.model,
-            system_prompt=self._get_system_prompt(),
-            result_type=str
-        )
-
-    def _get_system_prompt(self) -> str:
-        """Get system prompt for compliance checking."""
-        return """You are a regulatory compliance expert specializing in 21 CFR Part 11 (Electronic Records; Electronic Signatures).
+_COMPLIANCE_SYSTEM_PROMPT = """You are a regulatory compliance expert specializing in 21 CFR Part 11 (Electronic Records; Electronic Signatures).
 
 Your role is to ensure FDA submission documents and processes comply with federal regulations.
 
@@ -73,29 +48,11 @@ Remember:
 - Consider both technical and procedural controls
 - Focus on risk-based approach"""
 
-    async def check_submission_compliance(
-        self,
-        submission_data: dict,
-        check_electronic_signatures: bool = True,
-        check_audit_trail: bool = True,
-        check_record_retention: bool = True
-    ) -> dict:
-        """Check 21 CFR Part 11 compliance for a submission."""
-        prompt = f"""Perform a comprehensive 21 CFR Part 11 compliance check for the following FDA submission:
+_COMPLIANCE_SCORE_RE = re.compile(r'(?:compliance\s+)?score[:\s]+(\d+)', re.IGNORECASE)
 
-**Submission Information:**
-- Device Name: {submission_data.get('device_name')}
-- Submission Type: {submission_data.get('submission_type')}
-- Status: {submission_data.get('status')}
-- Created: {submission_data.get('created_at')}
-
-**Compliance Checks Required:**
-- Electronic Signatures: {'Yes' if check_electronic_signatures else 'No'}
-- Audit Trail: {'Yes' if check_audit_trail else 'No'}
-- Record Retention: {'Yes' if check_record_retention else 'No'}
-
-**Document Metadata:**
-{self._format_metadata(submission_data)}
+# Fixed instruction scaffold sent ahead of the submission data as a cacheable
+# prefix; must stay byte-identical between calls for the cache to hit.
+_COMPLIANCE_CHECK_HEADER = """Perform a comprehensive 21 CFR Part 11 compliance check for the FDA submission described at the end of this message.
 
 Perform compliance analysis covering:
 
@@ -147,11 +104,67 @@ Perform compliance analysis covering:
    - Validation activities needed
 
 Format as structured compliance report."""
+_COMPLIANCE_CHECK_VERSION = prompt_version(_COMPLIANCE_CHECK_HEADER)
 
-        result = await self.agent.run(prompt)
+# (key, label) pairs for the submission block, sorted by key; every other
+# key is rendered, also sorted, under Document Metadata.
+_SUBMISSION_FIELDS = (
+    ("created_at", "Created"),
+    ("device_name", "Device Name"),
+    ("status", "Status"),
+    ("submission_type", "Submission Type"),
+)
+_SUBMISSION_FIELD_KEYS = frozenset(key for key, _ in _SUBMISSION_FIELDS)
+
+
+@dataclass(slots=True)
+class ComplianceCheckResult:
+    """Result of compliance check."""
+    compliant: bool
+    score: int  # 0-100
+    issues: list[dict]
+    recommendations: list[str]
+    audit_items: list[str]
+
+
+class ComplianceAgent:
+    """Agent for checking 21 CFR Part 11 compliance."""
+
+    def __init__(self):
+        """Initialize the compliance agent."""
+        self.agent = ClaudeAgent(system_prompt=_COMPLIANCE_SYSTEM_PROMPT)
+
+    async def check_submission_compliance(
+        self,
+        submission_data: dict,
+        check_electronic_signatures: bool = True,
+        check_audit_trail: bool = True,
+        check_record_retention: bool = True
+    ) -> dict:
+        """Check 21 CFR Part 11 compliance for a submission."""
+        submission_info = "\n".join(
+            f"- {label}: {submission_data.get(key)}" for key, label in _SUBMISSION_FIELDS
+        )
+        prompt = f"""**Submission Information:**
+{submission_info}
+
+**Compliance Checks Required:**
+- Electronic Signatures: {'Yes' if check_electronic_signatures else 'No'}
+- Audit Trail: {'Yes' if check_audit_trail else 'No'}
+- Record Retention: {'Yes' if check_record_retention else 'No'}
+
+**Document Metadata:**
+{self._format_metadata(submission_data)}"""
+
+        # The prompt is a canonical rendering of the snapshot and flags, so
+        # the response cache doubles as the per-snapshot result cache
+        analysis_text = await cached_run(
+            self.agent, prompt, f"compliance:check:{_COMPLIANCE_CHECK_VERSION}",
+            ttl=settings.COMPLIANCE_CHECK_TTL_SECONDS,
+            cached_prefix=_COMPLIANCE_CHECK_HEADER,
+        )
 
         # Parse response
-        analysis_text = result.data
         score = self._extract_compliance_score(analysis_text)
 
         return {
@@ -207,17 +220,21 @@ Provide:
 - Specific issues found
 - Recommendations for remediation"""
 
-        result = await self.agent.run(prompt)
+        validation = await cached_run(self.agent, prompt, "compliance:signature")
         return {
-            "validation": result.data,
-            "compliant": "pass" in result.data.lower()
+            "validation": validation,
+            "compliant": "pass" in validation.lower()
         }
 
     async def generate_compliance_checklist(
         self,
         submission_type: str
     ) -> str:
-        """Generate compliance checklist for submission type."""
+        """Generate compliance checklist for submission type.
+
+        Cached by cached_run (bounded in-process LRU plus Redis) for
+        COMPLIANCE_CHECKLIST_TTL_SECONDS.
+        """
         prompt = f"""Generate a comprehensive 21 CFR Part 11 compliance checklist for {submission_type} submissions.
 
 Create a detailed checklist covering:
@@ -255,8 +272,11 @@ For each item:
 
 Format as actionable checklist suitable for printing."""
 
-        result = await self.agent.run(prompt)
-        return result.data
+        checklist = await cached_run(
+            self.agent, prompt, "compliance:checklist",
+            ttl=settings.COMPLIANCE_CHECKLIST_TTL_SECONDS,
+        )
+        return checklist
 
     async def audit_record_retention(
         self,
@@ -310,14 +330,13 @@ Verify compliance with 21 CFR 11.10(c) and FDA guidance:
    - Technology upgrades
    - Policy updates"""
 
-        result = await self.agent.run(prompt)
-        return result.data
+        return await cached_run(self.agent, prompt, "compliance:retention")
 
     def _format_metadata(self, submission_data: dict) -> str:
         """Format submission metadata."""
         metadata = []
-        for key, value in submission_data.items():
-            if key not in ['device_name', 'submission_type', 'status', 'created_at']:
+        for key, value in sorted(submission_data.items()):
+            if key not in _SUBMISSION_FIELD_KEYS:
                 metadata.append(f"- {key}: {value}")
         return "\n".join(metadata) if metadata else "No additional metadata"
 
@@ -341,25 +360,25 @@ Verify compliance with 21 CFR 11.10(c) and FDA guidance:
         if not records:
             return "No records found"
 
-        summary = [f"Total: {len(records)}"]
+        buf = io.StringIO()
+        write = buf.write
+        write(f"Total: {len(records)}\n")
         # Sample first 5
         for i, record in enumerate(records[:5], 1):
-            summary.append(f"""
-Record {i}:
-- ID: {record.get('id')}
-- Type: {record.get('type')}
-- Created: {record.get('created_at')}
-- Status: {record.get('status')}
-""")
+            get = record.get
+            write(f"\nRecord {i}:\n")
+            write(f"- ID: {get('id')}\n")
+            write(f"- Type: {get('type')}\n")
+            write(f"- Created: {get('created_at')}\n")
+            write(f"- Status: {get('status')}\n")
         if len(records) > 5:
-            summary.append(f"... and {len(records) - 5} more records")
+            write(f"\n... and {len(records) - 5} more records\n")
 
-        return "\n".join(summary)
+        return buf.getvalue()
 
     def _extract_compliance_score(self, analysis_text: str) -> int:
         """Extract compliance score from analysis."""
-        import re
-        match = re.search(r'(?:compliance\s+)?score[:\s]+(\d+)', analysis_text, re.IGNORECASE)
+        match = _COMPLIANCE_SCORE_RE.search(analysis_text)
         if match:
             return min(100, max(0, int(match.group(1))))
         return 50  # Default moderate compliance
@@ -1,42 +1,12 @@
 """Regulatory Document Agent - Generates FDA submission documents."""
-from pydantic_ai import Agent
-from pydantic_ai.models.anthropic import AnthropicModel
-from pydantic import BaseModel
+import asyncio
+import io
+from dataclasses import dataclass
 from typing import Optional
-from ..core.config import settings
+from ..core.llm import ClaudeAgent
+from ..core.llm_cache import cached_run, prompt_version
 
-
-class SubmissionDocument(BaseModel):
-    """Generated submission document."""
-    executive_summary: str
-    device_description: str
-    indications_for_use: str
-    technological_characteristics: str
-    performance_testing: str
-    substantial_equivalence: Optional[str] = None
-    clinical_summary: Optional[str] = None
-    labeling: str
-    conclusion: str
-
-
-class DocumentAgent:
-    """Agent for generating FDA submission documents."""
-
-    def __init__(self):
-        """Initialize the document agent."""
-        self.model = AnthropicModel(
-            model_name=settings.CLAUDE_MODEL,
-            
-        )
-        self.agent = Agent(
-            model=self.model,
-            system_prompt=self._get_system_prompt(),
-            result_type=str
-        )
-
-    def _get_system_prompt(self) -> str:
-        """Get system prompt for document generation."""
-        return """You are an FDA regulatory affairs expert specializing in medical device submissions.
+_DOCUMENT_SYSTEM_PROMPT = """You are an FDA regulatory affairs expert specializing in medical device submissions.
 
 Your role is to generate comprehensive, compliant 510(k) premarket notification submissions.
 
@@ -61,6 +31,119 @@ Remember:
 - Present information logically and clearly
 - Support all claims with evidence"""
 
+# Fixed 510(k) instruction scaffold.  Together with the device data it forms
+# the cacheable prefix shared by every section call of a submission, so it
+# must stay byte-identical between calls.
+_SUBMISSION_510K_HEADER = """You are drafting one section of a 510(k) Premarket Notification submission for the device described below.
+
+The device data is followed by the single section to write. Write only that section, starting with its numbered heading. It should be comprehensive, professionally written, and FDA-compliant.
+Where supporting documents or FDA guidance are provided, incorporate their key findings and applicable requirements."""
+
+# Submission sections, generated concurrently and stitched in this order.
+# "substantial_equivalence" and "clinical_summary" are only written when a
+# predicate device / clinical data is supplied.
+_SECTION_PROMPTS: dict[str, str] = {
+    "executive_summary": "EXECUTIVE SUMMARY - purpose of the submission, device overview and the basis for substantial equivalence.",
+    "device_description": "DEVICE DESCRIPTION - design, components, materials, principles of operation and accessories.",
+    "indications_for_use": "INDICATIONS FOR USE - the indications statement, intended patient population and use environment.",
+    "technological_characteristics": "TECHNOLOGICAL CHARACTERISTICS - key technical specifications and how the device achieves its intended use.",
+    "performance_testing": "PERFORMANCE TESTING - bench, biocompatibility, electrical safety, software and other testing with applicable standards.",
+    "substantial_equivalence": "SUBSTANTIAL EQUIVALENCE COMPARISON - side-by-side comparison with the predicate device and discussion of any differences.",
+    "clinical_summary": "CLINICAL SUMMARY - study design, endpoints and results from the clinical data provided.",
+    "labeling": "LABELING - proposed labels, instructions for use and required warnings and precautions.",
+    "conclusion": "CONCLUSION - summary of why the device is substantially equivalent and as safe and effective as the predicate.",
+}
+_SUBMISSION_510K_VERSION = prompt_version(
+    _SUBMISSION_510K_HEADER + "".join(_SECTION_PROMPTS.values())
+)
+_SECTION_MAX_TOKENS = 2048
+
+
+def _format_predicate(predicate: dict) -> str:
+    """Format predicate device information."""
+    return f"""
+- K-Number: {predicate.get('k_number', 'N/A')}
+- Device Name: {predicate.get('name', 'N/A')}
+- Manufacturer: {predicate.get('manufacturer', 'N/A')}
+- Indications: {predicate.get('indications', 'N/A')}
+"""
+
+
+def _format_clinical_data(clinical_data: dict) -> str:
+    """Format clinical data (sorted, so the text is canonical for caching)."""
+    return "\n".join(f"- {key}: {value}" for key, value in sorted(clinical_data.items()))
+
+
+def build_510k_context(
+    device_name: str,
+    device_description: Optional[str],
+    manufacturer: Optional[str],
+    indications_for_use: Optional[str],
+    predicate_device: Optional[dict] = None,
+    clinical_data: Optional[dict] = None,
+    supporting_documents: Optional[list[dict]] = None,
+    rag_context: Optional[str] = None,
+) -> str:
+    """Render the device data block shared by every 510(k) generation prompt.
+
+    Used by the per-section agent calls and by the streaming endpoint, so
+    both describe the device identically.
+    """
+    buf = io.StringIO()
+    write = buf.write
+    write(
+        "**Device Information:**\n"
+        f"- Device Name: {device_name}\n"
+        f"- Manufacturer: {manufacturer or 'Not specified'}\n"
+        f"- Description: {device_description or 'Not provided'}\n"
+        f"- Indications for Use: {indications_for_use or 'Not provided'}\n"
+        "\n"
+        "**Predicate Device:**\n"
+    )
+    write(_format_predicate(predicate_device) if predicate_device else "No predicate device specified")
+    write("\n\n**Clinical Data:**\n")
+    write(_format_clinical_data(clinical_data) if clinical_data else "No clinical data provided")
+
+    if supporting_documents:
+        write("\n\n**Supporting Documents (AI-Reviewed):**")
+        for idx, doc in enumerate(supporting_documents, start=1):
+            write(
+                f"\nDocument {idx}: {doc['document_type']} (File: {doc['filename']})\n"
+                f"{doc['ai_review_summary']}\n"
+            )
+
+    if rag_context:
+        write("\n\n**Relevant FDA Regulatory Guidance:**\n")
+        write(rag_context)
+
+    return buf.getvalue()
+
+
+@dataclass(slots=True)
+class SubmissionDocument:
+    """Generated submission document."""
+    executive_summary: str
+    device_description: str
+    indications_for_use: str
+    technological_characteristics: str
+    performance_testing: str
+    labeling: str
+    conclusion: str
+    substantial_equivalence: Optional[str] = None
+    clinical_summary: Optional[str] = None
+
+
+class DocumentAgent:
+    """Agent for generating FDA submission documents."""
+
+    def __init__(self):
+        """Initialize the document agent."""
+        # Full submission documents run well past the default budget
+        self.agent = ClaudeAgent(
+            system_prompt=_DOCUMENT_SYSTEM_PROMPT,
+            max_tokens=8192,
+        )
+
     async def generate_510k_submission(
         self,
         device_name: str,
@@ -68,39 +151,51 @@ Remember:
         manufacturer: str,
         indications_for_use: str,
         predicate_device: Optional[dict] = None,
-        clinical_data: Optional[dict] = None
+        clinical_data: Optional[dict] = None,
+        supporting_documents: Optional[list[dict]] = None,
+        rag_context: Optional[str] = None
     ) -> str:
         """Generate a complete 510(k) submission document."""
-        prompt = f"""Generate a comprehensive 510(k) Premarket Notification submission for the following device:
-
-**Device Information:**
-- Device Name: {device_name}
-- Manufacturer: {manufacturer}
-- Description: {device_description}
-- Indications for Use: {indications_for_use}
-
-**Predicate Device:**
-{self._format_predicate(predicate_device) if predicate_device else "No predicate device specified"}
-
-**Clinical Data:**
-{self._format_clinical_data(clinical_data) if clinical_data else "No clinical data provided"}
-
-Generate a complete submission document with the following sections:
-
-1. EXECUTIVE SUMMARY
-2. DEVICE DESCRIPTION
-3. INDICATIONS FOR USE
-4. TECHNOLOGICAL CHARACTERISTICS
-5. PERFORMANCE TESTING
-6. SUBSTANTIAL EQUIVALENCE COMPARISON
-7. CLINICAL SUMMARY (if applicable)
-8. LABELING
-9. CONCLUSION
-
-Each section should be comprehensive, professionally written, and FDA-compliant."""
-
-        result = await self.agent.run(prompt)
-        return result.data
+        context = build_510k_context(
+            device_name=device_name,
+            device_description=device_description,
+            manufacturer=manufacturer,
+            indications_for_use=indications_for_use,
+            predicate_device=predicate_device,
+            clinical_data=clinical_data,
+            supporting_documents=supporting_documents,
+            rag_context=rag_context,
+        )
+        sections = [
+            name for name in _SECTION_PROMPTS
+            if (name != "substantial_equivalence" or predicate_device)
+            and (name != "clinical_summary" or clinical_data)
+        ]
+
+        # Header and device data (with the supporting documents and RAG
+        # guidance, the bulk of the input) are the cached prefix; only the
+        # section instruction differs between calls.  Each section is cached
+        # in cached_run under its own key.
+        prefix = f"{_SUBMISSION_510K_HEADER}\n\n{context}"
+
+        def write_section(number: int, name: str):
+            return cached_run(
+                self.agent,
+                f"**Section to write:**\n{number}. {_SECTION_PROMPTS[name]}",
+                f"document:510k:{name}:{_SUBMISSION_510K_VERSION}",
+                cached_prefix=prefix,
+                max_tokens=_SECTION_MAX_TOKENS,
+            )
+
+        # A prompt-cache entry is only readable once the call that writes it
+        # has started responding, so the first section goes alone; the
+        # rest are independent and run concurrently against the warm prefix.
+        first = await write_section(1, sections[0])
+        rest = await asyncio.gather(*(
+            write_section(number, name)
+            for number, name in enumerate(sections[1:], start=2)
+        ))
+        return "\n\n".join((first, *rest))
 
     async def generate_substantial_equivalence_analysis(
         self,
@@ -147,27 +242,12 @@ Create a comprehensive substantial equivalence analysis covering:
 
 Use a table format for side-by-side comparisons where appropriate."""
 
-        result = await self.agent.run(prompt)
-        return result.data
-
-    def _format_predicate(self, predicate: dict) -> str:
-        """Format predicate device information."""
-        return f"""
-- K-Number: {predicate.get('k_number', 'N/A')}
-- Device Name: {predicate.get('name', 'N/A')}
-- Manufacturer: {predicate.get('manufacturer', 'N/A')}
-- Indications: {predicate.get('indications', 'N/A')}
-"""
-
-    def _format_clinical_data(self, clinical_data: dict) -> str:
-        """Format clinical data."""
-        if not clinical_data:
-            return "No clinical data provided"
+        return await cached_run(self.agent, prompt, "document:substantial_equivalence")
 
-        formatted = []
-        for key, value in clinical_data.items():
-            formatted.append(f"- {key}: {value}")
-        return "\n".join(formatted)
+    async def _call_claude(self, prompt: str, max_tokens: Optional[int] = None) -> str:
+        """Run an ad-hoc prompt against the document agent (e.g. document review)."""
+        result = await self.agent.run(prompt, max_tokens=max_tokens)
+        return result.data
 
 
 # Global agent instance
@@ -1,40 +1,10 @@
 """Clinical Evidence Synthesizer Agent."""
-from pydantic_ai import Agent
-from pydantic_ai.models.anthropic import AnthropicModel
 from pydantic import BaseModel
-from typing import Optional
-from ..core.config import settings
+from typing import Final, Optional
+from ..core.llm import ClaudeAgent
+from ..core.llm_cache import cached_run, prompt_version
 
-
-class ClinicalSummary(BaseModel):
-    """Synthesized clinical evidence summary."""
-    study_overview: str
-    methodology: str
-    results: str
-    safety_profile: str
-    effectiveness: str
-    conclusions: str
-    references: list[str]
-
-
-class EvidenceAgent:
-    """Agent for synthesizing clinical evidence."""
-
-    def __init__(self):
-        """Initialize the evidence agent."""
-        self.model = AnthropicModel(
-            model_name=settings.CLAUDE_MODEL,
-            
-        )
-        self.agent = Agent(
-            model=self.model,
-            system_prompt=self._get_system_prompt(),
-            result_type=str
-        )
-
-    def _get_system_prompt(self) -> str:
-        """Get system prompt for evidence synthesis."""
-        return """You are a clinical research expert specializing in medical device evidence synthesis.
+_EVIDENCE_SYSTEM_PROMPT: Final[str] = """You are a clinical research expert specializing in medical device evidence synthesis.
 
 Your role is to analyze and synthesize clinical evidence for FDA submissions.
 
@@ -60,19 +30,10 @@ Remember:
 - Use scientific terminology appropriately
 - Support conclusions with data"""
 
-    async def synthesize_clinical_evidence(
-        self,
-        clinical_data: dict,
-        device_name: str,
-        study_type: Optional[str] = None
-    ) -> str:
-        """Synthesize clinical evidence into FDA-ready summary."""
-        prompt = f"""Synthesize the following clinical evidence for {device_name}:
-
-**Study Type:** {study_type or 'Not specified'}
-
-**Clinical Data:**
-{self._format_clinical_data(clinical_data)}
+# Each prompt is a fixed instruction header, sent as a cacheable prefix of
+# the user turn, followed by a variable tail carrying the request data.
+# Headers must stay byte-identical between calls for the cache to hit.
+_SYNTHESIS_HEADER: Final[str] = """Synthesize the clinical evidence given at the end of this message.
 
 Create a comprehensive clinical summary with the following sections:
 
@@ -108,19 +69,14 @@ Create a comprehensive clinical summary with the following sections:
 
 Include all relevant statistics (p-values, confidence intervals, etc.)."""
 
-        result = await self.agent.run(prompt)
-        return result.data
+_SYNTHESIS_TEMPLATE: Final[str] = """**Device:** {device_name}
 
-    async def analyze_safety_data(
-        self,
-        adverse_events: list[dict],
-        device_name: str
-    ) -> str:
-        """Analyze safety data and adverse events."""
-        prompt = f"""Analyze the safety profile for {device_name} based on the following adverse events:
+**Study Type:** {study_type}
 
-**Adverse Events:**
-{self._format_adverse_events(adverse_events)}
+**Clinical Data:**
+{clinical_data}"""
+
+_SAFETY_HEADER: Final[str] = """Analyze the safety profile of the device named at the end of this message, based on the adverse events listed there.
 
 Provide a comprehensive safety analysis including:
 
@@ -151,22 +107,17 @@ Provide a comprehensive safety analysis including:
 
 Present data in tables where appropriate."""
 
-        result = await self.agent.run(prompt)
-        return result.data
+_SAFETY_TEMPLATE: Final[str] = """**Device:** {device_name}
 
-    async def compare_to_literature(
-        self,
-        device_results: dict,
-        literature_references: list[str]
-    ) -> str:
-        """Compare device results to published literature."""
-        prompt = f"""Compare the following device results to published literature:
+**Adverse Events:**
+{adverse_events}"""
 
-**Device Results:**
-{self._format_clinical_data(device_results)}
+_ADVERSE_EVENT_TEMPLATE: Final[str] = (
+    "Event {i}:\n- Type: {type}\n- Severity: {severity}\n"
+    "- Description: {description}\n- Outcome: {outcome}"
+)
 
-**Literature References:**
-{chr(10).join([f'- {ref}' for ref in literature_references])}
+_LITERATURE_HEADER: Final[str] = """Compare the device results given at the end of this message to the published literature listed there.
 
 Provide a literature comparison analysis:
 
@@ -190,36 +141,120 @@ Provide a literature comparison analysis:
    - Strength of evidence
    - Future research needs"""
 
-        result = await self.agent.run(prompt)
-        return result.data
+_LITERATURE_TEMPLATE: Final[str] = """**Device Results:**
+{device_results}
+
+**Literature References:**
+{references}"""
+
+_SYNTHESIS_VERSION: Final[str] = prompt_version(_SYNTHESIS_HEADER)
+_SAFETY_VERSION: Final[str] = prompt_version(_SAFETY_HEADER)
+_LITERATURE_VERSION: Final[str] = prompt_version(_LITERATURE_HEADER)
+
+
+class ClinicalSummary(BaseModel):
+    """Synthesized clinical evidence summary."""
+    study_overview: str
+    methodology: str
+    results: str
+    safety_profile: str
+    effectiveness: str
+    conclusions: str
+    references: list[str]
+
+
+class EvidenceAgent:
+    """Agent for synthesizing clinical evidence."""
+
+    def __init__(self):
+        """Initialize the evidence agent."""
+        self.agent = ClaudeAgent(system_prompt=_EVIDENCE_SYSTEM_PROMPT)
+
+    async def synthesize_clinical_evidence(
+        self,
+        clinical_data: dict,
+        device_name: str,
+        study_type: Optional[str] = None,
+        force_refresh: bool = False
+    ) -> str:
+        """Synthesize clinical evidence into FDA-ready summary."""
+        prompt = self._clinical_evidence_prompt(clinical_data, device_name, study_type)
+        return await cached_run(
+            self.agent, prompt, f"evidence:synthesis:{_SYNTHESIS_VERSION}",
+            force_refresh=force_refresh, cached_prefix=_SYNTHESIS_HEADER,
+        )
+
+    def _clinical_evidence_prompt(
+        self,
+        clinical_data: dict,
+        device_name: str,
+        study_type: Optional[str]
+    ) -> str:
+        """Build the variable tail of the clinical evidence synthesis prompt."""
+        return _SYNTHESIS_TEMPLATE.format_map({
+            "device_name": device_name,
+            "study_type": study_type or "Not specified",
+            "clinical_data": self._format_clinical_data(clinical_data),
+        })
+
+    async def analyze_safety_data(
+        self,
+        adverse_events: list[dict],
+        device_name: str,
+        force_refresh: bool = False
+    ) -> str:
+        """Analyze safety data and adverse events."""
+        prompt = _SAFETY_TEMPLATE.format_map({
+            "device_name": device_name,
+            "adverse_events": self._format_adverse_events(adverse_events),
+        })
+
+        return await cached_run(
+            self.agent, prompt, f"evidence:safety:{_SAFETY_VERSION}",
+            force_refresh=force_refresh, cached_prefix=_SAFETY_HEADER,
+        )
+
+    async def compare_to_literature(
+        self,
+        device_results: dict,
+        literature_references: list[str],
+        force_refresh: bool = False
+    ) -> str:
+        """Compare device results to published literature."""
+        prompt = _LITERATURE_TEMPLATE.format_map({
+            "device_results": self._format_clinical_data(device_results),
+            "references": "\n".join(f"- {ref}" for ref in literature_references),
+        })
+
+        return await cached_run(
+            self.agent, prompt, f"evidence:literature:{_LITERATURE_VERSION}",
+            force_refresh=force_refresh, cached_prefix=_LITERATURE_HEADER,
+        )
 
     def _format_clinical_data(self, clinical_data: dict) -> str:
         """Format clinical data for prompt."""
-        formatted = []
-        for key, value in clinical_data.items():
-            if isinstance(value, dict):
-                formatted.append(f"**{key}:**")
-                for sub_key, sub_value in value.items():
-                    formatted.append(f"  - {sub_key}: {sub_value}")
-            else:
-                formatted.append(f"- {key}: {value}")
-        return "\n".join(formatted)
+        return "\n".join(
+            f"**{key}:**\n" + "\n".join(f"  - {sub_key}: {sub_value}" for sub_key, sub_value in value.items())
+            if isinstance(value, dict)
+            else f"- {key}: {value}"
+            for key, value in clinical_data.items()
+        )
 
     def _format_adverse_events(self, adverse_events: list[dict]) -> str:
         """Format adverse events for prompt."""
         if not adverse_events:
             return "No adverse events reported"
 
-        formatted = []
-        for i, event in enumerate(adverse_events, 1):
-            formatted.append(f"""
-Event {i}:
-- Type: {event.get('event_type', 'N/A')}
-- Severity: {event.get('severity', 'N/A')}
-- Description: {event.get('description', 'N/A')}
-- Outcome: {event.get('outcome', 'N/A')}
-""")
-        return "\n".join(formatted)
+        return "\n\n".join(
+            _ADVERSE_EVENT_TEMPLATE.format(
+                i=i,
+                type=event.get('event_type', 'N/A'),
+                severity=event.get('severity', 'N/A'),
+                description=event.get('description', 'N/A'),
+                outcome=event.get('outcome', 'N/A'),
+            )
+            for i, event in enumerate(adverse_events, 1)
+        )
 
 
 # Global agent instance
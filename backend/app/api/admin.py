@@ -3,19 +3,32 @@
 All endpoints under /api/v1/admin are intended for administrators only.
 In production, protect this router with IP allow-listing or admin JWT middleware.
 """
+import asyncio
 import logging
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, func, select
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
 
 from ..core.database import get_db
+from ..core.async_database import AsyncSessionLocal
 from ..models.fda_knowledge import FDAKnowledgeBase
+from ..services.response_cache import (
+    KB_STATS_KEY, cached_json, invalidate_kb_stats, store_json,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
 
+# Characters of content returned per knowledge-base listing entry
+_PREVIEW_CHARS = 200
+# Rows fetched per server-side cursor round trip when streaming listings
+_LIST_FETCH_SIZE = 100
+
 
 # ============================================================================
 # RESPONSE SCHEMAS
@@ -85,7 +98,7 @@ async def seed_knowledge_base(
 
         # When not forcing, check upfront so we can return 409
         if not force:
-            existing_count = db.query(FDAKnowledgeBase).count()
+            existing_count = await asyncio.to_thread(db.query(FDAKnowledgeBase).count)
             if existing_count > 0:
                 raise HTTPException(
                     status_code=409,
@@ -96,7 +109,9 @@ async def seed_knowledge_base(
                 )
 
         inserted = await seed_fda_knowledge_base(db, skip_existing=not force)
-        total = db.query(FDAKnowledgeBase).count()
+        if inserted:
+            await invalidate_kb_stats()
+        total = await asyncio.to_thread(db.query(FDAKnowledgeBase).count)
 
         return SeedKnowledgeBaseResponse(
             status="success",
@@ -129,32 +144,46 @@ async def seed_knowledge_base(
 )
 async def get_knowledge_base_stats(db: Session = Depends(get_db)):
     """Return summary statistics for the FDA knowledge base."""
+    cached = await cached_json(KB_STATS_KEY)
+    if cached is not None:
+        return cached
+
     try:
-        all_entries = db.query(FDAKnowledgeBase).all()
-        total = len(all_entries)
+        # One grouped aggregate instead of loading every row (content +
+        # embedding) into Python; the embedded count is a FILTER on the
+        # same predicate as the ix_fda_knowledge_base_embedded partial index.
+        rows = (
+            db.query(
+                FDAKnowledgeBase.section,
+                FDAKnowledgeBase.content_type,
+                func.count(),
+                func.count().filter(FDAKnowledgeBase.embedding.isnot(None)),
+            )
+            .group_by(FDAKnowledgeBase.section, FDAKnowledgeBase.content_type)
+            .all()
+        )
 
+        total = 0
         by_section: dict = {}
         by_content_type: dict = {}
         has_embeddings = 0
-        missing_embeddings = 0
 
-        for entry in all_entries:
-            by_section[entry.section] = by_section.get(entry.section, 0) + 1
-            by_content_type[entry.content_type] = (
-                by_content_type.get(entry.content_type, 0) + 1
-            )
-            if entry.embedding is not None:
-                has_embeddings += 1
-            else:
-                missing_embeddings += 1
+        for section, content_type, count, embedded in rows:
+            total += count
+            by_section[section] = by_section.get(section, 0) + count
+            by_content_type[content_type] = by_content_type.get(content_type, 0) + count
+            has_embeddings += embedded
+
+        missing_embeddings = total - has_embeddings
 
-        return KnowledgeBaseStatsResponse(
+        stats = KnowledgeBaseStatsResponse(
             total_entries=total,
             entries_by_section=by_section,
             entries_by_content_type=by_content_type,
             has_embeddings=has_embeddings,
             missing_embeddings=missing_embeddings,
         )
+        return await store_json(KB_STATS_KEY, stats.model_dump_json())
 
     except Exception as exc:
         logger.error("knowledge-base/stats failed: %s", exc)
@@ -168,6 +197,19 @@ async def get_knowledge_base_stats(db: Session = Depends(get_db)):
 # LIST KNOWLEDGE BASE ENTRIES
 # ============================================================================
 
+def _kb_entry(row) -> dict:
+    """Shape one knowledge-base listing row for the response."""
+    return {
+        "id": row.id,
+        "title": row.title,
+        "content_type": row.content_type,
+        "section": row.section,
+        "content_preview": row.preview + "..." if row.truncated else row.preview,
+        "has_embedding": row.has_embedding,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
 @router.get(
     "/knowledge-base",
     summary="List FDA knowledge base entries",
@@ -176,45 +218,81 @@ async def list_knowledge_base(
     section: Optional[str] = Query(None, description="Filter by section tag"),
     content_type: Optional[str] = Query(None, description="Filter by content type"),
     skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=1000),
 ):
-    """List knowledge base entries with optional filters (no embeddings returned)."""
-    try:
-        q = db.query(FDAKnowledgeBase)
-        if section:
-            q = q.filter(FDAKnowledgeBase.section == section)
-        if content_type:
-            q = q.filter(FDAKnowledgeBase.content_type == content_type)
-
-        entries = q.order_by(FDAKnowledgeBase.id).offset(skip).limit(limit).all()
-        total = q.count()
-
-        return {
-            "total": total,
-            "skip": skip,
-            "limit": limit,
-            "entries": [
-                {
-                    "id": e.id,
-                    "title": e.title,
-                    "content_type": e.content_type,
-                    "section": e.section,
-                    "content_preview": e.content[:200] + "..." if len(e.content) > 200 else e.content,
-                    "has_embedding": e.embedding is not None,
-                    "created_at": e.created_at.isoformat() if e.created_at else None,
-                }
-                for e in entries
-            ],
-        }
+    """List knowledge base entries with optional filters (no embeddings returned).
 
+    The page is streamed from a server-side cursor, so large exports are
+    encoded row batch by row batch instead of being built in memory.
+    """
+    filters = []
+    if section:
+        filters.append(FDAKnowledgeBase.section == section)
+    if content_type:
+        filters.append(FDAKnowledgeBase.content_type == content_type)
+
+    # COUNT(*) OVER () returns the filtered total alongside the page, so
+    # the filter runs once instead of again for a separate count query.
+    # Only the listed columns are selected: the embedding itself never
+    # leaves the database, just whether it is present, and the content
+    # is cut to its preview in SQL.
+    stmt = (
+        select(
+            FDAKnowledgeBase.id,
+            FDAKnowledgeBase.title,
+            FDAKnowledgeBase.content_type,
+            FDAKnowledgeBase.section,
+            func.substr(FDAKnowledgeBase.content, 1, _PREVIEW_CHARS).label("preview"),
+            (func.length(FDAKnowledgeBase.content) > _PREVIEW_CHARS).label("truncated"),
+            FDAKnowledgeBase.created_at,
+            FDAKnowledgeBase.embedding.isnot(None).label("has_embedding"),
+            func.count().over().label("total"),
+        )
+        .where(*filters)
+        .order_by(FDAKnowledgeBase.id)
+        .offset(skip)
+        .limit(limit)
+        .execution_options(yield_per=_LIST_FETCH_SIZE)
+    )
+
+    # The session outlives this handler (it is closed when the body has
+    # been streamed), so it is opened here rather than via Depends.  The
+    # first row is read before responding so query errors still map to 500.
+    db = AsyncSessionLocal()
+    try:
+        result = await db.stream(stmt)
+        first = await result.fetchone()
+        if first is not None:
+            total = first.total
+        elif skip:
+            # Past the last page there is no row to carry the total
+            total = await db.scalar(
+                select(func.count()).select_from(FDAKnowledgeBase).where(*filters)
+            )
+        else:
+            total = 0
     except Exception as exc:
+        await db.close()
         logger.error("knowledge-base list failed: %s", exc)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to list knowledge base: {str(exc)}",
         )
 
+    async def body():
+        try:
+            # Envelope minus its closing brace, then entries as they arrive
+            yield orjson.dumps({"total": total, "skip": skip, "limit": limit})[:-1] + b',"entries":['
+            if first is not None:
+                yield orjson.dumps(_kb_entry(first))
+                async for rows in result.partitions():
+                    yield b"".join(b"," + orjson.dumps(_kb_entry(row)) for row in rows)
+            yield b"]}"
+        finally:
+            await db.close()
+
+    return StreamingResponse(body(), media_type="application/json")
+
 
 # ============================================================================
 # DELETE / RESET KNOWLEDGE BASE  (use with care)
@@ -231,9 +309,10 @@ async def delete_knowledge_base(db: Session = Depends(get_db)):
     Use this to reset before re-seeding with updated content.
     """
     try:
-        count = db.query(FDAKnowledgeBase).count()
-        db.query(FDAKnowledgeBase).delete()
+        # One DELETE; its rowcount is the number of entries removed
+        count = db.execute(delete(FDAKnowledgeBase)).rowcount
         db.commit()
+        await invalidate_kb_stats()
         logger.warning("FDA knowledge base cleared: %d entries deleted", count)
         return DeleteKnowledgeBaseResponse(
             status="success",
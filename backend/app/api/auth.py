@@ -1,12 +1,13 @@
 """Authentication endpoints"""
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from datetime import timedelta
 from ..core.database import get_db
 from ..core.security import (
-    verify_password,
+    verify_and_update_password,
     create_access_token,
     get_current_user,
     ACCESS_TOKEN_EXPIRE_MINUTES
@@ -36,12 +37,21 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
     """Login endpoint - returns JWT token"""
     user = db.query(User).filter(User.username == request.username).first()
     
-    if not user or not verify_password(request.password, user.hashed_password):
+    # bcrypt is deliberately slow, so verify off the event loop
+    verified, new_hash = (
+        await run_in_threadpool(verify_and_update_password, request.password, user.hashed_password)
+        if user else (False, None)
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Legacy SHA256 hash: upgrade it now that the plaintext is known
+        user.hashed_password = new_hash
+        db.commit()
     
     if not user.is_active:
         raise HTTPException(
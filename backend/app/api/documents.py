@@ -1,4 +1,6 @@
 """Document management API endpoints."""
+import asyncio
+import hashlib
 import os
 import uuid
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
@@ -6,14 +8,47 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 
 from ..core.database import get_db
+from ..core.llm import clamp_prompt
+from ..core.pools import PDF_WORKERS, get_pdf_pool
 from ..models.document import Document
 from ..models.submission import Submission
 
 router = APIRouter(prefix="/api/v1/submissions", tags=["documents"])
 
 UPLOAD_DIR = "/app/uploads"
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Pages of a PDF read for AI review
+AI_REVIEW_PDF_PAGES = 10
+# Input-token budget for the document content in an AI review prompt
+AI_REVIEW_CONTENT_TOKENS = 2000
+
+
+def _extract_page_range(path: str, start: int, end: int) -> list:
+    """Worker: text of pages [start, end); empty past the end of the file."""
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages[start:end]]
+
+
+async def _extract_pdf_text(path: str) -> str:
+    """Extract the first AI_REVIEW_PDF_PAGES pages in parallel.
+
+    Each worker gets one contiguous range, so the file is parsed once per
+    worker rather than once per page.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_pdf_pool()
+    step = -(-AI_REVIEW_PDF_PAGES // min(PDF_WORKERS, AI_REVIEW_PDF_PAGES))
+    ranges = await asyncio.gather(*(
+        loop.run_in_executor(
+            pool, _extract_page_range, path, start, min(start + step, AI_REVIEW_PDF_PAGES)
+        )
+        for start in range(0, AI_REVIEW_PDF_PAGES, step)
+    ))
+    return "\n".join(text for texts in ranges for text in texts)
+
 
 @router.post("/{submission_id}/documents")
 async def upload_document(
@@ -34,20 +69,40 @@ async def upload_document(
     unique_filename = f"{uuid.uuid4()}{file_ext}"
     file_path = os.path.join(sub_dir, unique_filename)
 
-    content = await file.read()
+    # Stream to disk in fixed-size chunks so large study PDFs are never held
+    # in memory whole, hashing as we go
+    file_size = 0
+    sha256 = hashlib.sha256()
     with open(file_path, "wb") as f:
-        f.write(content)
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            f.write(chunk)
+            sha256.update(chunk)
+            file_size += len(chunk)
+    digest = sha256.hexdigest()
 
     doc = Document(
         submission_id=submission_id,
         document_type=document_type,
         filename=file.filename or unique_filename,
         file_path=file_path,
-        file_size=len(content),
+        file_size=file_size,
+        content_sha256=digest,
         mime_type=file.content_type,
         uploaded_at=datetime.utcnow(),
         status="uploaded"
     )
+
+    # Same bytes already stored: share the existing blob, and its AI review
+    # when it was reviewed as the same document type
+    existing = db.query(Document).filter(Document.content_sha256 == digest).first()
+    if existing and os.path.exists(existing.file_path):
+        os.remove(file_path)
+        doc.file_path = existing.file_path
+        if existing.ai_reviewed and existing.document_type == document_type:
+            doc.ai_reviewed = True
+            doc.ai_review_summary = existing.ai_review_summary
+            doc.status = "reviewed"
+
     db.add(doc)
     db.commit()
     db.refresh(doc)
@@ -101,7 +156,12 @@ async def delete_document(submission_id: int, document_id: int, db: Session = De
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    if os.path.exists(doc.file_path):
+    # Deduplicated uploads share a blob; keep it while other rows use it
+    shared = db.query(Document.id).filter(
+        Document.file_path == doc.file_path,
+        Document.id != doc.id
+    ).first()
+    if not shared and os.path.exists(doc.file_path):
         os.remove(doc.file_path)
 
     db.delete(doc)
@@ -124,9 +184,7 @@ async def ai_review_document(submission_id: int, document_id: int, db: Session =
         if doc.file_path and os.path.exists(doc.file_path):
             if doc.filename.lower().endswith(".pdf"):
                 try:
-                    import pdfplumber
-                    with pdfplumber.open(doc.file_path) as pdf:
-                        content = "\n".join(page.extract_text() or "" for page in pdf.pages[:10])
+                    content = await _extract_pdf_text(doc.file_path)
                 except Exception:
                     content = f"[PDF document: {doc.filename}]"
             else:
@@ -143,7 +201,7 @@ async def ai_review_document(submission_id: int, document_id: int, db: Session =
         prompt = f"""Analyze this {doc.document_type} document for FDA 510(k) submission relevance:
 
 Document: {doc.filename}
-Content: {content[:5000]}
+Content: {clamp_prompt(content, AI_REVIEW_CONTENT_TOKENS)}
 
 Provide a concise summary with:
 1. Key findings and data points
@@ -1,24 +1,33 @@
 """FDA Regulatory API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Response
+from fastapi.responses import ORJSONResponse
+from sse_starlette.sse import EventSourceResponse
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from pydantic import BaseModel, TypeAdapter
 from typing import List, Optional
 from datetime import datetime
 import uuid
 import asyncio
-import json
+import io
+import orjson
 
 import logging
 
-import anthropic as anthropic_sdk
-
 from ..core.database import get_db
+from ..core.async_database import AsyncSessionLocal, get_async_db
 from ..core.config import settings
+from ..core.llm import anthropic_client, anthropic_slot
 from ..models.submission import (
     Submission, SubmissionReview, AdverseEvent, PredicateDevice,
     SubmissionStatus, ComplianceStatus
 )
 from ..models.document import Document
+from ..services.response_cache import (
+    cached_json, cached_similar_search, invalidate_submission, store_json,
+    store_similar_search, submission_key,
+)
 
 logger = logging.getLogger(__name__)
 from ..schemas.submission import (
@@ -27,9 +36,11 @@ from ..schemas.submission import (
     ReviewCreate, ReviewResponse,
     AdverseEventCreate, AdverseEventResponse,
     PredicateDeviceSearch, PredicateDeviceResponse,
-    ComplianceCheckRequest, ComplianceCheckResponse
+    ComplianceCheckRequest, ComplianceCheckResponse,
+    SubmissionListAdapter, ReviewListAdapter, AdverseEventListAdapter,
+    PredicateDeviceListAdapter,
 )
-from ..agents.document_agent import document_agent
+from ..agents.document_agent import build_510k_context, document_agent
 from ..agents.evidence_agent import evidence_agent
 from ..agents.adverse_event_agent import adverse_event_agent
 from ..agents.compliance_agent import compliance_agent
@@ -37,6 +48,26 @@ from ..agents.compliance_agent import compliance_agent
 router = APIRouter(prefix="/api/v1/regulatory", tags=["regulatory"])
 
 
+def _json_response(model: BaseModel, status_code: int = 200) -> Response:
+    """Return *model* encoded by pydantic-core in a single call.
+
+    FastAPI passes a returned Response through as is, so the body is not
+    validated against ``response_model`` a second time or walked by
+    ``jsonable_encoder``; ``response_model`` still documents the schema.
+    """
+    return Response(
+        content=model.model_dump_json(), media_type="application/json", status_code=status_code
+    )
+
+
+def _json_list_response(adapter: TypeAdapter, schema, rows) -> Response:
+    """Encode database *rows* as a JSON array of *schema* through a shared adapter."""
+    return Response(
+        content=adapter.dump_json([schema.from_orm_trusted(row) for row in rows]),
+        media_type="application/json",
+    )
+
+
 # ============================================================================
 # SUBMISSION ENDPOINTS
 # ============================================================================
@@ -63,7 +94,7 @@ async def create_submission(
     db.commit()
     db.refresh(db_submission)
 
-    return db_submission
+    return _json_response(SubmissionResponse.from_orm_trusted(db_submission), status_code=201)
 
 
 @router.get("/submissions", response_model=List[SubmissionResponse])
@@ -71,31 +102,36 @@ async def list_submissions(
     skip: int = 0,
     limit: int = 100,
     status: str = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List all submissions."""
-    query = db.query(Submission)
+    stmt = select(Submission)
 
     if status:
         try:
             status_enum = SubmissionStatus(status)
-            query = query.filter(Submission.status == status_enum)
+            stmt = stmt.where(Submission.status == status_enum)
         except ValueError:
             raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
 
-    submissions = query.offset(skip).limit(limit).all()
-    return submissions
+    result = await db.execute(stmt.offset(skip).limit(limit))
+    return _json_list_response(SubmissionListAdapter, SubmissionResponse, result.scalars())
 
 
 @router.get("/submissions/{submission_id}", response_model=SubmissionResponse)
-async def get_submission(submission_id: int, db: Session = Depends(get_db)):
+async def get_submission(submission_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific submission."""
-    submission = db.query(Submission).filter(Submission.id == submission_id).first()
+    key = submission_key(submission_id)
+    cached = await cached_json(key)
+    if cached is not None:
+        return cached
+
+    submission = await db.get(Submission, submission_id)
 
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
 
-    return submission
+    return await store_json(key, SubmissionResponse.from_orm_trusted(submission).model_dump_json())
 
 
 @router.patch("/submissions/{submission_id}", response_model=SubmissionResponse)
@@ -120,7 +156,7 @@ async def update_submission(
     db.commit()
     db.refresh(db_submission)
 
-    return db_submission
+    return _json_response(SubmissionResponse.from_orm_trusted(db_submission))
 
 
 @router.delete("/submissions/{submission_id}", status_code=204)
@@ -141,30 +177,62 @@ async def delete_submission(submission_id: int, db: Session = Depends(get_db)):
 # DOCUMENT GENERATION ENDPOINTS
 # ============================================================================
 
+# Only the columns the generation prompts read, not whole rows
+_PREDICATE_PROMPT_COLUMNS = (
+    PredicateDevice.k_number,
+    PredicateDevice.device_name,
+    PredicateDevice.manufacturer,
+    PredicateDevice.indications_for_use,
+    PredicateDevice.technological_characteristics,
+)
+_REVIEWED_DOCUMENT_COLUMNS = (
+    Document.document_type,
+    Document.filename,
+    Document.ai_review_summary,
+)
+
+
+def _optional_result(result, what: str, submission_id: int):
+    """Unwrap the result of an optional agent call run alongside generation.
+
+    A failed compliance check or SE analysis is logged and returned as None so
+    the generated 510(k) draft is still saved.
+    """
+    if isinstance(result, BaseException):
+        logger.error(
+            "%s failed for submission_id=%d: %s", what, submission_id, result,
+            exc_info=result,
+        )
+        return None
+    return result
+
+
 @router.post("/generate-submission", response_model=GenerateSubmissionResponse)
 async def generate_submission_document(
     request: GenerateSubmissionRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Generate FDA submission documents using AI."""
     # Get submission
-    submission = db.query(Submission).filter(Submission.id == request.submission_id).first()
+    submission = await db.get(Submission, request.submission_id)
 
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
 
     # Update status
     submission.status = SubmissionStatus.GENERATING
-    db.commit()
+    await db.commit()
 
     try:
         # Generate 510(k) submission
         predicate_data = None
         if submission.predicate_k_number:
-            predicate_device = db.query(PredicateDevice).filter(
-                PredicateDevice.k_number == submission.predicate_k_number
-            ).first()
+            predicate_device = (await db.execute(
+                select(*_PREDICATE_PROMPT_COLUMNS).where(
+                    PredicateDevice.k_number == submission.predicate_k_number
+                )
+            )).one_or_none()
 
             if predicate_device:
                 predicate_data = {
@@ -176,10 +244,12 @@ async def generate_submission_document(
                 }
 
         # Gather AI-reviewed supporting documents for this submission
-        reviewed_documents = db.query(Document).filter(
-            Document.submission_id == request.submission_id,
-            Document.ai_reviewed == True  # noqa: E712
-        ).all()
+        reviewed_documents = (await db.execute(
+            select(*_REVIEWED_DOCUMENT_COLUMNS).where(
+                Document.submission_id == request.submission_id,
+                Document.ai_reviewed == True  # noqa: E712
+            )
+        )).all()
 
         supporting_docs_payload = []
         if reviewed_documents:
@@ -218,19 +288,30 @@ async def generate_submission_document(
                 request.submission_id, rag_exc
             )
 
-        generated_submission = await document_agent.generate_510k_submission(
-            device_name=submission.device_name,
-            device_description=submission.device_description or "",
-            manufacturer=submission.manufacturer or "",
-            indications_for_use=submission.indications_for_use or "",
-            predicate_device=predicate_data,
-            clinical_data=submission.clinical_data,
-            supporting_documents=supporting_docs_payload if supporting_docs_payload else None,
-            rag_context=rag_context or None
-        )
+        # The 510(k) draft, SE analysis and compliance check are independent
+        # agent calls, so run them concurrently.
+        agent_calls = [
+            document_agent.generate_510k_submission(
+                device_name=submission.device_name,
+                device_description=submission.device_description or "",
+                manufacturer=submission.manufacturer or "",
+                indications_for_use=submission.indications_for_use or "",
+                predicate_device=predicate_data,
+                clinical_data=submission.clinical_data,
+                supporting_documents=supporting_docs_payload if supporting_docs_payload else None,
+                rag_context=rag_context or None
+            ),
+            compliance_agent.check_submission_compliance(
+                submission_data={
+                    "device_name": submission.device_name,
+                    "submission_type": submission.submission_type.value,
+                    "status": submission.status.value,
+                    "created_at": submission.created_at.isoformat()
+                }
+            ),
+        ]
 
         # Generate substantial equivalence analysis if predicate exists
-        se_analysis = None
         if request.include_predicate_analysis and predicate_data:
             subject_data = {
                 "name": submission.device_name,
@@ -239,50 +320,56 @@ async def generate_submission_document(
                 "technology": {}  # Would extract from submission
             }
 
-            se_analysis = await document_agent.generate_substantial_equivalence_analysis(
+            agent_calls.append(document_agent.generate_substantial_equivalence_analysis(
                 subject_device=subject_data,
                 predicate_device=predicate_data
-            )
-
-        # Run compliance check
-        compliance_result = await compliance_agent.check_submission_compliance(
-            submission_data={
-                "device_name": submission.device_name,
-                "submission_type": submission.submission_type.value,
-                "status": submission.status.value,
-                "created_at": submission.created_at.isoformat()
-            }
+            ))
+
+        results = await asyncio.gather(*agent_calls, return_exceptions=True)
+        generated_submission = results[0]
+        if isinstance(generated_submission, BaseException):
+            raise generated_submission
+        compliance_result = _optional_result(results[1], "Compliance check", submission.id)
+        se_analysis = (
+            _optional_result(results[2], "SE analysis", submission.id)
+            if len(results) > 2 else None
         )
 
         # Update submission
         submission.generated_submission = generated_submission
         submission.substantial_equivalence_analysis = se_analysis
-        submission.compliance_status = ComplianceStatus.COMPLIANT if compliance_result["compliant"] else ComplianceStatus.NON_COMPLIANT
-        submission.compliance_report = {
-            "score": compliance_result["score"],
-            "analysis": compliance_result["analysis"],
-            "checked_at": datetime.utcnow().isoformat()
-        }
+        if compliance_result is not None:
+            submission.compliance_status = ComplianceStatus.COMPLIANT if compliance_result["compliant"] else ComplianceStatus.NON_COMPLIANT
+            submission.compliance_report = {
+                "score": compliance_result["score"],
+                "analysis": compliance_result["analysis"],
+                "checked_at": datetime.utcnow().isoformat()
+            }
         submission.status = SubmissionStatus.REVIEW_PENDING
         submission.updated_at = datetime.utcnow()
 
-        db.commit()
-        db.refresh(submission)
+        await db.commit()
 
-        return GenerateSubmissionResponse(
+        # Built from the values in scope; re-reading the row would only
+        # fetch the large draft and report columns just written
+        return _json_response(GenerateSubmissionResponse(
             submission_id=submission.id,
             generated_submission=generated_submission,
             substantial_equivalence_analysis=se_analysis,
             compliance_check={
                 "compliant": compliance_result["compliant"],
                 "score": compliance_result["score"]
+            } if compliance_result is not None else {
+                "compliant": None,
+                "score": None,
+                "error": "Compliance check failed"
             },
             status="success"
-        )
+        ))
 
     except Exception as e:
         submission.status = SubmissionStatus.DRAFT
-        db.commit()
+        await db.commit()
         raise HTTPException(status_code=500, detail=f"Error generating submission: {str(e)}")
 
 
@@ -290,11 +377,32 @@ async def generate_submission_document(
 # STREAMING DOCUMENT GENERATION ENDPOINT
 # ============================================================================
 
+# Buffered token text is flushed as one "chunk" event at this size or age
+_STREAM_FLUSH_CHARS = 512
+_STREAM_FLUSH_SECONDS = 0.03
+
+# Process-wide cap on concurrent streamed generations
+_GENERATION_SLOTS = asyncio.Semaphore(settings.MAX_CONCURRENT_GENERATIONS)
+
+# Closing instructions of the single-call streamed draft
+_STREAM_DOCUMENT_INSTRUCTIONS = """Generate a complete submission document with the following sections:
+1. EXECUTIVE SUMMARY
+2. DEVICE DESCRIPTION
+3. INDICATIONS FOR USE
+4. TECHNOLOGICAL CHARACTERISTICS
+5. PERFORMANCE TESTING
+6. SUBSTANTIAL EQUIVALENCE COMPARISON
+7. CLINICAL SUMMARY (if applicable)
+8. LABELING
+9. CONCLUSION
+
+Where supporting documents or FDA guidance are provided, incorporate their key findings and applicable requirements.
+Each section should be comprehensive, professionally written, and FDA-compliant."""
+
 @router.post("/submissions/{submission_id}/generate-stream")
 async def generate_submission_stream(
     submission_id: int,
     include_predicate_analysis: bool = True,
-    db: Session = Depends(get_db)
 ):
     """
     Stream FDA submission generation in real-time via Server-Sent Events.
@@ -312,32 +420,69 @@ async def generate_submission_stream(
     async def event_generator():
         """Yield SSE-formatted data frames as the document is built."""
 
-        def sse(payload: dict) -> str:
-            return f"data: {json.dumps(payload)}\n\n"
+        def sse(payload: dict) -> bytes:
+            # Pre-framed bytes pass through EventSourceResponse untouched;
+            # orjson output never contains a raw newline, so one data line is safe
+            return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+        # Agent calls running alongside the token stream; cancelled if the
+        # stream fails or the client disconnects
+        side_tasks: list[asyncio.Task] = []
+        # True while the stored status is GENERATING because of this stream
+        marked_generating = False
+        # True once this stream holds one of the _GENERATION_SLOTS
+        holds_slot = False
+
+        # Opened here rather than via Depends: FastAPI closes yield
+        # dependencies before a streaming body runs
+        db = AsyncSessionLocal()
 
         try:
             # ── Phase 0: start ──────────────────────────────────────────────
             yield sse({"type": "started", "message": "Initialising generation pipeline..."})
-            await asyncio.sleep(0.05)
+
+            # Wait for a generation slot before touching the database or
+            # the API; queued clients are told why nothing is happening
+            if _GENERATION_SLOTS.locked():
+                yield sse({"type": "progress", "percent": 0, "message": "Queued: waiting for a free generation slot..."})
+            await _GENERATION_SLOTS.acquire()
+            holds_slot = True
 
             # ── Phase 1: load submission ────────────────────────────────────
-            submission = db.query(Submission).filter(Submission.id == submission_id).first()
+            submission = await db.get(Submission, submission_id)
             if not submission:
                 yield sse({"type": "error", "message": f"Submission {submission_id} not found."})
                 return
 
             submission.status = SubmissionStatus.GENERATING
-            db.commit()
+            await db.commit()
+            marked_generating = True
+
+            # The compliance check only needs submission metadata and the SE
+            # analysis only the predicate, so each starts as soon as its
+            # inputs are known and runs while RAG, prompt building and the
+            # token stream proceed.
+            side_tasks.append(asyncio.create_task(
+                compliance_agent.check_submission_compliance(
+                    submission_data={
+                        "device_name": submission.device_name,
+                        "submission_type": submission.submission_type.value,
+                        "status": submission.status.value,
+                        "created_at": submission.created_at.isoformat(),
+                    }
+                )
+            ))
 
             yield sse({"type": "progress", "percent": 8, "message": "Submission loaded. Fetching predicate device data..."})
-            await asyncio.sleep(0.05)
 
             # ── Phase 2: predicate device ───────────────────────────────────
             predicate_data = None
             if submission.predicate_k_number:
-                predicate_device = db.query(PredicateDevice).filter(
-                    PredicateDevice.k_number == submission.predicate_k_number
-                ).first()
+                predicate_device = (await db.execute(
+                    select(*_PREDICATE_PROMPT_COLUMNS).where(
+                        PredicateDevice.k_number == submission.predicate_k_number
+                    )
+                )).one_or_none()
                 if predicate_device:
                     predicate_data = {
                         "k_number": predicate_device.k_number,
@@ -347,14 +492,29 @@ async def generate_submission_stream(
                         "technology": predicate_device.technological_characteristics,
                     }
 
+            if include_predicate_analysis and predicate_data:
+                subject_data = {
+                    "name": submission.device_name,
+                    "description": submission.device_description,
+                    "indications": submission.indications_for_use,
+                    "technology": {},
+                }
+                side_tasks.append(asyncio.create_task(
+                    document_agent.generate_substantial_equivalence_analysis(
+                        subject_device=subject_data,
+                        predicate_device=predicate_data,
+                    )
+                ))
+
             yield sse({"type": "progress", "percent": 20, "message": "Scanning uploaded and AI-reviewed documents..."})
-            await asyncio.sleep(0.05)
 
             # ── Phase 3: reviewed documents ─────────────────────────────────
-            reviewed_documents = db.query(Document).filter(
-                Document.submission_id == submission_id,
-                Document.ai_reviewed == True  # noqa: E712
-            ).all()
+            reviewed_documents = (await db.execute(
+                select(*_REVIEWED_DOCUMENT_COLUMNS).where(
+                    Document.submission_id == submission_id,
+                    Document.ai_reviewed == True  # noqa: E712
+                )
+            )).all()
 
             supporting_docs_payload = []
             for doc in reviewed_documents:
@@ -372,7 +532,6 @@ async def generate_submission_stream(
 
             # ── Phase 3b: RAG — retrieve relevant FDA guidance ──────────────
             yield sse({"type": "progress", "percent": 30, "message": "Retrieving relevant FDA regulatory guidance (RAG)..."})
-            await asyncio.sleep(0.05)
 
             rag_context = ""
             try:
@@ -390,83 +549,26 @@ async def generate_submission_stream(
                 )
 
             yield sse({"type": "progress", "percent": 35, "message": "Building 510(k) submission prompt..."})
-            await asyncio.sleep(0.05)
-
-            # ── Phase 4: build the generation prompt (mirrors document_agent) ─
-            def fmt_predicate(p: dict) -> str:
-                return (
-                    f"\n- K-Number: {p.get('k_number', 'N/A')}"
-                    f"\n- Device Name: {p.get('name', 'N/A')}"
-                    f"\n- Manufacturer: {p.get('manufacturer', 'N/A')}"
-                    f"\n- Indications: {p.get('indications', 'N/A')}\n"
-                )
 
-            def fmt_clinical(c: dict) -> str:
-                if not c:
-                    return "No clinical data provided"
-                return "\n".join(f"- {k}: {v}" for k, v in c.items())
-
-            prompt_parts = [
+            # ── Phase 4: build the generation prompt ────────────────────────
+            # Same device block as the per-section agent calls, wrapped with
+            # the whole-document instructions
+            device_context = build_510k_context(
+                device_name=submission.device_name,
+                device_description=submission.device_description,
+                manufacturer=submission.manufacturer,
+                indications_for_use=submission.indications_for_use,
+                predicate_device=predicate_data,
+                clinical_data=submission.clinical_data,
+                supporting_documents=supporting_docs_payload,
+                rag_context=rag_context,
+            )
+            full_prompt = (
                 "Generate a comprehensive 510(k) Premarket Notification submission "
-                "for the following device:\n",
-                "**Device Information:**",
-                f"- Device Name: {submission.device_name}",
-                f"- Manufacturer: {submission.manufacturer or 'Not specified'}",
-                f"- Description: {submission.device_description or 'Not provided'}",
-                f"- Indications for Use: {submission.indications_for_use or 'Not provided'}",
-                "",
-                "**Predicate Device:**",
-                fmt_predicate(predicate_data) if predicate_data else "No predicate device specified",
-                "",
-                "**Clinical Data:**",
-                fmt_clinical(submission.clinical_data) if submission.clinical_data else "No clinical data provided",
-            ]
-
-            if supporting_docs_payload:
-                prompt_parts += [
-                    "",
-                    "### SUPPORTING DOCUMENTS (AI-Reviewed):",
-                    (
-                        "The following documents were uploaded by the regulatory team and "
-                        "reviewed by AI. Incorporate their key findings into the relevant "
-                        "sections of the submission.\n"
-                    ),
-                ]
-                for idx, doc in enumerate(supporting_docs_payload, start=1):
-                    prompt_parts.append(
-                        f"**Document {idx}: {doc['document_type']}** (File: {doc['filename']})\n"
-                        f"{doc['ai_review_summary']}\n"
-                    )
-
-            # Append RAG context if available
-            if rag_context:
-                prompt_parts += [
-                    "",
-                    "## RELEVANT FDA REGULATORY GUIDANCE (Retrieved from Knowledge Base):",
-                    "The following regulatory guidance has been retrieved to help ensure "
-                    "this submission meets current FDA standards. Incorporate applicable "
-                    "requirements into the relevant sections below.",
-                    "",
-                    rag_context,
-                ]
-
-            prompt_parts += [
-                "",
-                "Generate a complete submission document with the following sections:",
-                "1. EXECUTIVE SUMMARY",
-                "2. DEVICE DESCRIPTION",
-                "3. INDICATIONS FOR USE",
-                "4. TECHNOLOGICAL CHARACTERISTICS",
-                "5. PERFORMANCE TESTING",
-                "6. SUBSTANTIAL EQUIVALENCE COMPARISON",
-                "7. CLINICAL SUMMARY (if applicable)",
-                "8. LABELING",
-                "9. CONCLUSION",
-                "",
-                "Each section should be comprehensive, professionally written, and FDA-compliant.",
-            ]
-
-            full_prompt = "\n".join(prompt_parts)
+                "for the following device:\n\n"
+                f"{device_context}\n\n"
+                f"{_STREAM_DOCUMENT_INSTRUCTIONS}"
+            )
 
             system_prompt = (
                 "You are an FDA regulatory affairs expert specializing in medical device submissions. "
@@ -475,101 +577,122 @@ async def generate_submission_stream(
             )
 
             yield sse({"type": "progress", "percent": 45, "message": "Connecting to Claude AI and starting generation..."})
-            await asyncio.sleep(0.05)
 
             # ── Phase 5: stream from Anthropic ──────────────────────────────
-            client = anthropic_sdk.AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
-            full_text_chunks: list[str] = []
+            # Shared client: its keep-alive pool is reused across streams
+            # instead of a fresh connection + TLS handshake per request, and
+            # the stream counts against the process-wide Anthropic limits
+            full_text = io.StringIO()
 
-            async with client.messages.stream(
+            async with anthropic_slot(), anthropic_client.messages.stream(
                 model=settings.CLAUDE_MODEL,
                 max_tokens=8192,
                 system=system_prompt,
                 messages=[{"role": "user", "content": full_prompt}],
             ) as stream:
+                # Coalesce tokens into one chunk event per ~512 chars or
+                # ~30 ms instead of one frame per token
+                loop = asyncio.get_running_loop()
+                pending: list[str] = []
+                pending_chars = 0
+                last_flush = loop.time()
                 async for text_chunk in stream.text_stream:
-                    full_text_chunks.append(text_chunk)
-                    yield sse({"type": "chunk", "text": text_chunk})
-
-            generated_submission = "".join(full_text_chunks)
+                    full_text.write(text_chunk)
+                    pending.append(text_chunk)
+                    pending_chars += len(text_chunk)
+                    now = loop.time()
+                    if pending_chars >= _STREAM_FLUSH_CHARS or now - last_flush >= _STREAM_FLUSH_SECONDS:
+                        yield sse({"type": "chunk", "text": "".join(pending)})
+                        pending.clear()
+                        pending_chars = 0
+                        last_flush = now
+                if pending:
+                    yield sse({"type": "chunk", "text": "".join(pending)})
+
+            generated_submission = full_text.getvalue()
+            full_text.close()
 
             yield sse({"type": "progress", "percent": 80, "message": "AI generation complete. Running compliance check..."})
-            await asyncio.sleep(0.05)
 
-            # ── Phase 6: compliance check (reuse existing agent) ────────────
-            compliance_result = await compliance_agent.check_submission_compliance(
-                submission_data={
-                    "device_name": submission.device_name,
-                    "submission_type": submission.submission_type.value,
-                    "status": submission.status.value,
-                    "created_at": submission.created_at.isoformat(),
-                }
+            # ── Phase 6/7: compliance check and SE analysis (started above) ─
+            side_results = await asyncio.gather(*side_tasks, return_exceptions=True)
+            compliance_result = _optional_result(side_results[0], "Compliance check", submission_id)
+            se_analysis = (
+                _optional_result(side_results[1], "SE analysis", submission_id)
+                if len(side_results) > 1 else None
             )
 
             yield sse({"type": "progress", "percent": 90, "message": "Saving generated document to database..."})
-            await asyncio.sleep(0.05)
-
-            # ── Phase 7: optional substantial equivalence analysis ──────────
-            se_analysis = None
-            if include_predicate_analysis and predicate_data:
-                subject_data = {
-                    "name": submission.device_name,
-                    "description": submission.device_description,
-                    "indications": submission.indications_for_use,
-                    "technology": {},
-                }
-                se_analysis = await document_agent.generate_substantial_equivalence_analysis(
-                    subject_device=subject_data,
-                    predicate_device=predicate_data,
-                )
 
             # ── Phase 8: persist ────────────────────────────────────────────
-            submission.generated_submission = generated_submission
-            submission.substantial_equivalence_analysis = se_analysis
-            submission.compliance_status = (
-                ComplianceStatus.COMPLIANT
-                if compliance_result["compliant"]
-                else ComplianceStatus.NON_COMPLIANT
-            )
-            submission.compliance_report = {
-                "score": compliance_result["score"],
-                "analysis": compliance_result["analysis"],
-                "checked_at": datetime.utcnow().isoformat(),
+            # One UPDATE by primary key; the ORM flush would first have to
+            # diff the tracked object.  Statements like this bypass the
+            # response-cache mapper events, hence the explicit invalidation.
+            values = {
+                "generated_submission": generated_submission,
+                "substantial_equivalence_analysis": se_analysis,
+                "status": SubmissionStatus.REVIEW_PENDING,
+                "updated_at": datetime.utcnow(),
             }
-            submission.status = SubmissionStatus.REVIEW_PENDING
-            submission.updated_at = datetime.utcnow()
-            db.commit()
+            if compliance_result is not None:
+                values["compliance_status"] = (
+                    ComplianceStatus.COMPLIANT
+                    if compliance_result["compliant"]
+                    else ComplianceStatus.NON_COMPLIANT
+                )
+                values["compliance_report"] = {
+                    "score": compliance_result["score"],
+                    "analysis": compliance_result["analysis"],
+                    "checked_at": datetime.utcnow().isoformat(),
+                }
+            await db.execute(
+                update(Submission).where(Submission.id == submission_id).values(**values)
+            )
+            await db.commit()
+            marked_generating = False
+            await invalidate_submission(submission_id)
 
             yield sse({
                 "type": "completed",
                 "percent": 100,
                 "submission_id": submission_id,
-                "compliance_score": compliance_result["score"],
-                "compliant": compliance_result["compliant"],
+                "compliance_score": compliance_result["score"] if compliance_result else None,
+                "compliant": compliance_result["compliant"] if compliance_result else None,
                 "message": "510(k) submission generated and saved successfully.",
             })
 
         except Exception as exc:
             logger.exception("Streaming generation failed for submission_id=%d", submission_id)
-            # Best-effort rollback
-            try:
-                submission_obj = db.query(Submission).filter(Submission.id == submission_id).first()
-                if submission_obj and submission_obj.status == SubmissionStatus.GENERATING:
-                    submission_obj.status = SubmissionStatus.DRAFT
-                    db.commit()
-            except Exception:
-                pass
+            # Best-effort rollback.  The in-scope submission is reset directly:
+            # the flag already says whether its stored status is GENERATING,
+            # so nothing needs re-reading (and the rollback has expired it).
+            if marked_generating:
+                try:
+                    await db.rollback()
+                    submission.status = SubmissionStatus.DRAFT
+                    await db.commit()
+                except Exception:
+                    pass
             yield sse({"type": "error", "message": str(exc)})
-
-    return StreamingResponse(
+        finally:
+            for task in side_tasks:
+                task.cancel()
+            await db.close()
+            if holds_slot:
+                _GENERATION_SLOTS.release()
+
+    # EventSourceResponse sets the no-cache / keep-alive / X-Accel-Buffering
+    # headers and sends a keep-alive comment every 15 s so proxies do not
+    # drop the connection during long silent phases.  An explicit identity
+    # encoding keeps compression middleware and proxies from buffering the
+    # stream to gzip it.  Data frames are yielded pre-framed as bytes, which
+    # it passes through as-is; sep="\n" keeps its ping comments
+    # "\n\n"-terminated too, since the frontend splits on that.
+    return EventSourceResponse(
         event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "X-Accel-Buffering": "no",
-            "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*",
-        },
+        headers={"Access-Control-Allow-Origin": "*", "Content-Encoding": "identity"},
+        ping=15,
+        sep="\n",
     )
 
 
@@ -578,43 +701,47 @@ async def generate_submission_stream(
 # ============================================================================
 
 @router.post("/reviews", response_model=ReviewResponse, status_code=201)
-async def create_review(review: ReviewCreate, db: Session = Depends(get_db)):
+async def create_review(review: ReviewCreate, db: AsyncSession = Depends(get_async_db)):
     """Submit a review for a submission (HITL)."""
     # Verify submission exists
-    submission = db.query(Submission).filter(Submission.id == review.submission_id).first()
+    submission = await db.get(Submission, review.submission_id)
 
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
 
-    db_review = SubmissionReview(
-        submission_id=review.submission_id,
-        reviewer_name=review.reviewer_name,
-        reviewer_email=review.reviewer_email,
-        section_reviewed=review.section_reviewed,
-        comments=review.comments,
-        suggested_changes=review.suggested_changes,
-        approved=review.approved,
-        reviewed_at=datetime.utcnow()
+    # INSERT ... RETURNING hands back the stored row, defaults included,
+    # so no refresh is needed after the commit
+    db_review = await db.scalar(
+        insert(SubmissionReview).values(
+            submission_id=review.submission_id,
+            reviewer_name=review.reviewer_name,
+            reviewer_email=review.reviewer_email,
+            section_reviewed=review.section_reviewed,
+            comments=review.comments,
+            suggested_changes=review.suggested_changes,
+            approved=review.approved,
+            reviewed_at=datetime.utcnow()
+        ).returning(SubmissionReview)
     )
 
-    db.add(db_review)
-
     # Update submission status based on review
     if review.approved == 1:
         # Check if all sections approved
-        all_reviews = db.query(SubmissionReview).filter(
-            SubmissionReview.submission_id == review.submission_id
-        ).all()
+        not_approved = await db.scalar(
+            select(func.count()).select_from(SubmissionReview).where(
+                SubmissionReview.submission_id == review.submission_id,
+                SubmissionReview.approved.is_distinct_from(1)  # NULL counts as not approved
+            )
+        )
 
-        if all(r.approved == 1 for r in all_reviews):
+        if not_approved == 0:
             submission.status = SubmissionStatus.APPROVED
     elif review.approved == -1:
         submission.status = SubmissionStatus.REJECTED
 
-    db.commit()
-    db.refresh(db_review)
+    await db.commit()
 
-    return db_review
+    return _json_response(ReviewResponse.from_orm_trusted(db_review), status_code=201)
 
 
 @router.get("/submissions/{submission_id}/reviews", response_model=List[ReviewResponse])
@@ -624,7 +751,7 @@ async def get_submission_reviews(submission_id: int, db: Session = Depends(get_d
         SubmissionReview.submission_id == submission_id
     ).all()
 
-    return reviews
+    return _json_list_response(ReviewListAdapter, ReviewResponse, reviews)
 
 
 # ============================================================================
@@ -634,7 +761,7 @@ async def get_submission_reviews(submission_id: int, db: Session = Depends(get_d
 @router.post("/adverse-events", response_model=AdverseEventResponse, status_code=201)
 async def create_adverse_event(
     event: AdverseEventCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Report an adverse event."""
     # Generate analysis using AI
@@ -648,26 +775,27 @@ async def create_adverse_event(
         "event_date": event.event_date.isoformat() if event.event_date else None
     })
 
-    db_event = AdverseEvent(
-        submission_id=event.submission_id,
-        event_id=str(uuid.uuid4()),
-        device_name=event.device_name,
-        event_type=event.event_type,
-        severity=event.severity,
-        description=event.description,
-        patient_age=event.patient_age,
-        patient_sex=event.patient_sex,
-        event_date=event.event_date,
-        reported_date=datetime.utcnow(),
-        ai_analysis=analysis_result["analysis"],
-        risk_score=analysis_result["risk_score"]
+    # Single round trip: the inserted row comes back via RETURNING
+    db_event = await db.scalar(
+        insert(AdverseEvent).values(
+            submission_id=event.submission_id,
+            event_id=str(uuid.uuid4()),
+            device_name=event.device_name,
+            event_type=event.event_type,
+            severity=event.severity,
+            description=event.description,
+            patient_age=event.patient_age,
+            patient_sex=event.patient_sex,
+            event_date=event.event_date,
+            reported_date=datetime.utcnow(),
+            ai_analysis=analysis_result["analysis"],
+            risk_score=analysis_result["risk_score"]
+        ).returning(AdverseEvent)
     )
 
-    db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
+    await db.commit()
 
-    return db_event
+    return _json_response(AdverseEventResponse.from_orm_trusted(db_event), status_code=201)
 
 
 @router.get("/adverse-events", response_model=List[AdverseEventResponse])
@@ -689,51 +817,59 @@ async def list_adverse_events(
 
     events = query.order_by(AdverseEvent.risk_score.desc()).offset(skip).limit(limit).all()
 
-    return events
+    return _json_list_response(AdverseEventListAdapter, AdverseEventResponse, events)
 
 
 @router.get("/adverse-events/monitor/{device_name}")
-async def monitor_faers(device_name: str, db: Session = Depends(get_db)):
+async def monitor_faers(device_name: str, db: AsyncSession = Depends(get_async_db)):
     """Monitor FAERS database for device-related adverse events."""
     try:
         events = await adverse_event_agent.monitor_faers_database(device_name)
 
-        # Save new events to database
-        saved_count = 0
-        for event_data in events:
-            # Check if event already exists
-            existing = db.query(AdverseEvent).filter(
-                AdverseEvent.event_id == event_data["event_id"]
-            ).first()
-
-            if not existing:
-                # Analyze event
-                analysis_result = await adverse_event_agent.analyze_adverse_event(event_data)
-
-                db_event = AdverseEvent(
-                    event_id=event_data["event_id"],
-                    device_name=event_data["device_name"],
-                    event_type=event_data["event_type"],
-                    severity=event_data["severity"],
-                    description=event_data["description"],
-                    patient_age=event_data.get("patient_age"),
-                    patient_sex=event_data.get("patient_sex"),
-                    reported_date=datetime.utcnow(),
-                    ai_analysis=analysis_result["analysis"],
-                    risk_score=analysis_result["risk_score"]
-                )
+        # One event per report id (FAERS pages can repeat a report), then
+        # skip those already stored, checked with one IN query rather than
+        # one lookup per event
+        candidates = {e["event_id"]: e for e in events}
+        existing_ids = set((await db.execute(
+            select(AdverseEvent.event_id).where(AdverseEvent.event_id.in_(candidates))
+        )).scalars()) if candidates else set()
+        new_events = [e for event_id, e in candidates.items() if event_id not in existing_ids]
+
+        # Analyse new events concurrently, a bounded number at a time
+        semaphore = asyncio.Semaphore(settings.FAERS_ANALYSIS_CONCURRENCY)
+
+        async def analyze(event_data: dict) -> dict:
+            async with semaphore:
+                return await adverse_event_agent.analyze_adverse_event(event_data)
 
-                db.add(db_event)
-                saved_count += 1
+        analyses = await asyncio.gather(*(analyze(e) for e in new_events))
+
+        # Save new events to database
+        db.add_all([
+            AdverseEvent(
+                event_id=event_data["event_id"],
+                device_name=event_data["device_name"],
+                event_type=event_data["event_type"],
+                severity=event_data["severity"],
+                description=event_data["description"],
+                patient_age=event_data.get("patient_age"),
+                patient_sex=event_data.get("patient_sex"),
+                reported_date=datetime.utcnow(),
+                ai_analysis=analysis_result["analysis"],
+                risk_score=analysis_result["risk_score"]
+            )
+            for event_data, analysis_result in zip(new_events, analyses)
+        ])
+        saved_count = len(new_events)
 
-        db.commit()
+        await db.commit()
 
-        return {
+        return ORJSONResponse({
             "device_name": device_name,
             "events_found": len(events),
             "new_events_saved": saved_count,
             "message": f"Monitoring complete. Found {len(events)} events, saved {saved_count} new events."
-        }
+        })
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error monitoring FAERS: {str(e)}")
@@ -750,23 +886,22 @@ async def search_predicate_devices(
     device_class: str = None,
     skip: int = 0,
     limit: int = 20,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Search for predicate devices."""
-    query = db.query(PredicateDevice)
+    stmt = select(PredicateDevice)
 
     if device_name:
-        query = query.filter(PredicateDevice.device_name.ilike(f"%{device_name}%"))
+        stmt = stmt.where(PredicateDevice.device_name.ilike(f"%{device_name}%"))
 
     if product_code:
-        query = query.filter(PredicateDevice.product_code == product_code)
+        stmt = stmt.where(PredicateDevice.product_code == product_code)
 
     if device_class:
-        query = query.filter(PredicateDevice.device_class == device_class)
-
-    devices = query.offset(skip).limit(limit).all()
+        stmt = stmt.where(PredicateDevice.device_class == device_class)
 
-    return devices
+    result = await db.execute(stmt.offset(skip).limit(limit))
+    return _json_list_response(PredicateDeviceListAdapter, PredicateDeviceResponse, result.scalars())
 
 
 @router.get("/predicate-devices/{k_number}", response_model=PredicateDeviceResponse)
@@ -777,7 +912,7 @@ async def get_predicate_device(k_number: str, db: Session = Depends(get_db)):
     if not device:
         raise HTTPException(status_code=404, detail="Predicate device not found")
 
-    return device
+    return _json_response(PredicateDeviceResponse.from_orm_trusted(device))
 
 
 # ============================================================================
@@ -787,10 +922,10 @@ async def get_predicate_device(k_number: str, db: Session = Depends(get_db)):
 @router.post("/compliance/check", response_model=ComplianceCheckResponse)
 async def check_compliance(
     request: ComplianceCheckRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Perform 21 CFR Part 11 compliance check."""
-    submission = db.query(Submission).filter(Submission.id == request.submission_id).first()
+    submission = await db.get(Submission, request.submission_id)
 
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
@@ -818,20 +953,20 @@ async def check_compliance(
         "checked_at": datetime.utcnow().isoformat()
     }
 
-    db.commit()
+    await db.commit()
 
     # Parse issues and recommendations from analysis
     # (In production, the agent would return structured data)
     issues = []
     recommendations = []
 
-    return ComplianceCheckResponse(
+    return _json_response(ComplianceCheckResponse(
         submission_id=request.submission_id,
         compliance_status=compliance_status,
         issues=issues,
         recommendations=recommendations,
         score=result["score"]
-    )
+    ))
 
 
 @router.get("/compliance/checklist/{submission_type}")
@@ -840,10 +975,12 @@ async def get_compliance_checklist(submission_type: str):
     try:
         checklist = await compliance_agent.generate_compliance_checklist(submission_type)
 
-        return {
+        # Returned as a response so the nested checklist goes straight to
+        # orjson instead of through jsonable_encoder first
+        return ORJSONResponse({
             "submission_type": submission_type,
             "checklist": checklist
-        }
+        })
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating checklist: {str(e)}")
@@ -887,7 +1024,7 @@ async def search_similar_submissions(
             "labeling, performance_testing, sterilization, clinical_data, general"
         ),
     ),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Semantic search over the FDA regulatory knowledge base.
@@ -903,6 +1040,13 @@ async def search_similar_submissions(
     - content_preview: first 400 characters of the guidance text
     - content: full guidance text
     """
+    # Identical searches within a short window (retries, type-ahead) are
+    # answered from the in-process cache without embedding the query again
+    cache_key = (q, limit, section)
+    cached = cached_similar_search(cache_key)
+    if cached is not None:
+        return cached
+
     try:
         from ..services.rag_service import search_similar
 
@@ -914,7 +1058,7 @@ async def search_similar_submissions(
         )
 
         if not results:
-            return {
+            return store_similar_search(cache_key, orjson.dumps({
                 "query": q,
                 "section_filter": section,
                 "total_results": 0,
@@ -924,9 +1068,9 @@ async def search_similar_submissions(
                     "Ensure the knowledge base is seeded via "
                     "POST /api/v1/admin/seed-knowledge-base."
                 ),
-            }
+            }))
 
-        return {
+        return store_similar_search(cache_key, orjson.dumps({
             "query": q,
             "section_filter": section,
             "total_results": len(results),
@@ -936,13 +1080,13 @@ async def search_similar_submissions(
                     "title": entry.title,
                     "content_type": entry.content_type,
                     "section": entry.section,
-                    "content_preview": entry.content[:400] + "..." if len(entry.content) > 400 else entry.content,
+                    "content_preview": entry.content_preview,
                     "content": entry.content,
                     "created_at": entry.created_at.isoformat() if entry.created_at else None,
                 }
                 for entry in results
             ],
-        }
+        }))
 
     except Exception as exc:
         logger.error("similar-submissions search failed: %s", exc)
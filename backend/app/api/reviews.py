@@ -1,13 +1,16 @@
 """Review management API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import Optional
+import io
 from datetime import datetime
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func, insert, select, text, update
+from sqlalchemy.orm import Session, joinedload
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
-from ..core.database import get_db
+from ..core.database import engine, get_db, utc_now
 from ..models.review import Review, ReviewChecklistItem, SubmissionStatusLog
 from ..models.submission import Submission
+from ..services.response_cache import invalidate_submission
 
 router = APIRouter(prefix="/api/v1/submissions", tags=["reviews"])
 
@@ -33,6 +36,51 @@ FDA_SECTIONS = [
     (19, "Patent Information"),
     (20, "Additional Information"),
 ]
+# Section number -> name, for lookups and membership checks
+FDA_SECTION_NAMES: dict[int, str] = dict(FDA_SECTIONS)
+
+# Initial checklist row per FDA section; review_id is filled in per review
+_CHECKLIST_ROWS = [
+    {
+        "section_number": section_num,
+        "section_name": section_name,
+        "is_complete": False,
+        "is_applicable": True,
+        "completeness_percent": 0,
+    }
+    for section_num, section_name in FDA_SECTION_NAMES.items()
+]
+
+# The same rows pre-rendered once as COPY text input; only the review id
+# varies per review (updated_at takes its server default).  Section names
+# are constants with no tab, newline or backslash, so they need no COPY
+# escaping.
+_CHECKLIST_COPY_SQL = (
+    "COPY review_checklist_items (review_id, section_number, section_name, "
+    "is_complete, is_applicable, completeness_percent) FROM STDIN"
+)
+_CHECKLIST_COPY_TEMPLATE = "".join(
+    f"{{review_id}}\t{section_num}\t{section_name}\tf\tt\t0\n"
+    for section_num, section_name in FDA_SECTION_NAMES.items()
+)
+# COPY needs psycopg2's copy_expert; the driver is fixed for the process
+_USE_COPY = engine.dialect.driver == "psycopg2"
+
+
+def _insert_checklist(db: Session, review_id: int) -> None:
+    """Create a review's checklist rows in one COPY (one INSERT without psycopg2)."""
+    if _USE_COPY:
+        cursor = db.connection().connection.cursor()
+        try:
+            payload = _CHECKLIST_COPY_TEMPLATE.format(review_id=review_id)
+            cursor.copy_expert(_CHECKLIST_COPY_SQL, io.StringIO(payload))
+        finally:
+            cursor.close()
+        return
+    db.execute(
+        insert(ReviewChecklistItem),
+        [{**row, "review_id": review_id} for row in _CHECKLIST_ROWS],
+    )
 
 
 class ReviewCreate(BaseModel):
@@ -55,39 +103,96 @@ class ReviewStatusUpdate(BaseModel):
     overall_notes: Optional[str] = None
 
 
-def review_to_dict(review):
-    return {
-        "id": review.id,
-        "submission_id": review.submission_id,
-        "reviewer_name": review.reviewer_name,
-        "review_round": review.review_round,
-        "status": review.status,
-        "overall_notes": review.overall_notes,
-        "started_at": review.started_at.isoformat() if review.started_at else None,
-        "completed_at": review.completed_at.isoformat() if review.completed_at else None,
-        "created_at": review.created_at.isoformat() if review.created_at else None,
-    }
+# Response models.  Rows are validated from their attributes and encoded by
+# pydantic-core in one call, rather than copied into dicts field by field
+# and walked again by the JSON encoder.
 
 
-def checklist_to_dict(item):
-    return {
-        "id": item.id,
-        "review_id": item.review_id,
-        "section_number": item.section_number,
-        "section_name": item.section_name,
-        "is_complete": item.is_complete,
-        "is_applicable": item.is_applicable,
-        "completeness_percent": item.completeness_percent,
-        "deficiency_level": item.deficiency_level,
-        "reviewer_notes": item.reviewer_notes,
-        "assignee": item.assignee,
-        "checked_at": item.checked_at.isoformat() if item.checked_at else None,
-    }
+class ReviewOut(BaseModel):
+    id: int
+    submission_id: int
+    reviewer_name: Optional[str] = None
+    review_round: Optional[int] = None
+    status: Optional[str] = None
+    overall_notes: Optional[str] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ChecklistItemOut(BaseModel):
+    id: int
+    review_id: int
+    section_number: int
+    section_name: str
+    is_complete: Optional[bool] = None
+    is_applicable: Optional[bool] = None
+    completeness_percent: Optional[int] = None
+    deficiency_level: Optional[str] = None
+    reviewer_notes: Optional[str] = None
+    assignee: Optional[str] = None
+    checked_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ReviewDetailOut(ReviewOut):
+    checklist: list[ChecklistItemOut] = Field(default_factory=list, validation_alias="checklist_items")
+    overall_progress: int = 0
+
+
+class StatusLogOut(BaseModel):
+    id: int
+    previous_status: Optional[str] = None
+    new_status: Optional[str] = None
+    changed_by: Optional[str] = None
+    notes: Optional[str] = None
+    changed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
 
+_REVIEW_ADAPTER = TypeAdapter(ReviewOut)
+_REVIEW_LIST_ADAPTER = TypeAdapter(list[ReviewOut])
+_CHECKLIST_ITEM_ADAPTER = TypeAdapter(ChecklistItemOut)
+_STATUS_LOG_LIST_ADAPTER = TypeAdapter(list[StatusLogOut])
 
-@router.post("/{submission_id}/reviews")
+
+def _dump_json(adapter: TypeAdapter, value) -> bytes:
+    """Validate ORM objects or result rows by attribute and encode them as JSON."""
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+def _json_response(content: bytes, headers: Optional[dict] = None) -> Response:
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+def _keyset_page(adapter: TypeAdapter, rows: list, limit: int) -> Response:
+    """Return one page as a JSON array; a full page advertises the next cursor.
+
+    The body stays a bare array for existing clients, so the cursor (the
+    last row's id) travels in the ``X-Next-Cursor`` header.
+    """
+    headers = {"X-Next-Cursor": str(rows[-1].id)} if len(rows) == limit else None
+    return _json_response(_dump_json(adapter, rows), headers)
+
+
+def overall_progress(items):
+    """Mean completeness of the applicable items, in one pass."""
+    total = 0
+    count = 0
+    for item in items:
+        if item.is_applicable:
+            total += item.completeness_percent
+            count += 1
+    return total // count if count else 0
+
+
+@router.post("/{submission_id}/reviews", response_model=ReviewOut)
 async def create_review(submission_id: int, body: ReviewCreate, db: Session = Depends(get_db)):
-    submission = db.query(Submission).filter(Submission.id == submission_id).first()
+    submission = db.get(Submission, submission_id)
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
 
@@ -96,130 +201,153 @@ async def create_review(submission_id: int, body: ReviewCreate, db: Session = De
         reviewer_name=body.reviewer_name,
         review_round=body.review_round,
         status="in_progress",
-        started_at=datetime.utcnow(),
+        started_at=utc_now(),
         overall_notes=body.overall_notes,
     )
     db.add(review)
     db.flush()
 
-    for section_num, section_name in FDA_SECTIONS:
-        db.add(ReviewChecklistItem(
-            review_id=review.id,
-            section_number=section_num,
-            section_name=section_name,
-            is_complete=False,
-            is_applicable=True,
-            completeness_percent=0,
-        ))
+    # One bulk statement for the whole checklist rather than an ORM
+    # object (and unit-of-work entry) per section
+    _insert_checklist(db, review.id)
 
     db.commit()
     db.refresh(review)
-    return review_to_dict(review)
+    return _json_response(_dump_json(_REVIEW_ADAPTER, review))
 
 
-@router.get("/{submission_id}/reviews")
-async def list_reviews(submission_id: int, db: Session = Depends(get_db)):
-    submission = db.query(Submission).filter(Submission.id == submission_id).first()
+@router.get("/{submission_id}/reviews", response_model=list[ReviewOut])
+async def list_reviews(
+    submission_id: int,
+    limit: int = Query(100, ge=1, le=500),
+    after_id: Optional[int] = Query(None, description="Keyset cursor from X-Next-Cursor"),
+    db: Session = Depends(get_db),
+):
+    submission = db.get(Submission, submission_id)
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
-    reviews = db.query(Review).filter(Review.submission_id == submission_id).all()
-    return [review_to_dict(r) for r in reviews]
+    query = db.query(Review).filter(Review.submission_id == submission_id)
+    if after_id is not None:
+        query = query.filter(Review.id > after_id)
+    reviews = query.order_by(Review.id).limit(limit).all()
+    return _keyset_page(_REVIEW_LIST_ADAPTER, reviews, limit)
 
 
-@router.get("/{submission_id}/reviews/{review_id}")
+@router.get("/{submission_id}/reviews/{review_id}", response_model=ReviewDetailOut)
 async def get_review(submission_id: int, review_id: int, db: Session = Depends(get_db)):
-    review = db.query(Review).filter(
-        Review.id == review_id,
-        Review.submission_id == submission_id
-    ).first()
-    if not review:
+    # Primary-key get, with the checklist loaded in the same query instead
+    # of a lazy load afterwards
+    review = db.get(Review, review_id, options=[joinedload(Review.checklist_items)])
+    if not review or review.submission_id != submission_id:
         raise HTTPException(status_code=404, detail="Review not found")
 
-    result = review_to_dict(review)
-    result["checklist"] = [checklist_to_dict(item) for item in review.checklist_items]
-    applicable = [i for i in review.checklist_items if i.is_applicable]
-    result["overall_progress"] = (sum(i.completeness_percent for i in applicable) // len(applicable)) if applicable else 0
-    return result
+    detail = ReviewDetailOut.model_validate(review, from_attributes=True)
+    detail.overall_progress = overall_progress(review.checklist_items)
+    return _json_response(detail.model_dump_json())
 
 
-@router.patch("/{submission_id}/reviews/{review_id}/checklist/{item_id}")
+@router.patch(
+    "/{submission_id}/reviews/{review_id}/checklist/{item_id}", response_model=ChecklistItemOut
+)
 async def update_checklist_item(
     submission_id: int, review_id: int, item_id: int,
     body: ChecklistItemUpdate, db: Session = Depends(get_db)
 ):
-    item = db.query(ReviewChecklistItem).filter(
-        ReviewChecklistItem.id == item_id,
-        ReviewChecklistItem.review_id == review_id
-    ).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Checklist item not found")
-
-    for field, value in body.model_dump(exclude_unset=True).items():
-        setattr(item, field, value)
+    values = body.model_dump(exclude_unset=True)
     if body.is_complete is True:
-        item.checked_at = datetime.utcnow()
+        values["checked_at"] = utc_now()
         if body.completeness_percent is None:
-            item.completeness_percent = 100
-    item.updated_at = datetime.utcnow()
-
-    review = db.query(Review).filter(Review.id == review_id).first()
-    if review:
-        applicable = [i for i in review.checklist_items if i.is_applicable]
-        if applicable:
-            progress = sum(i.completeness_percent for i in applicable) // len(applicable)
-            submission = db.query(Submission).filter(Submission.id == submission_id).first()
-            if submission and hasattr(submission, "progress_percent"):
-                submission.progress_percent = progress
+            values["completeness_percent"] = 100
+    # One UPDATE ... RETURNING instead of load, flush and refresh; updated_at
+    # comes from the column's server-side onupdate
+    item = db.scalar(
+        update(ReviewChecklistItem)
+        .where(ReviewChecklistItem.id == item_id, ReviewChecklistItem.review_id == review_id)
+        .values(**values)
+        .returning(ReviewChecklistItem)
+    )
+    if item is None:
+        raise HTTPException(status_code=404, detail="Checklist item not found")
+    # Encoded now: the commit below expires the returned object
+    content = _dump_json(_CHECKLIST_ITEM_ADAPTER, item)
+
+    # Recompute the submission's progress server-side in the same UPDATE
+    # rather than loading the review's whole checklist.  With no applicable
+    # items the division yields NULL and the stored value is kept.
+    progress = (
+        select(func.sum(ReviewChecklistItem.completeness_percent) / func.nullif(func.count(), 0))
+        .where(
+            ReviewChecklistItem.review_id == review_id,
+            ReviewChecklistItem.is_applicable == True,  # noqa: E712
+        )
+        .scalar_subquery()
+    )
+    db.execute(
+        update(Submission)
+        .where(Submission.id == submission_id)
+        .values(progress_percent=func.coalesce(progress, Submission.progress_percent))
+    )
 
     db.commit()
-    db.refresh(item)
-    return checklist_to_dict(item)
-
-
-@router.patch("/{submission_id}/reviews/{review_id}")
+    await invalidate_submission(submission_id)
+    return _json_response(content)
+
+
+# Status change, history entry and the updated row in one statement.  All
+# parts of the CTE see the pre-update snapshot, so the subquery reads the
+# previous status; the log row is only written if the review matched.
+_UPDATE_REVIEW_SQL = text("""
+WITH upd AS (
+    UPDATE reviews SET
+        status = :status,
+        overall_notes = COALESCE(NULLIF(:notes, ''), overall_notes),
+        completed_at = CASE WHEN :status IN ('completed', 'approved', 'rejected')
+                            THEN timezone('utc', now()) ELSE completed_at END,
+        updated_at = timezone('utc', now())
+    WHERE id = :review_id AND submission_id = :submission_id
+    RETURNING *
+), log AS (
+    INSERT INTO submission_status_logs
+        (submission_id, previous_status, new_status, changed_by, notes, changed_at)
+    SELECT upd.submission_id,
+           (SELECT status FROM reviews WHERE id = :review_id),
+           :status, 'reviewer', :notes, timezone('utc', now())
+    FROM upd
+)
+SELECT * FROM upd
+""")
+
+
+@router.patch("/{submission_id}/reviews/{review_id}", response_model=ReviewOut)
 async def update_review(
     submission_id: int, review_id: int,
     body: ReviewStatusUpdate, db: Session = Depends(get_db)
 ):
-    review = db.query(Review).filter(
-        Review.id == review_id,
-        Review.submission_id == submission_id
-    ).first()
-    if not review:
+    review = db.execute(_UPDATE_REVIEW_SQL, {
+        "review_id": review_id,
+        "submission_id": submission_id,
+        "status": body.status,
+        "notes": body.overall_notes,
+    }).first()
+    if review is None:
         raise HTTPException(status_code=404, detail="Review not found")
-
-    prev_status = review.status
-    review.status = body.status
-    if body.overall_notes:
-        review.overall_notes = body.overall_notes
-    if body.status in ("completed", "approved", "rejected"):
-        review.completed_at = datetime.utcnow()
-
-    db.add(SubmissionStatusLog(
-        submission_id=submission_id,
-        previous_status=prev_status,
-        new_status=body.status,
-        changed_by="reviewer",
-        notes=body.overall_notes,
-    ))
     db.commit()
-    db.refresh(review)
-    return review_to_dict(review)
+    return _json_response(_dump_json(_REVIEW_ADAPTER, review))
 
 
-@router.get("/{submission_id}/status-history")
-async def get_status_history(submission_id: int, db: Session = Depends(get_db)):
-    logs = db.query(SubmissionStatusLog).filter(
+@router.get("/{submission_id}/status-history", response_model=list[StatusLogOut])
+async def get_status_history(
+    submission_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    before_id: Optional[int] = Query(None, description="Keyset cursor from X-Next-Cursor"),
+    db: Session = Depends(get_db),
+):
+    # Newest first by id (assigned in changed_at order), so the cursor is a
+    # plain id comparison on the (submission_id, id) index
+    query = db.query(SubmissionStatusLog).filter(
         SubmissionStatusLog.submission_id == submission_id
-    ).order_by(SubmissionStatusLog.changed_at.desc()).all()
-    return [
-        {
-            "id": log.id,
-            "previous_status": log.previous_status,
-            "new_status": log.new_status,
-            "changed_by": log.changed_by,
-            "notes": log.notes,
-            "changed_at": log.changed_at.isoformat() if log.changed_at else None,
-        }
-        for log in logs
-    ]
+    )
+    if before_id is not None:
+        query = query.filter(SubmissionStatusLog.id < before_id)
+    logs = query.order_by(SubmissionStatusLog.id.desc()).limit(limit).all()
+    return _keyset_page(_STATUS_LOG_LIST_ADAPTER, logs, limit)
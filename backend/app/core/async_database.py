@@ -0,0 +1,68 @@
+"""Async database engine and session management.
+
+Runs alongside the sync engine in ``database.py`` while endpoints are
+migrated: handlers that take ``Depends(get_async_db)`` query through
+asyncpg and no longer block the event loop on database I/O.
+"""
+import logging
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from .config import settings
+from .database import json_dumps
+
+logger = logging.getLogger(__name__)
+
+
+def _async_url(url: str) -> str:
+    """Map the configured sync DATABASE_URL onto the asyncpg driver."""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(
+        hide_password=False
+    )
+
+
+# Create async database engine
+async_engine = create_async_engine(
+    _async_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    # Sized above the sync pool: every migrated handler and each streaming
+    # generation holds a connection from here
+    pool_size=20,
+    max_overflow=40,
+    echo=settings.DEBUG,
+    json_serializer=json_dumps,
+    json_deserializer=orjson.loads,
+)
+
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _register_vector_codec(dbapi_connection, connection_record):
+    """Teach asyncpg the pgvector type so embeddings round-trip as vectors."""
+    try:
+        from pgvector.asyncpg import register_vector
+        dbapi_connection.run_async(register_vector)
+    except ImportError:
+        pass  # pgvector not installed: embeddings use the Text fallback
+    except Exception as exc:
+        # e.g. the vector extension has not been created in this database
+        logger.warning("pgvector codec not registered: %s", exc)
+
+# Create async session factory; objects stay usable after commit so
+# handlers can return them for response serialization
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+async def get_async_db():
+    """Get async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def close_async_engine() -> None:
+    """Dispose of the async connection pool (called from the FastAPI lifespan)."""
+    await async_engine.dispose()
@@ -0,0 +1,94 @@
+"""Shared Redis connection for application caches.
+
+Redis is treated as an optimisation, never a dependency: if the server is
+unreachable every helper degrades to a cache miss and the caller computes
+the value as usual.
+"""
+import logging
+from typing import Dict, List, Optional
+
+import redis.asyncio as aioredis
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis: Optional[aioredis.Redis] = None
+
+
+def get_redis() -> aioredis.Redis:
+    """Return the process-wide Redis client (created lazily)."""
+    global _redis
+    if _redis is None:
+        _redis = aioredis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5,
+        )
+    return _redis
+
+
+async def cache_get(key: str) -> Optional[str]:
+    """GET *key*, returning None on a miss or when Redis is unavailable."""
+    try:
+        return await get_redis().get(key)
+    except Exception as exc:
+        logger.debug("Redis GET %s failed: %s", key, exc)
+        return None
+
+
+async def cache_set(key: str, value: str, ttl: int) -> None:
+    """SET *key* with an expiry; failures are logged and ignored."""
+    try:
+        await get_redis().set(key, value, ex=ttl)
+    except Exception as exc:
+        logger.debug("Redis SET %s failed: %s", key, exc)
+
+
+async def cache_get_many(keys: List[str]) -> List[Optional[str]]:
+    """MGET *keys* in one round trip; every value is None when Redis is unavailable."""
+    if not keys:
+        return []
+    try:
+        return await get_redis().mget(keys)
+    except Exception as exc:
+        logger.debug("Redis MGET of %d keys failed: %s", len(keys), exc)
+        return [None] * len(keys)
+
+
+async def cache_set_many(values: Dict[str, str], ttl: int) -> None:
+    """SET every key of *values* with an expiry, pipelined; failures are ignored."""
+    if not values:
+        return
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, value, ex=ttl)
+            await pipe.execute()
+    except Exception as exc:
+        logger.debug("Redis pipelined SET of %d keys failed: %s", len(values), exc)
+
+
+async def cache_incr(key: str) -> None:
+    """INCR the counter *key* (no expiry); failures are logged and ignored."""
+    try:
+        await get_redis().incr(key)
+    except Exception as exc:
+        logger.debug("Redis INCR %s failed: %s", key, exc)
+
+
+async def cache_delete(*keys: str) -> None:
+    """DEL *keys*; failures are logged and ignored."""
+    try:
+        await get_redis().delete(*keys)
+    except Exception as exc:
+        logger.debug("Redis DEL %s failed: %s", keys, exc)
+
+
+async def close_cache() -> None:
+    """Close the Redis connection pool (called from the FastAPI lifespan)."""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
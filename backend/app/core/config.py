@@ -20,13 +20,81 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://redis:6379/0"
 
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: int = 86400
+    # In-process LRU in front of Redis (entries, not bytes)
+    LLM_LOCAL_CACHE_MAX_ENTRIES: int = 512
+    # Semantic (nearest-neighbour) tier — requires sentence-transformers.
+    # Off by default: near-identical prompts for different devices must not
+    # share an answer unless an operator opts in.
+    LLM_SEMANTIC_CACHE_ENABLED: bool = False
+    LLM_SEMANTIC_CACHE_MODEL: str = "BAAI/bge-small-en-v1.5"
+    LLM_SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    LLM_SEMANTIC_CACHE_MAX_ENTRIES: int = 1000
+    # Checklists depend only on the submission type
+    COMPLIANCE_CHECKLIST_TTL_SECONDS: int = 86400
+    # A compliance verdict for an unchanged submission snapshot is reused
+    # for this long
+    COMPLIANCE_CHECK_TTL_SECONDS: int = 1800
+
+    # Short-lived cache for hot read endpoints (invalidated on writes)
+    RESPONSE_CACHE_TTL_SECONDS: int = 30
+    # In-process cache of /similar-submissions bodies, per worker, keyed
+    # on (q, limit, section); absorbs retries and type-ahead repeats
+    SIMILAR_SEARCH_CACHE_TTL_SECONDS: int = 60
+    SIMILAR_SEARCH_CACHE_MAX_ENTRIES: int = 1024
+    # Text extracted from uploaded documents, keyed by file content hash
+    DOCUMENT_TEXT_CACHE_TTL_SECONDS: int = 604800
+    # Built RAG context blocks, keyed by the retrieval queries
+    RAG_CONTEXT_TTL_SECONDS: int = 3600
+    # The 510(k) procedural guidance shared by every RAG context, retrieved
+    # and formatted once per worker (dropped on knowledge-base writes)
+    RAG_PROCEDURAL_CONTEXT_TTL_SECONDS: int = 86400
+    # HNSW index over the knowledge-base embeddings.  m and ef_construction
+    # apply when the index is (re)built; ef_search per query (recall vs.
+    # latency).  Builds get the maintenance memory and parallel workers.
+    RAG_HNSW_M: int = 32
+    RAG_HNSW_EF_CONSTRUCTION: int = 100
+    RAG_HNSW_EF_SEARCH: int = 64
+    RAG_INDEX_MAINTENANCE_WORK_MEM: str = "1GB"
+    RAG_INDEX_PARALLEL_WORKERS: int = 4
+    # Large-knowledge-base mode: candidates come from a binary-quantized
+    # HNSW index (1 bit per dimension, pgvector >= 0.7) instead of the fp16
+    # one, then are re-ranked on the fp32 embeddings
+    RAG_BINARY_QUANTIZED_SEARCH: bool = False
+    # Ranked search results per worker, keyed on (query, limit, section);
+    # dropped on knowledge-base writes
+    RAG_RETRIEVAL_CACHE_TTL_SECONDS: int = 300
+    RAG_RETRIEVAL_CACHE_MAX_ENTRIES: int = 1024
+    # Provider embeddings, keyed by the SHA-256 of the embedded text, in
+    # Redis and in a per-worker LRU (entries, not bytes)
+    EMBEDDING_CACHE_TTL_SECONDS: int = 2592000
+    EMBEDDING_LOCAL_CACHE_MAX_ENTRIES: int = 2048
+
     # Claude API
     ANTHROPIC_API_KEY: str = ""
     CLAUDE_MODEL: str = "claude-sonnet-4-5-20250929"
+    # Client-side cap on Messages calls, process-wide (defaults sized for a
+    # Tier-4 organisation); keeps fan-out below the server's 429 threshold
+    ANTHROPIC_RPM: int = 4000
+    ANTHROPIC_CONCURRENCY: int = 50
+    # Streamed generations running at once; each holds an Anthropic stream
+    # and a database session for minutes, so further clients queue
+    MAX_CONCURRENT_GENERATIONS: int = 8
+
+    # Shared outbound HTTP pool for LLM calls
+    HTTPX_MAX_CONNECTIONS: int = 500
+    HTTPX_MAX_KEEPALIVE_CONNECTIONS: int = 200
 
     # FDA APIs
     FAERS_API_URL: str = "https://api.fda.gov/drug/event.json"
     FDA_API_KEY: Optional[str] = None
+    # Paginated FAERS pulls: pages beyond the first are fetched concurrently
+    FAERS_MAX_PAGES: int = 10
+    FAERS_CONCURRENCY: int = 10
+    # New FAERS events analysed concurrently by the monitor endpoint
+    FAERS_ANALYSIS_CONCURRENCY: int = 8
 
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
@@ -0,0 +1,72 @@
+"""Allow-all CORS middleware.
+
+The API accepts any origin with credentials, which leaves nothing for
+Starlette's general-purpose ``CORSMiddleware`` to decide per request.  This
+pure-ASGI version produces the same headers from precomputed constants: the
+request Origin is echoed (required alongside credentials) and preflights are
+answered directly.
+"""
+
+_ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+_PREFLIGHT_MAX_AGE = b"600"
+_ALLOW_CREDENTIALS = (b"access-control-allow-credentials", b"true")
+_VARY_ORIGIN = (b"vary", b"Origin")
+# Response headers cross-origin scripts may read (keyset pagination cursor)
+_EXPOSE_HEADERS = (b"access-control-expose-headers", b"X-Next-Cursor")
+
+
+class AllowAllCORSMiddleware:
+    """CORS for every origin, method and header, credentials allowed."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = request_method = request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:  # not a cross-origin request
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            headers = [
+                (b"access-control-allow-origin", origin),
+                _ALLOW_CREDENTIALS,
+                (b"access-control-allow-methods", _ALLOW_METHODS),
+                (b"access-control-max-age", _PREFLIGHT_MAX_AGE),
+                _VARY_ORIGIN,
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", b"2"),
+            ]
+            if request_headers:
+                headers.append((b"access-control-allow-headers", request_headers))
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": b"OK"})
+            return
+
+        cors_headers = [
+            (b"access-control-allow-origin", origin), _ALLOW_CREDENTIALS, _EXPOSE_HEADERS, _VARY_ORIGIN,
+        ]
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                # Replace any allow-origin the endpoint set itself
+                headers = [
+                    header for header in message.get("headers", ())
+                    if header[0] != b"access-control-allow-origin"
+                ]
+                message = {**message, "headers": headers + cors_headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
@@ -1,16 +1,29 @@
 """Database configuration and session management."""
-from sqlalchemy import create_engine
+import orjson
+from sqlalchemy import create_engine, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
+
+def json_dumps(value) -> str:
+    """JSON column encoder: orjson instead of the stdlib ``json.dumps`` default.
+
+    Non-string dict keys are stringified as ``json.dumps`` does; datetimes
+    are encoded as ISO 8601 rather than rejected.
+    """
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
     pool_size=10,
     max_overflow=20,
-    echo=settings.DEBUG
+    echo=settings.DEBUG,
+    json_serializer=json_dumps,
+    json_deserializer=orjson.loads,
 )
 
 # Create session factory
@@ -20,6 +33,11 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def utc_now():
+    """Server-side current time as naive UTC, matching ``datetime.utcnow()`` columns."""
+    return func.timezone("utc", func.now())
+
+
 def get_db():
     """Get database session."""
     db = SessionLocal()
@@ -0,0 +1,43 @@
+"""Shared outbound HTTP clients.
+
+Clients are created once per process and closed on application shutdown so
+keep-alive connections are reused across requests instead of paying a fresh
+TCP + TLS handshake on every call.
+"""
+import anthropic
+import httpx
+
+from .config import settings
+
+# openFDA / FAERS
+FAERS_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+FAERS_TIMEOUT = httpx.Timeout(30.0)
+
+# HTTP/2 lets the paginated fan-out multiplex over one connection; FAERS
+# JSON compresses well, and httpx decodes gzip/br transparently (br needs
+# the ``brotli`` extra, pinned in requirements.txt).
+faers_client = httpx.AsyncClient(
+    http2=True,
+    headers={"Accept-Encoding": "gzip, br"},
+    limits=FAERS_LIMITS,
+    timeout=FAERS_TIMEOUT,
+)
+
+# Anthropic — every agent goes through this one pool.  httpx's default
+# 100-connection ceiling would queue concurrent agent fan-out, and LLM
+# responses need a much longer read timeout than FAERS.  Built with the
+# SDK's own client class (keeps its redirect and keep-alive defaults); the
+# SDK validates the http_client type it is given.
+anthropic_http_client = anthropic.DefaultAsyncHttpxClient(
+    limits=httpx.Limits(
+        max_connections=settings.HTTPX_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTPX_MAX_KEEPALIVE_CONNECTIONS,
+    ),
+    timeout=httpx.Timeout(120.0, connect=10.0),
+)
+
+
+async def close_http_clients() -> None:
+    """Close all shared clients (called from the FastAPI lifespan)."""
+    await faers_client.aclose()
+    await anthropic_http_client.aclose()
@@ -0,0 +1,127 @@
+"""Anthropic Messages client used by the regulatory agents.
+
+pydantic-ai forwards the system prompt as plain text, which rules out
+Anthropic prompt caching.  ``ClaudeAgent`` keeps the ``agent.run(prompt)``
+-> ``result.data`` interface the agents were written against, but sends the
+system prompt — and optionally a static instruction prefix of the user
+message — as ``cache_control`` blocks so the server reuses the processed
+prefix across calls instead of re-reading it every time.
+"""
+import asyncio
+import hashlib
+import re
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+import anthropic
+from aiolimiter import AsyncLimiter
+
+from .config import settings
+from .http import anthropic_http_client
+
+_EPHEMERAL = {"type": "ephemeral"}
+
+_INLINE_SPACE_RE = re.compile(r"[^\S\n]+")
+_LINE_BREAKS_RE = re.compile(r"\s*\n\s*")
+# Conservative characters-per-token estimate for English prose; errs towards
+# cutting slightly more than needed rather than exceeding the budget
+_CHARS_PER_TOKEN = 3.5
+
+# One client (and therefore one connection pool) shared by every agent.
+anthropic_client = anthropic.AsyncAnthropic(
+    api_key=settings.ANTHROPIC_API_KEY,
+    http_client=anthropic_http_client,
+)
+
+# Shared by every agent in the process: at most ANTHROPIC_CONCURRENCY calls
+# in flight and ANTHROPIC_RPM started per minute.
+_ANTHROPIC_SEM = asyncio.Semaphore(settings.ANTHROPIC_CONCURRENCY)
+_ANTHROPIC_LIMITER = AsyncLimiter(settings.ANTHROPIC_RPM, 60)
+
+
+@asynccontextmanager
+async def anthropic_slot() -> AsyncIterator[None]:
+    """Hold a concurrency + rate-limit slot for one Anthropic call.
+
+    Wrap exactly one request with it; nesting would take two slots.
+    """
+    async with _ANTHROPIC_SEM, _ANTHROPIC_LIMITER:
+        yield
+
+
+@dataclass
+class AgentRunResult:
+    """Mirror of pydantic-ai's run result for ``result_type=str``."""
+    data: str
+
+
+class ClaudeAgent:
+    """Single-turn Claude agent with a cacheable system prompt."""
+
+    def __init__(
+        self,
+        system_prompt: str,
+        model_name: str = settings.CLAUDE_MODEL,
+        max_tokens: int = 4096,
+        client: Optional[anthropic.AsyncAnthropic] = None,
+    ):
+        self.model_name = model_name
+        self.max_tokens = max_tokens
+        self.system = [
+            {"type": "text", "text": system_prompt, "cache_control": _EPHEMERAL}
+        ]
+        self.client = client or anthropic_client
+        # Identifies model + persona for response caching (see llm_cache)
+        self.cache_fingerprint = (
+            f"{model_name}:"
+            f"{hashlib.blake2b(system_prompt.encode(), digest_size=8).hexdigest()}"
+        )
+
+    async def run(
+        self,
+        prompt: str,
+        *,
+        cached_prefix: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+    ) -> AgentRunResult:
+        """Send *prompt* and return the concatenated text response.
+
+        ``cached_prefix`` is placed ahead of *prompt* in the user turn and
+        marked cacheable, so fixed instruction scaffolding is only processed
+        once; keep the variable data in *prompt*.
+        """
+        if cached_prefix:
+            content = [
+                {"type": "text", "text": cached_prefix, "cache_control": _EPHEMERAL},
+                {"type": "text", "text": prompt},
+            ]
+        else:
+            content = prompt
+
+        async with anthropic_slot():
+            response = await self.client.messages.create(
+                model=self.model_name,
+                max_tokens=max_tokens or self.max_tokens,
+                system=self.system,
+                messages=[{"role": "user", "content": content}],
+            )
+        text = "".join(
+            block.text for block in response.content if block.type == "text"
+        )
+        return AgentRunResult(data=text)
+
+
+def clamp_prompt(text: str, max_tokens: int = 6000) -> str:
+    """Collapse whitespace runs in *text* and cut it to about *max_tokens* tokens.
+
+    Token counts are estimated locally; Anthropic only counts tokens
+    through an API call, which would cost a round trip per prompt.
+    """
+    text = _LINE_BREAKS_RE.sub("\n", _INLINE_SPACE_RE.sub(" ", text)).strip()
+    return text[:int(max_tokens * _CHARS_PER_TOKEN)]
+
+
+async def close_llm_client() -> None:
+    """Close the shared Anthropic client (called from the FastAPI lifespan)."""
+    await anthropic_client.close()
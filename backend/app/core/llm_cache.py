@@ -0,0 +1,242 @@
+"""Response cache in front of the regulatory agents' LLM calls.
+
+Tiers consulted before an agent is run:
+
+1. **Exact** — BLAKE2b of (agent fingerprint, prompt), held in a bounded
+   in-process LRU in front of Redis; both honour the entry TTL.
+2. **Semantic** — nearest-neighbour lookup over prompt embeddings held in
+   process memory.  Only active when ``LLM_SEMANTIC_CACHE_ENABLED`` is set
+   and ``sentence-transformers`` is installed (graceful degradation, same
+   approach as pgvector in ``models/fda_knowledge.py``).
+
+On a miss, concurrent calls for the same prompt are coalesced onto a single
+agent call.
+
+Usage::
+
+    analysis_text = await cached_run(self.agent, prompt, "compliance:check")
+    fresh_text = await cached_run(self.agent, prompt, "compliance:check", force_refresh=True)
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import cache_get, cache_set
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from sentence_transformers import SentenceTransformer
+    _SEMANTIC_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    SentenceTransformer = None
+    _SEMANTIC_AVAILABLE = False
+
+_encoder = None
+
+
+class _SemanticIndex:
+    """Bounded in-memory cosine index of (prompt embedding -> response).
+
+    Only the prompt is embedded.  Each entry also records a digest of its
+    cached prefix, and a hit requires the same prefix exactly: a prefix
+    can carry all of the call-specific data (510(k) device context), and
+    would be truncated by the encoder anyway.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.vectors: Optional[np.ndarray] = None
+        self.responses: List[str] = []
+        self.prefixes: List[str] = []
+
+    def lookup(self, vector: np.ndarray, prefix: str, threshold: float) -> Optional[str]:
+        if self.vectors is None:
+            return None
+        scores = np.where(
+            np.array([p == prefix for p in self.prefixes]), self.vectors @ vector, -1.0
+        )
+        best = int(np.argmax(scores))
+        if scores[best] >= threshold:
+            return self.responses[best]
+        return None
+
+    def add(self, vector: np.ndarray, prefix: str, response: str) -> None:
+        if self.vectors is None:
+            self.vectors = vector[np.newaxis, :]
+        else:
+            self.vectors = np.vstack([self.vectors, vector])[-self.max_entries:]
+        self.responses = (self.responses + [response])[-self.max_entries:]
+        self.prefixes = (self.prefixes + [prefix])[-self.max_entries:]
+
+
+_indexes: Dict[str, _SemanticIndex] = {}
+
+# Exact-cache key -> task running the agent call, for request coalescing;
+# also the strong reference that keeps the task alive
+_inflight: Dict[str, asyncio.Task] = {}
+
+# Exact-cache key -> (monotonic expiry, response); LRU-ordered
+_local: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+
+def _local_get(key: str) -> Optional[str]:
+    entry = _local.get(key)
+    if entry is None:
+        return None
+    expires_at, text = entry
+    if expires_at < time.monotonic():
+        del _local[key]
+        return None
+    _local.move_to_end(key)
+    return text
+
+
+def _local_set(key: str, text: str, ttl: int) -> None:
+    _local[key] = (time.monotonic() + ttl, text)
+    _local.move_to_end(key)
+    while len(_local) > settings.LLM_LOCAL_CACHE_MAX_ENTRIES:
+        _local.popitem(last=False)
+
+
+def _semantic_enabled() -> bool:
+    return settings.LLM_SEMANTIC_CACHE_ENABLED and _SEMANTIC_AVAILABLE
+
+
+def _encode(prompt: str) -> np.ndarray:
+    global _encoder
+    if _encoder is None:
+        _encoder = SentenceTransformer(settings.LLM_SEMANTIC_CACHE_MODEL)
+    return _encoder.encode(prompt, normalize_embeddings=True).astype(np.float32)
+
+
+def prompt_version(template: str) -> str:
+    """Short content hash of a fixed prompt header, for versioned namespaces.
+
+    Embedding it in the ``cached_run`` namespace retires cached answers
+    automatically whenever the instruction scaffold is edited.
+    """
+    return hashlib.blake2b(template.encode(), digest_size=6).hexdigest()
+
+
+def prompt_key(namespace: str, prompt: str, fingerprint: str = "") -> str:
+    """Key for the exact-match tier.
+
+    *fingerprint* identifies the model and system prompt behind the call
+    (see ``ClaudeAgent.cache_fingerprint``) so an answer is never served
+    for a different model or persona.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(fingerprint.encode())
+    digest.update(b"\0")
+    digest.update(prompt.encode())
+    return f"llm:{namespace}:{digest.hexdigest()}"
+
+
+async def cached_run(
+    agent,
+    prompt: str,
+    namespace: str,
+    *,
+    ttl: Optional[int] = None,
+    force_refresh: bool = False,
+    **run_kwargs,
+) -> str:
+    """Return ``agent.run(prompt, **run_kwargs).data``, served from cache when possible.
+
+    ``run_kwargs`` (e.g. ``cached_prefix``) are forwarded to the agent; a
+    cached prefix is part of the effective prompt and therefore of the key.
+    ``ttl`` overrides ``LLM_CACHE_TTL_SECONDS`` for this entry, and
+    ``force_refresh`` skips every lookup but still stores the new answer.
+    """
+    if not settings.LLM_CACHE_ENABLED:
+        result = await agent.run(prompt, **run_kwargs)
+        return result.data
+
+    ttl = ttl or settings.LLM_CACHE_TTL_SECONDS
+    key = prompt_key(
+        namespace,
+        run_kwargs.get("cached_prefix", "") + prompt,
+        getattr(agent, "cache_fingerprint", ""),
+    )
+
+    if not force_refresh:
+        cached = _local_get(key)
+        if cached is None:
+            cached = await cache_get(key)
+            if cached is not None:
+                _local_set(key, cached, ttl)
+        if cached is not None:
+            logger.debug("LLM cache hit (exact) namespace=%s", namespace)
+            return cached
+
+        # Single-flight: concurrent callers for the same key share one agent
+        # call.  There is no await between the lookup and the insert, so the
+        # event loop guarantees only one call is started.
+        task = _inflight.get(key)
+        if task is not None:
+            logger.debug("LLM call coalesced namespace=%s", namespace)
+            return await asyncio.shield(task)
+
+    # The call runs in its own task, which every caller (the one that started
+    # it included) awaits through a shield: a caller cancelled while waiting,
+    # e.g. because its client disconnected, leaves the call running for the
+    # others, and its answer is still cached.
+    task = asyncio.create_task(
+        _run_uncached(agent, prompt, namespace, key, ttl, force_refresh, run_kwargs)
+    )
+    _inflight[key] = task
+    task.add_done_callback(partial(_finish_inflight, key))
+    return await asyncio.shield(task)
+
+
+def _finish_inflight(key: str, task: asyncio.Task) -> None:
+    """Done callback: unregister the call, whichever way it ended."""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # mark retrieved when nobody is left waiting
+
+
+async def _run_uncached(
+    agent,
+    prompt: str,
+    namespace: str,
+    key: str,
+    ttl: int,
+    force_refresh: bool,
+    run_kwargs: dict,
+) -> str:
+    """Semantic-tier lookup, then the real agent call; stores the result."""
+    vector = None
+    if _semantic_enabled():
+        prefix = hashlib.blake2b(
+            run_kwargs.get("cached_prefix", "").encode(), digest_size=16
+        ).hexdigest()
+        # Encoding is CPU-bound; keep it off the event loop.
+        vector = await asyncio.to_thread(_encode, prompt)
+        index = _indexes.setdefault(
+            namespace, _SemanticIndex(settings.LLM_SEMANTIC_CACHE_MAX_ENTRIES)
+        )
+        hit = None if force_refresh else index.lookup(
+            vector, prefix, settings.LLM_SEMANTIC_CACHE_THRESHOLD
+        )
+        if hit is not None:
+            logger.debug("LLM cache hit (semantic) namespace=%s", namespace)
+            return hit
+
+    result = await agent.run(prompt, **run_kwargs)
+    text = result.data
+
+    _local_set(key, text, ttl)
+    await cache_set(key, text, ttl)
+    if vector is not None:
+        _indexes[namespace].add(vector, prefix, text)
+    return text
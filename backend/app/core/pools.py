@@ -0,0 +1,39 @@
+"""Shared worker-process pool for CPU-bound PDF text extraction.
+
+pdfplumber (pdfminer.six) is pure Python, so text extraction runs in worker
+processes instead of on the event loop.  One pool serves the whole process;
+it is created on first use and shut down from the FastAPI lifespan.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+PDF_WORKERS = os.cpu_count() or 1
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Return the process-wide PDF pool, creating it on first use.
+
+    Callers include event-loop code and executor threads, so creation is
+    guarded to avoid starting two pools.
+    """
+    global _pdf_pool
+    if _pdf_pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return _pdf_pool
+
+
+async def close_pdf_pool() -> None:
+    """Shut down the pool and its workers (called from the FastAPI lifespan)."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        pool, _pdf_pool = _pdf_pool, None
+    if pool is not None:
+        await asyncio.to_thread(pool.shutdown, cancel_futures=True)
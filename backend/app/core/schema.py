@@ -0,0 +1,193 @@
+"""Idempotent schema upgrades applied at startup.
+
+``Base.metadata.create_all`` creates missing tables but never alters
+existing ones, so columns and indexes added to models after a database
+was first created are applied here.  Every statement must be safe to
+run on every start.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from .config import settings
+
+# Knowledge-base sections with their own partial HNSW index, so a
+# section-filtered search walks that section's small graph instead of
+# post-filtering the global one (the /similar-submissions section values)
+VECTOR_INDEX_SECTIONS = (
+    "510k", "biocompatibility", "software", "risk_management", "labeling",
+    "performance_testing", "sterilization", "clinical_data", "general",
+)
+_HNSW_WITH = f"WITH (m = {settings.RAG_HNSW_M}, ef_construction = {settings.RAG_HNSW_EF_CONSTRUCTION})"
+
+
+def _section_indexes(opclass_suffix: str, expression: str) -> str:
+    return "".join(
+        f"""
+                CREATE INDEX IF NOT EXISTS ix_fda_kb_{section}_{opclass_suffix}_hnsw
+                ON fda_knowledge_base USING hnsw ({expression})
+                {_HNSW_WITH} WHERE section = '{section}';"""
+        for section in VECTOR_INDEX_SECTIONS
+    )
+
+
+def _drop_section_indexes(opclass_suffix: str) -> str:
+    return "".join(
+        f"""
+                DROP INDEX IF EXISTS ix_fda_kb_{section}_{opclass_suffix}_hnsw;"""
+        for section in VECTOR_INDEX_SECTIONS
+    )
+
+
+# HNSW index names, current form first; the seeder drops them for large
+# loads and rebuilds with _VECTOR_INDEX_DDL afterwards
+VECTOR_INDEX_NAMES = (
+    "ix_fda_knowledge_base_embedding_halfvec_ip_hnsw",
+    "ix_fda_knowledge_base_embedding_ip_hnsw",
+    "ix_fda_knowledge_base_embedding_bit_hnsw",
+    *(f"ix_fda_kb_{section}_{suffix}_hnsw"
+      for suffix in ("halfvec_ip", "ip") for section in VECTOR_INDEX_SECTIONS),
+)
+# Binary-quantized index behind RAG_BINARY_QUANTIZED_SEARCH, dropped again
+# when the setting is off; binary_quantize ships with halfvec (pgvector 0.7)
+_BINARY_INDEX_DDL = (
+    f"""
+                CREATE INDEX IF NOT EXISTS ix_fda_knowledge_base_embedding_bit_hnsw
+                ON fda_knowledge_base USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops)
+                {_HNSW_WITH};"""
+    if settings.RAG_BINARY_QUANTIZED_SEARCH else
+    """
+                DROP INDEX IF EXISTS ix_fda_knowledge_base_embedding_bit_hnsw;"""
+)
+# Builds only run when the index is missing; the memory and worker limits
+# are raised for this transaction alone (set_config(..., true) = SET LOCAL)
+_VECTOR_INDEX_DDL = f"""
+    DO $$
+    BEGIN
+        PERFORM set_config('maintenance_work_mem', '{settings.RAG_INDEX_MAINTENANCE_WORK_MEM}', true);
+        PERFORM set_config(
+            'max_parallel_maintenance_workers', '{settings.RAG_INDEX_PARALLEL_WORKERS}', true
+        );
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'fda_knowledge_base' AND column_name = 'embedding'
+              AND udt_name = 'vector'
+        ) THEN
+            DROP INDEX IF EXISTS ix_fda_knowledge_base_embedding_hnsw;
+            DROP INDEX IF EXISTS ix_fda_knowledge_base_embedding_halfvec_hnsw;
+            IF EXISTS (SELECT 1 FROM pg_type WHERE typname = 'halfvec') THEN
+                DROP INDEX IF EXISTS ix_fda_knowledge_base_embedding_ip_hnsw;{_drop_section_indexes("ip")}
+                CREATE INDEX IF NOT EXISTS ix_fda_knowledge_base_embedding_halfvec_ip_hnsw
+                ON fda_knowledge_base USING hnsw ((embedding::halfvec(1536)) halfvec_ip_ops)
+                {_HNSW_WITH};{_section_indexes("halfvec_ip", "(embedding::halfvec(1536)) halfvec_ip_ops")}{_BINARY_INDEX_DDL}
+            ELSE
+                CREATE INDEX IF NOT EXISTS ix_fda_knowledge_base_embedding_ip_hnsw
+                ON fda_knowledge_base USING hnsw (embedding vector_ip_ops)
+                {_HNSW_WITH};{_section_indexes("ip", "embedding vector_ip_ops")}
+            END IF;
+        END IF;
+    END $$
+"""
+
+_UPGRADES = (
+    # Document.content_sha256 (upload dedupe)
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_sha256 VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_content_sha256 ON documents (content_sha256)",
+    # FDAKnowledgeBase.content_preview, back-filled for rows seeded before it
+    "ALTER TABLE fda_knowledge_base ADD COLUMN IF NOT EXISTS content_preview VARCHAR(403)",
+    "UPDATE fda_knowledge_base SET content_preview = CASE "
+    "WHEN length(content) > 400 THEN substr(content, 1, 400) || '...' ELSE content END "
+    "WHERE content_preview IS NULL",
+    # FDAKnowledgeBase.embedding_normalized: rows already present when it is
+    # added are marked false, later inserts default to true.  The marked rows
+    # are L2-normalized once, so the inner-product search ranks them as
+    # cosine would (l2_normalize needs pgvector >= 0.7; older servers keep
+    # the rows until upgraded)
+    "ALTER TABLE fda_knowledge_base ADD COLUMN IF NOT EXISTS embedding_normalized "
+    "BOOLEAN NOT NULL DEFAULT false",
+    "ALTER TABLE fda_knowledge_base ALTER COLUMN embedding_normalized SET DEFAULT true",
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'fda_knowledge_base' AND column_name = 'embedding'
+              AND udt_name = 'vector'
+        ) AND EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'l2_normalize') THEN
+            UPDATE fda_knowledge_base
+            SET embedding = l2_normalize(embedding), embedding_normalized = true
+            WHERE NOT embedding_normalized AND embedding IS NOT NULL;
+        END IF;
+    END $$
+    """,
+    # FDAKnowledgeBase.tsv full-text column (generated) and its GIN index
+    "ALTER TABLE fda_knowledge_base ADD COLUMN IF NOT EXISTS tsv tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', title || ' ' || content)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_fda_knowledge_base_tsv ON fda_knowledge_base USING gin (tsv)",
+    # FDAKnowledgeBase partial index behind the stats embedded counts
+    "CREATE INDEX IF NOT EXISTS ix_fda_knowledge_base_embedded "
+    "ON fda_knowledge_base (section, content_type) WHERE embedding IS NOT NULL",
+    # Unique FDAKnowledgeBase titles, behind the seeder's ON CONFLICT DO
+    # NOTHING; skipped while older databases still hold duplicate titles
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM fda_knowledge_base GROUP BY title HAVING count(*) > 1
+        ) THEN
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_fda_knowledge_base_title
+            ON fda_knowledge_base (title);
+        END IF;
+    END $$
+    """,
+    # HNSW index for the RAG similarity search, only where the column really
+    # is a pgvector vector (databases created with the Text fallback are
+    # not).  With halfvec support (pgvector >= 0.7) the index is built over
+    # an fp16 cast, half the size of an fp32 one, and replaces it.  Stored
+    # embeddings are unit length, so the search ranks by inner product; the
+    # earlier cosine-ops indexes are replaced.  Each VECTOR_INDEX_SECTIONS
+    # section also gets a partial index of the same form.
+    _VECTOR_INDEX_DDL,
+    # Trigram GIN indexes serving the device_name ILIKE '%...%' searches.
+    # Kept out of the models: create_all runs before this and the opclass
+    # only exists once the extension has been created.
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_predicate_devices_device_name_trgm "
+    "ON predicate_devices USING gin (device_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_adverse_events_device_name_trgm "
+    "ON adverse_events USING gin (device_name gin_trgm_ops)",
+    # Btree indexes for the exact filters and the risk-score ordering
+    "CREATE INDEX IF NOT EXISTS ix_predicate_devices_product_code ON predicate_devices (product_code)",
+    "CREATE INDEX IF NOT EXISTS ix_predicate_devices_device_class ON predicate_devices (device_class)",
+    "CREATE INDEX IF NOT EXISTS ix_adverse_events_risk_score ON adverse_events (risk_score)",
+    # Review workflow lookups by parent id and the status history ordering
+    "CREATE INDEX IF NOT EXISTS ix_reviews_submission_id ON reviews (submission_id)",
+    "CREATE INDEX IF NOT EXISTS ix_review_checklist_items_review_id ON review_checklist_items (review_id)",
+    # Review workflow timestamps default on the server (see models/review.py)
+    "ALTER TABLE reviews ALTER COLUMN created_at SET DEFAULT timezone('utc', now())",
+    "ALTER TABLE reviews ALTER COLUMN updated_at SET DEFAULT timezone('utc', now())",
+    "ALTER TABLE review_checklist_items ALTER COLUMN updated_at SET DEFAULT timezone('utc', now())",
+    "ALTER TABLE submission_status_logs ALTER COLUMN changed_at SET DEFAULT timezone('utc', now())",
+    # The status history pages by id now; its index replaces the
+    # (submission_id, changed_at) one
+    "DROP INDEX IF EXISTS ix_submission_status_logs_submission_changed",
+    "CREATE INDEX IF NOT EXISTS ix_submission_status_logs_submission_id_id "
+    "ON submission_status_logs (submission_id, id)",
+)
+
+
+def drop_vector_indexes(conn: Connection) -> None:
+    """Drop the knowledge-base HNSW index ahead of a bulk load."""
+    for name in VECTOR_INDEX_NAMES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def create_vector_index(conn: Connection) -> None:
+    """(Re)build the knowledge-base HNSW index in the form the server supports."""
+    conn.execute(text(_VECTOR_INDEX_DDL))
+
+
+def apply_schema_upgrades(engine: Engine) -> None:
+    """Run the idempotent upgrade statements in one transaction."""
+    with engine.begin() as conn:
+        for statement in _UPGRADES:
+            conn.execute(text(statement))
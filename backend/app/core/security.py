@@ -1,10 +1,11 @@
 """Security utilities for JWT authentication"""
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
 from jose import JWTError, jwt
-import hashlib
-import hmac
-from fastapi import Depends, HTTPException, status
+from passlib.context import CryptContext
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 # JWT settings
@@ -14,14 +15,21 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 525600  # 1 year (365 days) for testing  # 8 hours
 
 security = HTTPBearer()
 
+# New hashes are salted bcrypt.  Unsalted SHA-256 hex digests written
+# before the switch still verify and are rehashed on the next login.
+pwd_context = CryptContext(schemes=["bcrypt", "hex_sha256"], deprecated="auto")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password using SHA256"""
-    password_hash = hashlib.sha256(plain_password.encode()).hexdigest()
-    return hmac.compare_digest(password_hash, hashed_password)
+    """Verify password against a bcrypt (or legacy SHA256) hash"""
+    return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify password; also return a replacement hash if the stored one is outdated"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """Hash password using SHA256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hash password using bcrypt"""
+    return pwd_context.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -33,18 +41,39 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+@lru_cache(maxsize=1024)
+def _decode_token(token: str) -> dict:
+    """Verify and decode a token; valid tokens are memoized per process.
+
+    Failures raise and are therefore never cached.  Callers must treat the
+    returned payload as read-only.
+    """
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
 def verify_token(token: str) -> dict:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        payload = _decode_token(token)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # A memoized token may have expired since it was first decoded
+    exp = payload.get("exp")
+    if exp is not None and exp <= time.time():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    # Resolved once per request, however many dependencies ask for it
+    cached = getattr(request.state, "auth_user", None)
+    if cached is not None:
+        return cached
     token = credentials.credentials
     payload = verify_token(token)
     username: str = payload.get("sub")
@@ -53,4 +82,6 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
-    return {"username": username, "role": payload.get("role")}
+    user = {"username": username, "role": payload.get("role")}
+    request.state.auth_user = user
+    return user
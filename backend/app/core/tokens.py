@@ -0,0 +1,76 @@
+"""Token counting and token-window chunking.
+
+Uses tiktoken's cl100k_base, the tokenizer of the ada-002 embeddings and a
+close enough estimate for Claude prompt sizing.  tiktoken is optional:
+without it counts are estimated at about four characters per token.
+"""
+import logging
+from functools import lru_cache
+from typing import List
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Characters per token assumed when tiktoken is unavailable
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    """The cl100k_base encoding, built once (it may be fetched on first use)."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as exc:
+        logger.warning("tiktoken encoding unavailable (%s), estimating token counts", exc)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count of *text*."""
+    encoding = get_encoding()
+    if encoding is None:
+        return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def chunk_text(text: str, max_tokens: int = 450, overlap: int = 50) -> List[str]:
+    """Split *text* into windows of at most *max_tokens*, consecutive ones sharing *overlap*.
+
+    Text that already fits is returned as the single chunk, unchanged.
+    """
+    encoding = get_encoding()
+    if encoding is None:
+        return _chunk_chars(text, max_tokens * _CHARS_PER_TOKEN, overlap * _CHARS_PER_TOKEN)
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return [text]
+    step = max_tokens - overlap
+    return [
+        encoding.decode(tokens[start:start + max_tokens])
+        for start in range(0, len(tokens) - overlap, step)
+    ]
+
+
+def _chunk_chars(text: str, max_chars: int, overlap: int) -> List[str]:
+    """Character-window fallback for chunk_text, cutting at whitespace where possible."""
+    if len(text) <= max_chars:
+        return [text]
+    chunks = []
+    start = 0
+    while True:
+        end = start + max_chars
+        if end >= len(text):
+            chunks.append(text[start:])
+            return chunks
+        cut = text.rfind(" ", start + overlap + 1, end)
+        if cut == -1:
+            cut = end
+        chunks.append(text[start:cut])
+        start = cut - overlap
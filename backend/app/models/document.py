@@ -14,6 +14,9 @@ class Document(Base):
     filename = Column(String(255), nullable=False)
     file_path = Column(String(500), nullable=False)
     file_size = Column(Integer)
+    # Several documents may point at one stored blob (same bytes uploaded
+    # again), so the index is not unique
+    content_sha256 = Column(String(64), index=True)
     mime_type = Column(String(100))
     uploaded_by = Column(String(100))
     uploaded_at = Column(DateTime, default=datetime.utcnow)
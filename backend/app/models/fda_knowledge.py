@@ -3,7 +3,9 @@
 Stores FDA regulatory guidance documents as vector embeddings to enable
 semantic similarity search during submission generation.
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Boolean, Column, Computed, Integer, String, Text, DateTime, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from datetime import datetime
 
 from ..core.database import Base
@@ -21,6 +23,25 @@ except ImportError:  # pragma: no cover
     _PGVECTOR_AVAILABLE = False
 
 
+# Characters of content kept in content_preview (plus "..." when cut)
+CONTENT_PREVIEW_CHARS = 400
+
+# Full-text document of an entry; core/schema.py repeats this expression
+TSV_EXPRESSION = "to_tsvector('english', title || ' ' || content)"
+
+
+def content_preview(content: str) -> str:
+    """The content_preview value stored for *content*."""
+    if len(content) > CONTENT_PREVIEW_CHARS:
+        return content[:CONTENT_PREVIEW_CHARS] + "..."
+    return content
+
+
+def _content_preview(context) -> str:
+    """Column default: the preview is derived from content once, at insert."""
+    return content_preview(context.get_current_parameters()["content"])
+
+
 class FDAKnowledgeBase(Base):
     """
     FDA Regulatory Knowledge Base entry.
@@ -35,6 +56,7 @@ class FDAKnowledgeBase(Base):
     id            : auto-increment primary key
     title         : short human-readable label (e.g., "ISO 10993 Biocompatibility")
     content       : the full guidance text chunk (~500–1 500 words)
+    content_preview: first 400 characters of content, filled in on insert
     content_type  : category bucket — one of:
                       "guidance"          – FDA guidance document excerpt
                       "predicate_summary" – summary of a predicate 510(k) decision
@@ -43,18 +65,53 @@ class FDAKnowledgeBase(Base):
                       "510k", "biocompatibility", "software", "risk_management",
                       "labeling", "performance_testing", "sterilization",
                       "clinical_data", "general"
-    embedding     : 1536-dimensional float vector (pgvector)
+    embedding     : 1536-dimensional float vector (pgvector), unit length
+    embedding_normalized: false for rows stored before embeddings were
+                    normalized on write; core/schema.py normalizes them
     created_at    : insertion timestamp
+    tsv           : English full-text vector of title and content (generated)
     """
     __tablename__ = "fda_knowledge_base"
 
     id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     title = Column(String(500), nullable=False)
     content = Column(Text, nullable=False)
+    content_preview = Column(String(CONTENT_PREVIEW_CHARS + 3), default=_content_preview)
     content_type = Column(String(50), nullable=False, default="guidance")
     section = Column(String(100), nullable=False, default="general")
     embedding = Column(_VECTOR_TYPE, nullable=True)   # nullable for non-pgvector fallback
+    # Every writer stores unit vectors now (rag_service.embed_texts), so new
+    # rows, COPY included, default to true
+    embedding_normalized = Column(Boolean, nullable=False, server_default="true")
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Lexical side of hybrid search.  A stored generated column: PostgreSQL
+    # fills it in within the same INSERT or COPY that writes the row, with
+    # no trigger and no second pass.  Deferred, so entity loads skip it.
+    tsv = deferred(Column(TSVECTOR, Computed(TSV_EXPRESSION, persisted=True)))
+
+    __table_args__ = (
+        # Partial index over embedded rows only: the stats aggregate's
+        # embedded counts come from it without touching the vector column
+        Index(
+            "ix_fda_knowledge_base_embedded",
+            "section",
+            "content_type",
+            postgresql_where=embedding.isnot(None),
+        ),
+        # Entries are identified by title: the seeder's inserts skip
+        # titles that already exist (ON CONFLICT DO NOTHING)
+        Index("ux_fda_knowledge_base_title", "title", unique=True),
+        Index("ix_fda_knowledge_base_tsv", "tsv", postgresql_using="gin"),
+    )
+    # The HNSW index behind the similarity search is created in core/schema.py:
+    # its form depends on the server's pgvector version (halfvec support).
+    # Compression lives in the index, not the column: pgvector has no int8
+    # vector type, and a BYTEA int8 column could not be indexed or searched
+    # in SQL.  The fp16 index halves what the candidate scan reads, and the
+    # fp32 column keeps the exact values the candidates are re-ranked on.
+    # The column itself stays vector rather than halfvec: its type is fixed
+    # by create_all before the server's halfvec support is known, and the
+    # re-rank reads only a few rows per query.
 
     def __repr__(self) -> str:
         return (
@@ -1,23 +1,26 @@
 """Review models for FDA submission review workflow."""
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
-from datetime import datetime
-from ..core.database import Base
+from ..core.database import Base, utc_now
+
+
+# Timestamps are taken from the database clock (as naive UTC) rather than
+# sent from Python with every statement.
 
 
 class Review(Base):
     __tablename__ = "reviews"
 
     id = Column(Integer, primary_key=True, index=True)
-    submission_id = Column(Integer, ForeignKey("submissions.id", ondelete="CASCADE"), nullable=False)
+    submission_id = Column(Integer, ForeignKey("submissions.id", ondelete="CASCADE"), nullable=False, index=True)
     reviewer_name = Column(String(255))
     review_round = Column(Integer, default=1)
     status = Column(String(20), default="pending")
     started_at = Column(DateTime)
     completed_at = Column(DateTime)
     overall_notes = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utc_now())
+    updated_at = Column(DateTime, server_default=utc_now(), onupdate=utc_now())
 
     submission = relationship("Submission", back_populates="workflow_reviews")
     checklist_items = relationship("ReviewChecklistItem", back_populates="review", cascade="all, delete-orphan")
@@ -27,7 +30,7 @@ class ReviewChecklistItem(Base):
     __tablename__ = "review_checklist_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    review_id = Column(Integer, ForeignKey("reviews.id", ondelete="CASCADE"), nullable=False)
+    review_id = Column(Integer, ForeignKey("reviews.id", ondelete="CASCADE"), nullable=False, index=True)
     section_number = Column(Integer, nullable=False)
     section_name = Column(String(255), nullable=False)
     is_complete = Column(Boolean, default=False)
@@ -37,7 +40,7 @@ class ReviewChecklistItem(Base):
     reviewer_notes = Column(Text)
     assignee = Column(String(255))
     checked_at = Column(DateTime)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, server_default=utc_now(), onupdate=utc_now())
 
     review = relationship("Review", back_populates="checklist_items")
 
@@ -51,4 +54,9 @@ class SubmissionStatusLog(Base):
     new_status = Column(String(50))
     changed_by = Column(String(100))
     notes = Column(Text)
-    changed_at = Column(DateTime, default=datetime.utcnow)
+    changed_at = Column(DateTime, server_default=utc_now())
+
+    # Serves the keyset-paginated history, newest first (scanned backwards)
+    __table_args__ = (
+        Index("ix_submission_status_logs_submission_id_id", "submission_id", "id"),
+    )
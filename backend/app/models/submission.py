@@ -121,7 +121,7 @@ class AdverseEvent(Base):
 
     # Analysis
     ai_analysis = Column(Text)
-    risk_score = Column(Integer, default=0)  # 0-100
+    risk_score = Column(Integer, default=0, index=True)  # 0-100
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -138,8 +138,8 @@ class PredicateDevice(Base):
     k_number = Column(String(50), unique=True, index=True)
     device_name = Column(String(255), nullable=False)
     manufacturer = Column(String(255))
-    device_class = Column(String(10))
-    product_code = Column(String(10))
+    device_class = Column(String(10), index=True)
+    product_code = Column(String(10), index=True)
 
     # Technical characteristics
     indications_for_use = Column(Text)
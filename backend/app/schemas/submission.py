@@ -1,9 +1,34 @@
 """Pydantic schemas for FDA submissions."""
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr, TypeAdapter
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 from ..models.submission import SubmissionType, SubmissionStatus, ComplianceStatus
 
+# Schemas are immutable once built: frozen models skip assignment handling
+# entirely, and unknown input keys are dropped rather than stored.
+_REQUEST_CONFIG = ConfigDict(extra="ignore", frozen=True)
+# Responses additionally read ORM attributes and keep enums as their plain
+# values, so encoding needs no Enum -> value step.  Request models keep the
+# Enum members: the SQLAlchemy Enum columns persist members, not values.
+_RESPONSE_CONFIG = ConfigDict(
+    extra="ignore", frozen=True, from_attributes=True, use_enum_values=True
+)
+
+
+class TrustedORMResponse(BaseModel):
+    """Response schema that can be built from a database row without validation."""
+    model_config = _RESPONSE_CONFIG
+
+    @classmethod
+    def from_orm_trusted(cls, obj):
+        """Build the response from *obj*'s attributes, skipping validation.
+
+        Only for ORM rows, whose column types the database already
+        guarantees.  NEVER use for external input: unvalidated data would
+        reach the response as is.
+        """
+        return cls.model_construct(**{name: getattr(obj, name) for name in cls.model_fields})
+
 
 class SubmissionBase(BaseModel):
     """Base submission schema."""
@@ -15,6 +40,8 @@ class SubmissionBase(BaseModel):
     predicate_device_name: Optional[str] = None
     predicate_k_number: Optional[str] = None
 
+    model_config = _REQUEST_CONFIG
+
 
 class SubmissionCreate(SubmissionBase):
     """Schema for creating a submission."""
@@ -32,21 +59,23 @@ class SubmissionUpdate(BaseModel):
     clinical_data: Optional[dict] = None
     status: Optional[SubmissionStatus] = None
 
+    model_config = _REQUEST_CONFIG
 
-class SubmissionResponse(SubmissionBase):
+
+class SubmissionResponse(SubmissionBase, TrustedORMResponse):
     """Schema for submission response."""
     id: int
     status: SubmissionStatus
     compliance_status: ComplianceStatus
     generated_submission: Optional[str] = None
     substantial_equivalence_analysis: Optional[str] = None
-    compliance_report: Optional[dict] = None
+    # Stored JSON, passed through as is rather than validated and copied
+    compliance_report: Optional[Any] = None
     created_at: datetime
     updated_at: datetime
     submitted_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _RESPONSE_CONFIG
 
 
 class GenerateSubmissionRequest(BaseModel):
@@ -55,15 +84,19 @@ class GenerateSubmissionRequest(BaseModel):
     include_predicate_analysis: bool = True
     include_clinical_summary: bool = True
 
+    model_config = _REQUEST_CONFIG
+
 
 class GenerateSubmissionResponse(BaseModel):
     """Response from document generation."""
     submission_id: int
     generated_submission: str
     substantial_equivalence_analysis: Optional[str] = None
-    compliance_check: dict
+    compliance_check: Any
     status: str = "success"
 
+    model_config = _RESPONSE_CONFIG
+
 
 class ReviewCreate(BaseModel):
     """Schema for creating a review."""
@@ -75,8 +108,10 @@ class ReviewCreate(BaseModel):
     suggested_changes: Optional[str] = None
     approved: int = Field(default=0, ge=-1, le=1)
 
+    model_config = _REQUEST_CONFIG
+
 
-class ReviewResponse(BaseModel):
+class ReviewResponse(TrustedORMResponse):
     """Schema for review response."""
     id: int
     submission_id: int
@@ -89,8 +124,7 @@ class ReviewResponse(BaseModel):
     created_at: datetime
     reviewed_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _RESPONSE_CONFIG
 
 
 class AdverseEventCreate(BaseModel):
@@ -104,8 +138,10 @@ class AdverseEventCreate(BaseModel):
     patient_sex: Optional[str] = None
     event_date: Optional[datetime] = None
 
+    model_config = _REQUEST_CONFIG
 
-class AdverseEventResponse(BaseModel):
+
+class AdverseEventResponse(TrustedORMResponse):
     """Schema for adverse event response."""
     id: int
     submission_id: Optional[int] = None
@@ -118,8 +154,7 @@ class AdverseEventResponse(BaseModel):
     risk_score: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = _RESPONSE_CONFIG
 
 
 class PredicateDeviceSearch(BaseModel):
@@ -129,8 +164,10 @@ class PredicateDeviceSearch(BaseModel):
     device_class: Optional[str] = None
     indications_for_use: Optional[str] = None
 
+    model_config = _REQUEST_CONFIG
+
 
-class PredicateDeviceResponse(BaseModel):
+class PredicateDeviceResponse(TrustedORMResponse):
     """Schema for predicate device response."""
     id: int
     k_number: str
@@ -142,8 +179,7 @@ class PredicateDeviceResponse(BaseModel):
     decision: Optional[str] = None
     decision_date: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _RESPONSE_CONFIG
 
 
 class ComplianceCheckRequest(BaseModel):
@@ -153,6 +189,8 @@ class ComplianceCheckRequest(BaseModel):
     check_audit_trail: bool = True
     check_record_retention: bool = True
 
+    model_config = _REQUEST_CONFIG
+
 
 class ComplianceCheckResponse(BaseModel):
     """Response from compliance check."""
@@ -161,3 +199,13 @@ class ComplianceCheckResponse(BaseModel):
     issues: list[dict] = []
     recommendations: list[str] = []
     score: int = Field(ge=0, le=100)
+
+    model_config = _RESPONSE_CONFIG
+
+
+# Built once at import and reused by the list endpoints, rather than a
+# validator/serializer pair per response
+SubmissionListAdapter = TypeAdapter(list[SubmissionResponse])
+ReviewListAdapter = TypeAdapter(list[ReviewResponse])
+AdverseEventListAdapter = TypeAdapter(list[AdverseEventResponse])
+PredicateDeviceListAdapter = TypeAdapter(list[PredicateDeviceResponse])
@@ -3,100 +3,384 @@
 Phase 3: AI document integration for FDA Review Workflow.
 Supports PDF and DOCX extraction, then uses Claude to summarize
 the content in the context of an FDA regulatory submission.
+
+Both stages are cached in Redis by content: extracted text under the
+BLAKE2b of the file bytes, summaries under the hash of the model, prompt
+and text (the exact-match tier of ``core/llm_cache``).  Re-uploading or
+re-reviewing an unchanged file skips the parse and the Claude call.
 """
+import asyncio
+import hashlib
+import io
 import os
 import logging
+import re
+import threading
+from collections import OrderedDict, deque
+from functools import lru_cache
 from typing import Optional
 
+from anthropic import AsyncAnthropic
+
+from ..core.cache import cache_get, cache_set
+from ..core.config import settings
+from ..core.http import anthropic_http_client
+from ..core.llm import anthropic_slot
+from ..core.llm_cache import prompt_key
+from ..core.pools import PDF_WORKERS, get_pdf_pool
+from ..core.tokens import count_tokens
+
 logger = logging.getLogger(__name__)
 
+# Extraction backends are optional; resolved once at import rather than
+# on every call (pdfplumber pulls in all of pdfminer.six)
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # pragma: no cover
+    pdfium = None
+
+try:
+    import pdfplumber
+except ImportError:  # pragma: no cover
+    pdfplumber = None
+
+try:
+    from PyPDF2 import PdfReader
+except ImportError:  # pragma: no cover
+    PdfReader = None
+
+try:
+    from docx import Document as DocxDocument
+    from docx.oxml.ns import qn
+    from docx.text.paragraph import Paragraph
+    _W_P, _W_TBL, _W_TR, _W_TC = qn("w:p"), qn("w:tbl"), qn("w:tr"), qn("w:tc")
+except ImportError:  # pragma: no cover
+    DocxDocument = None
+
 # Maximum characters to send to AI to avoid token limits
 MAX_EXTRACTED_CHARS = 10_000
+# Characters read from the document before the section-aware cut down to
+# MAX_EXTRACTED_CHARS, so later sections are represented too
+RAW_EXTRACT_CHARS = 4 * MAX_EXTRACTED_CHARS
+
+_TRUNCATION_NOTE = "\n\n[... content truncated for AI analysis ...]"
+_SECTION_CUT_MARK = "\n[...]\n"
+
+# Headings of the sections 510(k) supporting documents are usually split
+# into, optionally numbered ("5.2 Performance Testing")
+_SECTION_HEADER_RE = re.compile(
+    r"^[ \t]*(?:\d+(?:\.\d+)*\.?[ \t]+)?(?:"
+    r"executive summary|summary|introduction|indications for use|intended use|"
+    r"device description|substantial equivalence|predicate device|"
+    r"performance (?:data|testing)|bench testing|biocompatibility|sterilization|"
+    r"software|risk (?:analysis|management)|labeling|clinical (?:data|studies)|"
+    r"test results|results|conclusions?"
+    r")\b[^\n]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# pdfplumber is pure Python and CPU-bound; documents with at least this
+# many pages are extracted in the shared PDF pool, _PDF_PAGES_PER_TASK each
+_PARALLEL_MIN_PAGES = 20
+_PDF_PAGES_PER_TASK = 8
+
+# Open pypdfium2 documents, path -> (mtime, PdfDocument), least recently
+# used first; re-analysing a file skips PDFium's parse of the xref and
+# page tree.  PDFium is not thread-safe, so every use of it (cache
+# included) happens under _pdfium_lock.
+_PDF_HANDLE_CACHE_SIZE = 8
+_pdf_handles: "OrderedDict[str, tuple]" = OrderedDict()
+_pdfium_lock = threading.Lock()
+
+SUMMARY_MODEL = "claude-3-5-sonnet-20241022"
+
+_SUMMARY_INSTRUCTION = "Please provide a regulatory-focused summary of this document."
+
+# Output budget by input size: (up to N input tokens, max_tokens, words
+# asked for).  Short documents need far less than the full 1024 tokens, and
+# the requested length shrinks with the cap so summaries are not cut off.
+_SUMMARY_BUDGETS = (
+    (500, 384, "150-250"),
+    (1_500, 640, "200-350"),
+)
+_SUMMARY_DEFAULT_BUDGET = (1024, "300-500")
+
+_SUMMARY_SYSTEM_PROMPT = (
+    "You are an FDA regulatory affairs expert. "
+    "Your task is to read extracted text from a supporting document and produce "
+    "a concise, structured summary ({words} words) that highlights:\n"
+    "1. Key findings and data points\n"
+    "2. Regulatory relevance for a 510(k) or PMA submission\n"
+    "3. Any compliance gaps or items needing attention\n"
+    "4. How this document supports substantial equivalence claims\n\n"
+    "Be precise, factual, and use regulatory language. "
+    "Do not make up data not present in the text."
+)
+# One fixed system prompt per budget, so each stays byte-identical across
+# calls and can be served from Anthropic's prompt cache
+_SUMMARY_SYSTEM_PROMPTS = {
+    words: _SUMMARY_SYSTEM_PROMPT.format(words=words)
+    for words in (*(budget[2] for budget in _SUMMARY_BUDGETS), _SUMMARY_DEFAULT_BUDGET[1])
+}
 
 
 # ============================================================================
 # TEXT EXTRACTION
 # ============================================================================
 
-def _extract_text_from_pdf(file_path: str) -> str:
-    """Extract text from a PDF file using pdfplumber (primary) with PyPDF2 fallback."""
-    text = ""
+def _join_pages(page_texts, max_chars: int) -> str:
+    """Join pages as "[Page N]" blocks, pulling pages only until *max_chars* is passed.
 
-    # Try pdfplumber first - better layout handling
+    *page_texts* is consumed lazily, so pages past the budget are never
+    extracted; the caller's final cut then adds the truncation marker.
+    """
+    buf = io.StringIO()
+    write = buf.write
+    size = 0
+    for page_num, page_text in enumerate(page_texts, 1):
+        if page_text:
+            if size:
+                size += write("\n\n")
+            size += write(f"[Page {page_num}]\n")
+            size += write(page_text)
+            if size > max_chars:
+                break
+    return buf.getvalue()
+
+
+def _pdfium_page_texts(pdf):
+    for page in pdf:
+        text_page = page.get_textpage()
+        try:
+            yield text_page.get_text_range()
+        finally:
+            text_page.close()
+            page.close()
+
+
+def _open_pdfium(file_path: str):
+    """Cached ``pdfium.PdfDocument`` for *file_path*; caller holds _pdfium_lock.
+
+    A handle is reused only while the file's mtime is unchanged, and is
+    closed when it is replaced or evicted.
+    """
+    mtime = os.path.getmtime(file_path)
+    entry = _pdf_handles.pop(file_path, None)
+    if entry is not None:
+        if entry[0] == mtime:
+            _pdf_handles[file_path] = entry
+            return entry[1]
+        entry[1].close()
+    pdf = pdfium.PdfDocument(file_path)
+    _pdf_handles[file_path] = (mtime, pdf)
+    while len(_pdf_handles) > _PDF_HANDLE_CACHE_SIZE:
+        _, (_, evicted) = _pdf_handles.popitem(last=False)
+        evicted.close()
+    return pdf
+
+
+def _discard_pdfium(file_path: str) -> None:
+    """Close and forget a cached handle; caller holds _pdfium_lock."""
+    entry = _pdf_handles.pop(file_path, None)
+    if entry is not None:
+        entry[1].close()
+
+
+def _extract_page_range(file_path: str, start: int, end: int) -> list:
+    """Worker: pdfplumber text of pages [start, end), opened in this process."""
+    with pdfplumber.open(file_path) as pdf:
+        return [page.extract_text() for page in pdf.pages[start:end]]
+
+
+def _parallel_page_texts(file_path: str, num_pages: int):
+    """Yield page texts in order, extracted by the process pool.
+
+    At most one range per worker is in flight, and ranges are only
+    submitted as earlier ones are consumed, so stopping at the character
+    budget leaves the rest of the document unparsed.
+    """
+    pool = get_pdf_pool()
+    starts = iter(range(0, num_pages, _PDF_PAGES_PER_TASK))
+    pending = deque()
+
+    def submit_next() -> None:
+        start = next(starts, None)
+        if start is not None:
+            end = min(start + _PDF_PAGES_PER_TASK, num_pages)
+            pending.append(pool.submit(_extract_page_range, file_path, start, end))
+
+    for _ in range(PDF_WORKERS):
+        submit_next()
     try:
-        import pdfplumber
-        with pdfplumber.open(file_path) as pdf:
-            pages_text = []
-            for page_num, page in enumerate(pdf.pages):
-                page_text = page.extract_text()
-                if page_text:
-                    pages_text.append(f"[Page {page_num + 1}]\n{page_text}")
-            text = "\n\n".join(pages_text)
-        if text.strip():
-            logger.info("PDF extracted via pdfplumber: %d chars from %s", len(text), file_path)
-            return text
-    except ImportError:
+        while pending:
+            texts = pending.popleft().result()
+            submit_next()
+            yield from texts
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _extract_text_from_pdf(file_path: str, max_chars: int = MAX_EXTRACTED_CHARS) -> str:
+    """Extract text from a PDF file, stopping at the page that passes *max_chars*.
+
+    pypdfium2 (PDFium, native code) is tried first, then pdfplumber and
+    finally PyPDF2; the pure-Python pdfminer.six behind pdfplumber is
+    several times slower per page.
+    """
+    text = ""
+
+    if pdfium is not None:
+        try:
+            with _pdfium_lock:
+                try:
+                    text = _join_pages(_pdfium_page_texts(_open_pdfium(file_path)), max_chars)
+                except Exception:
+                    _discard_pdfium(file_path)
+                    raise
+            if text.strip():
+                logger.info("PDF extracted via pypdfium2: %d chars from %s", len(text), file_path)
+                return text
+        except Exception as exc:
+            logger.warning("pypdfium2 extraction failed (%s), falling back to pdfplumber", exc)
+
+    # Then pdfplumber - better layout handling than PyPDF2
+    if pdfplumber is None:
         logger.warning("pdfplumber not available, falling back to PyPDF2")
-    except Exception as exc:
-        logger.warning("pdfplumber extraction failed (%s), falling back to PyPDF2", exc)
+    else:
+        try:
+            with pdfplumber.open(file_path) as pdf:
+                num_pages = len(pdf.pages)
+                parallel = num_pages >= _PARALLEL_MIN_PAGES and PDF_WORKERS > 1
+                if not parallel:
+                    text = _join_pages((page.extract_text() for page in pdf.pages), max_chars)
+            if parallel:
+                text = _join_pages(_parallel_page_texts(file_path, num_pages), max_chars)
+            if text.strip():
+                logger.info("PDF extracted via pdfplumber: %d chars from %s", len(text), file_path)
+                return text
+        except Exception as exc:
+            logger.warning("pdfplumber extraction failed (%s), falling back to PyPDF2", exc)
 
     # Fallback: PyPDF2
-    try:
-        from PyPDF2 import PdfReader
-        reader = PdfReader(file_path)
-        pages_text = []
-        for page_num, page in enumerate(reader.pages):
-            page_text = page.extract_text()
-            if page_text:
-                pages_text.append(f"[Page {page_num + 1}]\n{page_text}")
-        text = "\n\n".join(pages_text)
-        logger.info("PDF extracted via PyPDF2: %d chars from %s", len(text), file_path)
-        return text
-    except ImportError:
+    if PdfReader is None:
         logger.error("Neither pdfplumber nor PyPDF2 is installed")
         raise RuntimeError(
             "PDF extraction libraries not available. "
             "Install pdfplumber or PyPDF2 in requirements.txt."
         )
+    try:
+        reader = PdfReader(file_path)
+        text = _join_pages((page.extract_text() for page in reader.pages), max_chars)
+        logger.info("PDF extracted via PyPDF2: %d chars from %s", len(text), file_path)
+        return text
     except Exception as exc:
         logger.error("PyPDF2 extraction failed for %s: %s", file_path, exc)
         raise RuntimeError(f"Failed to extract text from PDF: {exc}") from exc
 
 
-def _extract_text_from_docx(file_path: str) -> str:
-    """Extract text from a DOCX file using python-docx."""
-    try:
-        from docx import Document as DocxDocument
-        doc = DocxDocument(file_path)
-        paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
-
-        # Also extract text from tables
-        table_texts = []
-        for table in doc.tables:
-            for row in table.rows:
-                row_text = " | ".join(
-                    cell.text.strip() for cell in row.cells if cell.text.strip()
-                )
-                if row_text:
-                    table_texts.append(row_text)
-
-        all_text = "\n".join(paragraphs)
-        if table_texts:
-            all_text += "\n\n[TABLES]\n" + "\n".join(table_texts)
+def _docx_cell_text(tc) -> str:
+    """Text of a <w:tc> element, as python-docx's ``_Cell.text`` gives it."""
+    return "\n".join(Paragraph(p, None).text for p in tc.iterchildren(_W_P))
 
-        logger.info("DOCX extracted: %d chars from %s", len(all_text), file_path)
-        return all_text
-    except ImportError:
+
+def _extract_text_from_docx(file_path: str, max_chars: int = MAX_EXTRACTED_CHARS) -> str:
+    """Extract text from a DOCX file using python-docx, up to about *max_chars*."""
+    if DocxDocument is None:
         logger.error("python-docx is not installed")
         raise RuntimeError(
             "DOCX extraction library not available. "
             "Install python-docx in requirements.txt."
         )
+    try:
+        doc = DocxDocument(file_path)
+        # One walk over the body in document order, dispatching on the
+        # element tag, instead of separate doc.paragraphs and doc.tables
+        # passes; rows are read straight from <w:tr>/<w:tc>, avoiding the
+        # grid resolution behind python-docx's row.cells.  Table rows still
+        # go after the paragraphs in the output.
+        paragraphs = io.StringIO()
+        tables = io.StringIO()
+        size = 0
+        for child in doc.element.body.iterchildren():
+            if child.tag == _W_P:
+                text = Paragraph(child, None).text.strip()
+                if text:
+                    if paragraphs.tell():
+                        size += paragraphs.write("\n")
+                    size += paragraphs.write(text)
+            elif child.tag == _W_TBL:
+                for tr in child.iterchildren(_W_TR):
+                    row_cells = []
+                    for tc in tr.iterchildren(_W_TC):
+                        cell = _docx_cell_text(tc).strip()
+                        if cell:
+                            row_cells.append(cell)
+                    row_text = " | ".join(row_cells)
+                    if row_text:
+                        size += tables.write("\n" if tables.tell() else "\n\n[TABLES]\n")
+                        size += tables.write(row_text)
+                        if size > max_chars:
+                            break
+            if size > max_chars:
+                break
+
+        all_text = paragraphs.getvalue() + tables.getvalue()
+
+        logger.info("DOCX extracted: %d chars from %s", len(all_text), file_path)
+        return all_text
     except Exception as exc:
         logger.error("DOCX extraction failed for %s: %s", file_path, exc)
         raise RuntimeError(f"Failed to extract text from DOCX: {exc}") from exc
 
 
+def _split_sections(text: str) -> list:
+    """Split *text* at recognised section headings (the preamble is a section too)."""
+    starts = [m.start() for m in _SECTION_HEADER_RE.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    return [text[a:b] for a, b in zip(starts, starts[1:] + [len(text)])]
+
+
+def _truncate_by_section(text: str, max_chars: int) -> str:
+    """Fit *text* into *max_chars* by cutting only the longest sections.
+
+    A single length threshold is chosen so that sections shorter than it
+    are kept whole and every longer one is cut to it: a short Indications
+    for Use statement survives intact instead of being lost to a
+    right-hand cut behind a long test report.
+    """
+    sections = _split_sections(text)
+    budget = max_chars - len(_TRUNCATION_NOTE)
+    remaining = budget
+    threshold = None
+    lengths = sorted(len(section) for section in sections)
+    for i, length in enumerate(lengths):
+        share = remaining // (len(lengths) - i)
+        if length > share:
+            threshold = share
+            break
+        remaining -= length
+    if threshold is None:
+        return text
+
+    keep = max(threshold - len(_SECTION_CUT_MARK), 0)
+    buf = io.StringIO()
+    for section in sections:
+        if len(section) > threshold:
+            buf.write(section[:keep])
+            buf.write(_SECTION_CUT_MARK)
+        else:
+            buf.write(section)
+    buf.write(_TRUNCATION_NOTE)
+    return buf.getvalue()
+
+
+def _file_digest(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
 async def extract_text_from_document(file_path: str, mime_type: str) -> str:
     """
     Extract text from a PDF or DOCX document.
@@ -106,7 +390,8 @@ async def extract_text_from_document(file_path: str, mime_type: str) -> str:
         mime_type: MIME type string of the file.
 
     Returns:
-        Extracted text, truncated to MAX_EXTRACTED_CHARS to avoid token limits.
+        Extracted text, cut section by section to about MAX_EXTRACTED_CHARS
+        to avoid token limits.
 
     Raises:
         FileNotFoundError: If the file does not exist.
@@ -124,10 +409,21 @@ async def extract_text_from_document(file_path: str, mime_type: str) -> str:
         "application/msword",
     }
 
+    # Hashing and parsing are blocking file and CPU work, so both run in a
+    # worker thread instead of stalling the event loop
+    digest = await asyncio.to_thread(_file_digest, file_path)
+    cache_key = f"doc:text:{MAX_EXTRACTED_CHARS}:{RAW_EXTRACT_CHARS}:{mime_type}:{digest}"
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        logger.info("Extracted text cache hit for %s", file_path)
+        return cached
+
+    # The extractors stop reading once RAW_EXTRACT_CHARS is passed; the
+    # section-aware cut below then brings the text within MAX_EXTRACTED_CHARS
     if mime_type in pdf_types:
-        raw_text = _extract_text_from_pdf(file_path)
+        raw_text = await asyncio.to_thread(_extract_text_from_pdf, file_path, RAW_EXTRACT_CHARS)
     elif mime_type in docx_types:
-        raw_text = _extract_text_from_docx(file_path)
+        raw_text = await asyncio.to_thread(_extract_text_from_docx, file_path, RAW_EXTRACT_CHARS)
     else:
         # Unsupported format for text extraction (e.g., images, XLSX)
         raise ValueError(
@@ -141,8 +437,9 @@ async def extract_text_from_document(file_path: str, mime_type: str) -> str:
             "Text truncated from %d to %d chars for %s",
             len(raw_text), MAX_EXTRACTED_CHARS, file_path
         )
-        raw_text = raw_text[:MAX_EXTRACTED_CHARS] + "\n\n[... content truncated for AI analysis ...]"
+        raw_text = await asyncio.to_thread(_truncate_by_section, raw_text, MAX_EXTRACTED_CHARS)
 
+    await cache_set(cache_key, raw_text, settings.DOCUMENT_TEXT_CACHE_TTL_SECONDS)
     return raw_text
 
 
@@ -150,10 +447,52 @@ async def extract_text_from_document(file_path: str, mime_type: str) -> str:
 # AI SUMMARIZATION
 # ============================================================================
 
+def _summary_budget(text: str) -> tuple:
+    """Return (max_tokens, system prompt) sized for the input *text*."""
+    input_tokens = count_tokens(text)
+    max_tokens, words = _SUMMARY_DEFAULT_BUDGET
+    for max_input_tokens, budget_tokens, budget_words in _SUMMARY_BUDGETS:
+        if input_tokens <= max_input_tokens:
+            max_tokens, words = budget_tokens, budget_words
+            break
+    return max_tokens, _SUMMARY_SYSTEM_PROMPTS[words]
+
+
+def _summary_params(text: str, document_type: str) -> tuple:
+    """Return (Messages params, summary cache key or None) for one document."""
+    # Separate text blocks, so the (up to MAX_EXTRACTED_CHARS) document text
+    # is passed through as is instead of copied into one prompt string
+    user_content = [
+        {"type": "text", "text": f"Document Type: {document_type}\n\nExtracted Content:"},
+        {"type": "text", "text": text},
+        {"type": "text", "text": _SUMMARY_INSTRUCTION},
+    ]
+    max_tokens, system_prompt = _summary_budget(text)
+    params = {
+        "model": SUMMARY_MODEL,
+        "max_tokens": max_tokens,
+        "messages": [{"role": "user", "content": user_content}],
+        "system": [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}],
+    }
+    cache_key = None
+    if settings.LLM_CACHE_ENABLED:
+        cache_key = prompt_key(
+            "document:summary", text,
+            f"{SUMMARY_MODEL}\0{max_tokens}\0{system_prompt}\0{document_type}",
+        )
+    return params, cache_key
+
+
+@lru_cache(maxsize=4)
+def _anthropic_client(api_key: str):
+    """One async client per API key, on the shared Anthropic connection pool."""
+    return AsyncAnthropic(api_key=api_key, http_client=anthropic_http_client)
+
+
 async def analyze_document_with_ai(
     text: str,
     document_type: str,
-    api_key: Optional[str] = None
+    api_key: Optional[str] = None,
 ) -> str:
     """
     Use Claude to generate a regulatory-focused summary of the extracted document text.
@@ -172,47 +511,29 @@ async def analyze_document_with_ai(
         logger.warning("ANTHROPIC_API_KEY not set - returning structured placeholder summary")
         return _generate_placeholder_summary(document_type, len(text))
 
-    system_prompt = (
-        "You are an FDA regulatory affairs expert. "
-        "Your task is to read extracted text from a supporting document and produce "
-        "a concise, structured summary (300-500 words) that highlights:\n"
-        "1. Key findings and data points\n"
-        "2. Regulatory relevance for a 510(k) or PMA submission\n"
-        "3. Any compliance gaps or items needing attention\n"
-        "4. How this document supports substantial equivalence claims\n\n"
-        "Be precise, factual, and use regulatory language. "
-        "Do not make up data not present in the text."
-    )
+    params, cache_key = _summary_params(text, document_type)
 
-    user_prompt = (
-        f"Document Type: {document_type}\n\n"
-        f"Extracted Content:\n{text}\n\n"
-        "Please provide a regulatory-focused summary of this document."
-    )
+    # Placeholders and error texts are never stored, only real summaries
+    if cache_key is not None:
+        cached = await cache_get(cache_key)
+        if cached is not None:
+            logger.info("AI summary cache hit for document_type=%s", document_type)
+            return cached
 
     try:
-        from anthropic import Anthropic
-        client = Anthropic(api_key=resolved_key)
-
-        response = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=1024,
-            messages=[
-                {"role": "user", "content": user_prompt}
-            ],
-            system=system_prompt
-        )
+        client = _anthropic_client(resolved_key)
+
+        async with anthropic_slot(), client.messages.stream(**params) as stream:
+            summary = await stream.get_final_text()
 
-        summary = response.content[0].text
         logger.info(
             "AI summary generated for document_type=%s, input=%d chars, output=%d chars",
             document_type, len(text), len(summary)
         )
+        if cache_key is not None:
+            await cache_set(cache_key, summary, settings.LLM_CACHE_TTL_SECONDS)
         return summary
 
-    except ImportError:
-        logger.error("anthropic package not installed")
-        return _generate_placeholder_summary(document_type, len(text))
     except Exception as exc:
         logger.error("Anthropic API call failed: %s", exc)
         # Return placeholder rather than crashing the upload workflow
@@ -4,8 +4,13 @@ Pre-populates the vector database with carefully curated excerpts from
 FDA guidance documents, ISO standards, and 21 CFR regulations that are
 most relevant to 510(k) premarket notification submissions.
 
-No external API calls are made for seeding — all content is hardcoded
-regulatory reference text.  This guarantees reproducible, offline seeding.
+All content is hardcoded regulatory reference text, so seeding is
+reproducible.  The only external calls are the embedding requests (see
+``rag_service.embed_texts``; cached by text hash, and mocked offline when
+no OPENAI_API_KEY is set).  Embeddings are computed here rather than by
+the database: a generated column cannot call a network model (generation
+expressions must be immutable), and the server runs no embedding
+extension.
 
 Usage
 -----
@@ -16,18 +21,51 @@ Or from any async context:
     from app.services.fda_knowledge_seeder import seed_fda_knowledge_base
     count = await seed_fda_knowledge_base(db)
 """
+import asyncio
+import io
 import logging
-from typing import List, Tuple
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from typing import Tuple
+
+import orjson
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from ..core.schema import create_vector_index, drop_vector_indexes
+from ..core.tokens import chunk_text
+
 logger = logging.getLogger(__name__)
 
+# Entries embedded per provider request and inserted per commit
+SEED_BATCH_SIZE = 96
+# Longer entries are stored as several "(part N)" rows, each embedded on its
+# own, so one vector never has to stand for a whole long document
+CHUNK_MAX_TOKENS = 450
+CHUNK_OVERLAP_TOKENS = 50
+# Loads of at least this many rows drop the HNSW index and rebuild it once
+# at the end: one build is far cheaper than a graph insert per row
+DEFER_INDEX_MIN_ROWS = 1000
+
+# Fresh titles are appended with COPY, which bypasses the column defaults:
+# content_preview and created_at are rendered here instead
+_COPY_SQL = (
+    "COPY fda_knowledge_base (title, content, content_preview, content_type, "
+    "section, embedding, created_at) FROM STDIN"
+)
+# COPY text-format escapes for the free-text columns
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
 # ---------------------------------------------------------------------------
 # Knowledge corpus
 # Each entry: (title, content, content_type, section)
 # ---------------------------------------------------------------------------
+# A tuple of literal tuples, which the compiler folds into one constant of
+# the cached bytecode: importing the module loads it in a single step
+# instead of building the list entry by entry.
 # fmt: off
-FDA_KNOWLEDGE_CORPUS: List[Tuple[str, str, str, str]] = [
+FDA_KNOWLEDGE_CORPUS: Tuple[Tuple[str, str, str, str], ...] = (
 
     # =========================================================================
     # 510(k) GENERAL REQUIREMENTS
@@ -567,7 +605,7 @@ discounts available with FDA qualification.""",
         "guidance",
         "510k",
     ),
-]
+)
 # fmt: on
 
 
@@ -575,10 +613,150 @@ discounts available with FDA qualification.""",
 # Seeder function
 # ---------------------------------------------------------------------------
 
+@lru_cache(maxsize=1)
+def _seed_entries() -> Tuple[Tuple[str, str, str, str, str], ...]:
+    """Corpus entries as stored rows: (title, content, content_type, section, payload).
+
+    An entry that fits in one chunk keeps its title; a longer one becomes
+    "<title> (part N)" rows of overlapping chunks.  *payload* is the text
+    embedded for the row.  The corpus never changes, so the chunking and
+    payload strings are built once per process, not on every seed.
+    """
+    entries = []
+    for title, content, content_type, section in FDA_KNOWLEDGE_CORPUS:
+        chunks = chunk_text(content, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS)
+        if len(chunks) == 1:
+            entries.append((title, content, content_type, section, f"{title} {content}"))
+        else:
+            for part, chunk in enumerate(chunks, 1):
+                part_title = f"{title} (part {part})"
+                entries.append((part_title, chunk, content_type, section, f"{part_title} {chunk}"))
+    return tuple(entries)
+
+
+def _copy_rows(db: Session, rows: list) -> int:
+    """Append *rows* in one COPY FROM STDIN (psycopg2 only); returns the row count."""
+    from ..models.fda_knowledge import content_preview
+
+    created_at = datetime.utcnow().isoformat()
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join((
+            row["title"].translate(_COPY_ESCAPES),
+            row["content"].translate(_COPY_ESCAPES),
+            content_preview(row["content"]).translate(_COPY_ESCAPES),
+            row["content_type"],
+            row["section"],
+            # pgvector text input: [x,y,...]
+            orjson.dumps(row["embedding"], option=orjson.OPT_SERIALIZE_NUMPY).decode(),
+            created_at,
+        )))
+        buf.write("\n")
+    buf.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(_COPY_SQL, buf)
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+def _count_entries(db: Session) -> int:
+    from ..models.fda_knowledge import FDAKnowledgeBase
+    return db.query(FDAKnowledgeBase).count()
+
+
+def _existing_titles(db: Session, titles: list) -> set:
+    """The subset of *titles* already stored, in one IN query."""
+    from ..models.fda_knowledge import FDAKnowledgeBase
+    return {
+        title for (title,) in
+        db.query(FDAKnowledgeBase.title).filter(FDAKnowledgeBase.title.in_(titles))
+    }
+
+
+def _drop_vector_indexes(db: Session) -> None:
+    drop_vector_indexes(db.connection())
+    db.commit()
+
+
+def _create_vector_index(db: Session) -> None:
+    create_vector_index(db.connection())
+    db.commit()
+
+
+def _write_batch(db: Session, rows: list, use_copy: bool) -> int:
+    """Insert and commit one batch of *rows*; returns the number of rows written.
+
+    The batch is all or nothing: on failure its transaction is rolled back
+    (batches committed before it are kept) and the error re-raised.
+    """
+    from ..models.fda_knowledge import FDAKnowledgeBase
+
+    try:
+        if use_copy:
+            written = _copy_rows(db, rows)
+        else:
+            # One multi-row Core INSERT per batch: plain parameter dicts, no
+            # ORM objects or unit-of-work bookkeeping.  Titles inserted since
+            # the duplicate check (a concurrent seed) are skipped by the
+            # unique title index rather than failing the batch.
+            result = db.execute(
+                insert(FDAKnowledgeBase)
+                .on_conflict_do_nothing()
+                .returning(FDAKnowledgeBase.id),
+                rows,
+            )
+            written = len(result.all())
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return written
+
+
+async def _seed_batches(db: Session, pending, use_copy: bool) -> int:
+    """Embed and write *pending* entries batch by batch; returns the rows inserted."""
+    from .rag_service import embed_texts
+
+    inserted = 0
+    for batch in iter(lambda: list(islice(pending, SEED_BATCH_SIZE)), []):
+        # Embedding happens outside any transaction: a failed request skips
+        # its batch without touching the session
+        try:
+            embeddings = await embed_texts([payload for *_, payload in batch])
+        except Exception as exc:
+            logger.error("Failed to embed batch starting at %r: %s", batch[0][0][:60], exc)
+            continue
+
+        rows = [
+            {
+                "title": title,
+                "content": content,
+                "content_type": content_type,
+                "section": section,
+                "embedding": embedding,
+            }
+            for (title, content, content_type, section, _), embedding in zip(batch, embeddings)
+        ]
+        try:
+            batch_inserted = await asyncio.to_thread(_write_batch, db, rows, use_copy)
+        except Exception as exc:
+            logger.error("Failed to seed batch starting at %r: %s", batch[0][0][:60], exc)
+            continue
+        inserted += batch_inserted
+        logger.debug("Seeded batch of %d entries", batch_inserted)
+    return inserted
+
+
 async def seed_fda_knowledge_base(db: Session, skip_existing: bool = True) -> int:
     """
     Populate the ``fda_knowledge_base`` table with curated FDA guidance text.
 
+    Only the embedding requests run on the event loop; every call on the
+    blocking *db* session is made from a worker thread (one at a time, so
+    the session is never shared between threads).
+
     Parameters
     ----------
     db:
@@ -593,12 +771,9 @@ async def seed_fda_knowledge_base(db: Session, skip_existing: bool = True) -> in
     int
         Number of new entries inserted.
     """
-    from ..models.fda_knowledge import FDAKnowledgeBase
-    from .rag_service import embed_text
-
     # Check if already seeded
     if skip_existing:
-        existing_count = db.query(FDAKnowledgeBase).count()
+        existing_count = await asyncio.to_thread(_count_entries, db)
         if existing_count > 0:
             logger.info(
                 "FDA knowledge base already has %d entries — skipping seed. "
@@ -607,37 +782,37 @@ async def seed_fda_knowledge_base(db: Session, skip_existing: bool = True) -> in
             )
             return 0
 
-    inserted = 0
-    for title, content, content_type, section in FDA_KNOWLEDGE_CORPUS:
-        # Check for duplicate by title (idempotent)
-        existing = (
-            db.query(FDAKnowledgeBase)
-            .filter(FDAKnowledgeBase.title == title)
-            .first()
+    # Deduplicate by title (idempotent): one IN query for the corpus titles,
+    # rather than reading every title in the table.  An empty table (just
+    # counted above) has none, so the query is skipped.  The check only
+    # saves embedding work: the INSERT's ON CONFLICT DO NOTHING is what
+    # keeps concurrent seeds from duplicating a title.
+    entries = _seed_entries()
+    if skip_existing:
+        existing_titles = set()
+    else:
+        existing_titles = await asyncio.to_thread(
+            _existing_titles, db, [title for title, *_ in entries]
         )
-        if existing:
-            logger.debug("Skipping duplicate entry: %r", title[:60])
-            continue
-
-        try:
-            embedding = await embed_text(f"{title} {content}")
-            entry = FDAKnowledgeBase(
-                title=title,
-                content=content,
-                content_type=content_type,
-                section=section,
-                embedding=embedding,
-            )
-            db.add(entry)
-            inserted += 1
-            logger.debug("Seeded: [%s] %s", section, title[:60])
-        except Exception as exc:
-            logger.error("Failed to seed entry %r: %s", title[:60], exc)
-            db.rollback()
-            continue
+    if existing_titles:
+        logger.debug("Skipping %d duplicate entries", len(existing_titles))
+    # Entries are pulled from the corpus one batch at a time, so embedding
+    # payloads and row dicts only ever exist for the current batch
+    pending = (entry for entry in entries if entry[0] not in existing_titles)
+    defer_index = len(entries) - len(existing_titles) >= DEFER_INDEX_MIN_ROWS
+    # No corpus title stored yet: a pure append, streamed with COPY (it has
+    # no ON CONFLICT, so re-seeds keep the INSERT)
+    use_copy = not existing_titles and db.get_bind().dialect.driver == "psycopg2"
+
+    if defer_index:
+        await asyncio.to_thread(_drop_vector_indexes, db)
+    try:
+        inserted = await _seed_batches(db, pending, use_copy)
+    finally:
+        if defer_index:
+            await asyncio.to_thread(_create_vector_index, db)
 
     if inserted > 0:
-        db.commit()
         logger.info("FDA knowledge base seeded: %d new entries inserted", inserted)
     else:
         logger.info("FDA knowledge base seed complete: no new entries added")
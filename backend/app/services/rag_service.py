@@ -13,12 +13,24 @@ Design principles
 * Embedding dimension is fixed at 1 536 (OpenAI ada-002 compatible) so the
   same schema can be used with either provider.
 """
+import asyncio
+import base64
+import hashlib
 import logging
-import math
 import os
-from typing import List, Optional
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import List, Optional, Tuple
 
-from sqlalchemy.orm import Session
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.async_database import AsyncSessionLocal
+from ..core.cache import cache_get, cache_get_many, cache_incr, cache_set, cache_set_many
+from ..core.config import settings
+from ..core.tokens import count_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -28,13 +40,47 @@ logger = logging.getLogger(__name__)
 EMBEDDING_DIM = 1536        # OpenAI ada-002 / Anthropic voyage compatible
 _MAX_RAG_RESULTS = 5        # How many knowledge chunks to retrieve per query
 _SIMILARITY_THRESHOLD = 0.65  # Minimum cosine similarity to include a chunk
+_RAG_CONTEXT_PREFIX = "rag:context:"  # Redis key prefix for built context blocks
+# Redis counter bumped on every knowledge-base write, shared by all workers
+_KB_GENERATION_KEY = "rag:kb:generation"
+_MAX_RAG_TOKENS = 4000      # Prompt tokens the RAG context block may take
+_TRUNCATION_MARK = " …[truncated]"
+_PROCEDURAL_QUERY = "510k premarket notification requirements substantial equivalence"
+_HNSW_EF_SEARCH = settings.RAG_HNSW_EF_SEARCH  # HNSW candidate list size: recall vs. latency
+_FALLBACK_FETCH_SIZE = 1024  # (id, embedding) rows per fallback stream batch
+_RERANK_FACTOR = 4          # fp16 candidates fetched per result for fp32 re-ranking
+_BINARY_RERANK_FACTOR = 10  # binary candidates per result: 1-bit ranking is coarser
+_EMBED_BATCH_SIZE = 96      # texts per embeddings request (OpenAI accepts up to 2 048)
+_EMBED_CONCURRENCY = 8      # embeddings requests in flight per embed_texts call
+_EMBEDDING_MODEL = "text-embedding-ada-002"
+_EMBEDDING_CACHE_PREFIX = f"embed:{_EMBEDDING_MODEL}:"  # + SHA-256 of the text
+
+# Embeddings are float32 ndarrays of shape (EMBEDDING_DIM,), unit length,
+# from creation to the pgvector bind (which takes ndarrays directly): 6 KB
+# each instead of a list of 1 536 Python floats
+Embedding = np.ndarray
+
+# Whether the server has pgvector's halfvec type; probed once per process
+_halfvec_available: Optional[bool] = None
+
+# API key -> AsyncOpenAI client; see _openai_client
+_openai_clients: dict = {}
+
+# Per-worker caches in front of Redis and the vector search, LRU-ordered:
+# embedding cache key -> unit vector, and (normalized query, limit, section)
+# -> (monotonic expiry, ranked knowledge-base ids)
+_local_embeddings: "OrderedDict[str, Embedding]" = OrderedDict()
+_retrievals: "OrderedDict[tuple, Tuple[float, List[int]]]" = OrderedDict()
+# (monotonic expiry, knowledge-base generation, [(entry id, formatted block)])
+# for _PROCEDURAL_QUERY
+_procedural_blocks: Optional[Tuple[float, str, List[Tuple[int, str]]]] = None
 
 
 # ---------------------------------------------------------------------------
 # Embedding helpers
 # ---------------------------------------------------------------------------
 
-def _mock_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+def _mock_embedding(text: str, dim: int = EMBEDDING_DIM) -> Embedding:
     """
     Produce a deterministic pseudo-embedding when no API key is configured.
 
@@ -45,18 +91,17 @@ def _mock_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
     NOTE: These mock embeddings have NO semantic meaning — they exist only
     so the database schema and retrieval plumbing can be tested locally.
     """
-    # Build a hash-based frequency vector
-    vec: List[float] = [0.0] * dim
-    for i, ch in enumerate(text):
-        idx = (ord(ch) * 31 + i) % dim
-        vec[idx] += 1.0
+    # Build a hash-based frequency vector.  UTF-32 gives each character's
+    # code point (ord) in one C-level decode; bincount does the counting.
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32).astype(np.int64)
+    vec = np.bincount((codes * 31 + np.arange(codes.size)) % dim, minlength=dim).astype(np.float64)
 
     # L2 normalise
-    magnitude = math.sqrt(sum(v * v for v in vec)) or 1.0
-    return [v / magnitude for v in vec]
+    vec /= np.linalg.norm(vec) or 1.0
+    return vec.astype(np.float32)
 
 
-async def embed_text(text: str) -> List[float]:
+async def embed_text(text: str) -> Embedding:
     """
     Generate a 1 536-dimensional embedding vector for *text*.
 
@@ -78,24 +123,128 @@ async def embed_text(text: str) -> List[float]:
 
     Returns
     -------
-    List[float]
-        1 536-dimensional unit vector.
+    Embedding
+        1 536-dimensional float32 unit vector.
+    """
+    return (await embed_texts([text]))[0]
+
+
+def _embedding_cache_key(text: str) -> str:
+    return _EMBEDDING_CACHE_PREFIX + hashlib.sha256(text.encode()).hexdigest()
+
+
+def _encode_embedding(embedding: Embedding) -> str:
+    """Pack as base64 float32: the precision the vector column stores anyway."""
+    return base64.b64encode(embedding.tobytes()).decode()
+
+
+def _decode_embedding(value: str) -> Embedding:
+    return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+
+
+def _normalize(embedding: List[float]) -> Embedding:
+    """Scale a provider vector to float32 unit length, so similarity is a plain inner product."""
+    vec = np.asarray(embedding, dtype=np.float32)
+    return vec / (np.linalg.norm(vec) or 1.0)
+
+
+def _openai_client(api_key: str):
+    """One async OpenAI client (and connection pool) per API key, kept for the process."""
+    client = _openai_clients.get(api_key)
+    if client is None:
+        from openai import AsyncOpenAI  # type: ignore
+        client = _openai_clients[api_key] = AsyncOpenAI(api_key=api_key)
+    return client
+
+
+async def close_openai_clients() -> None:
+    """Close the cached OpenAI clients (called from the FastAPI lifespan)."""
+    for client in _openai_clients.values():
+        await client.close()
+    _openai_clients.clear()
+
+
+def _remember_embedding(key: str, embedding: Embedding) -> None:
+    _local_embeddings[key] = embedding
+    _local_embeddings.move_to_end(key)
+    while len(_local_embeddings) > settings.EMBEDDING_LOCAL_CACHE_MAX_ENTRIES:
+        _local_embeddings.popitem(last=False)
+
+
+async def embed_texts(texts: List[str], batch_size: int = _EMBED_BATCH_SIZE) -> List[Embedding]:
+    """
+    Embed several texts at once — one provider request per *batch_size* texts.
+
+    Same provider strategy and 8 000-character cap as :func:`embed_text`;
+    the result is in input order.  The requests run concurrently, at most
+    ``_EMBED_CONCURRENCY`` at a time.
+
+    Provider embeddings are cached in Redis by the SHA-256 of the text, so
+    re-seeding or re-embedding unchanged text makes no API calls; only the
+    texts missing from the cache are sent.  Recently used vectors are also
+    held in a bounded per-worker LRU, which answers repeat queries without
+    the Redis round trip.
+
+    Every vector returned is unit length (normalized here once, before it
+    is cached or stored), which is what lets :func:`search_similar` rank by
+    inner product.
     """
-    text = text[:8000]  # hard cap to stay within model context windows
+    texts = [text[:8000] for text in texts]  # hard cap to stay within model context windows
 
     # --- Attempt OpenAI embeddings (ada-002 produces 1 536 dims) ---
     openai_key = os.environ.get("OPENAI_API_KEY", "")
     if openai_key:
         try:
-            from openai import OpenAI  # type: ignore
-            client = OpenAI(api_key=openai_key)
-            response = client.embeddings.create(
-                model="text-embedding-ada-002",
-                input=text
+            keys = [_embedding_cache_key(text) for text in texts]
+            embeddings: List[Optional[Embedding]] = [_local_embeddings.get(key) for key in keys]
+            for key, embedding in zip(keys, embeddings):
+                if embedding is not None:
+                    _local_embeddings.move_to_end(key)
+            not_local = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            if not_local:
+                cached = await cache_get_many([keys[i] for i in not_local])
+                for i, value in zip(not_local, cached):
+                    if value is not None:
+                        embeddings[i] = _decode_embedding(value)
+                        _remember_embedding(keys[i], embeddings[i])
+            missing = [i for i in not_local if embeddings[i] is None]
+            if not missing:
+                logger.debug("Embedded %d texts from the embedding caches", len(texts))
+                return embeddings
+
+            client = _openai_client(openai_key)
+            semaphore = asyncio.Semaphore(_EMBED_CONCURRENCY)
+
+            async def embed_chunk(chunk: List[str]) -> List[Embedding]:
+                async with semaphore:
+                    response = await client.embeddings.create(
+                        model=_EMBEDDING_MODEL,
+                        input=chunk,
+                    )
+                return [
+                    _normalize(item.embedding)
+                    for item in sorted(response.data, key=lambda d: d.index)
+                ]
+
+            to_embed = [texts[i] for i in missing]
+            chunks = await asyncio.gather(*(
+                embed_chunk(to_embed[start:start + batch_size])
+                for start in range(0, len(to_embed), batch_size)
+            ))
+            fresh = [embedding for chunk in chunks for embedding in chunk]
+            await cache_set_many(
+                {keys[i]: _encode_embedding(embedding) for i, embedding in zip(missing, fresh)},
+                settings.EMBEDDING_CACHE_TTL_SECONDS,
+            )
+
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+                _remember_embedding(keys[i], embedding)
+            logger.debug(
+                "Embedded %d texts via OpenAI ada-002 (%d from cache)",
+                len(texts), len(texts) - len(missing),
             )
-            embedding = response.data[0].embedding
-            logger.debug("Embedded %d chars via OpenAI ada-002", len(text))
-            return embedding
+            return embeddings
         except Exception as exc:
             logger.warning("OpenAI embedding failed (%s); falling back to mock", exc)
 
@@ -104,7 +253,7 @@ async def embed_text(text: str) -> List[float]:
         "No embedding API key found — using mock embedding (dev/CI mode). "
         "Set OPENAI_API_KEY for production semantic search."
     )
-    return _mock_embedding(text)
+    return [_mock_embedding(text) for text in texts]
 
 
 # ---------------------------------------------------------------------------
@@ -116,7 +265,7 @@ async def store_document(
     content: str,
     content_type: str,
     section: str,
-    db: Session,
+    db: AsyncSession,
 ) -> "FDAKnowledgeBase":  # type: ignore[name-defined]  # noqa: F821
     """
     Store a knowledge-base document with its embedding.
@@ -127,7 +276,7 @@ async def store_document(
     content:      Full guidance text.
     content_type: "guidance" | "predicate_summary" | "regulation"
     section:      Topic tag, e.g. "510k", "biocompatibility".
-    db:           SQLAlchemy session.
+    db:           SQLAlchemy async session.
 
     Returns
     -------
@@ -146,31 +295,94 @@ async def store_document(
         embedding=embedding,
     )
     db.add(kb_entry)
-    db.commit()
-    db.refresh(kb_entry)
+    await db.commit()
+    invalidate_retrieval_cache()
+    await bump_kb_generation()
+    await db.refresh(kb_entry)
     logger.info("Stored knowledge-base entry id=%d section=%s", kb_entry.id, section)
     return kb_entry
 
 
+async def kb_generation() -> str:
+    """The current knowledge-base generation ("0" before the first write)."""
+    return await cache_get(_KB_GENERATION_KEY) or "0"
+
+
+async def bump_kb_generation() -> None:
+    """Start a new knowledge-base generation, retiring every worker's RAG contexts."""
+    await cache_incr(_KB_GENERATION_KEY)
+
+
+def invalidate_retrieval_cache() -> None:
+    """Forget this worker's cached search results (after knowledge-base writes)."""
+    global _procedural_blocks
+    _retrievals.clear()
+    _procedural_blocks = None
+
+
+def _cached_retrieval(key: tuple) -> Optional[List[int]]:
+    entry = _retrievals.get(key)
+    if entry is None:
+        return None
+    expires_at, ids = entry
+    if expires_at < time.monotonic():
+        del _retrievals[key]
+        return None
+    _retrievals.move_to_end(key)
+    return ids
+
+
+def _store_retrieval(key: tuple, ids: List[int]) -> None:
+    _retrievals[key] = (time.monotonic() + settings.RAG_RETRIEVAL_CACHE_TTL_SECONDS, ids)
+    _retrievals.move_to_end(key)
+    while len(_retrievals) > settings.RAG_RETRIEVAL_CACHE_MAX_ENTRIES:
+        _retrievals.popitem(last=False)
+
+
+async def _halfvec_search_available(db: AsyncSession) -> bool:
+    """True when both pgvector-python and the server support ``halfvec``."""
+    global _halfvec_available
+    if _halfvec_available is None:
+        try:
+            from pgvector.sqlalchemy import HALFVEC  # noqa: F401
+        except ImportError:
+            _halfvec_available = False
+        else:
+            from sqlalchemy import text
+            _halfvec_available = bool(await db.scalar(
+                text("SELECT 1 FROM pg_type WHERE typname = 'halfvec'")
+            ))
+    return _halfvec_available
+
+
 async def search_similar(
     query: str,
     limit: int = _MAX_RAG_RESULTS,
-    db: Session = None,
+    db: Optional[AsyncSession] = None,
     section_filter: Optional[str] = None,
+    query_embedding: Optional[Embedding] = None,
 ) -> List["FDAKnowledgeBase"]:  # type: ignore[name-defined]  # noqa: F821
     """
     Retrieve the *limit* most semantically similar knowledge-base entries.
 
-    Uses pgvector cosine-distance operator ``<=>`` when available, otherwise
-    falls back to a Python-side dot-product ranking over all rows (suitable
-    only for small knowledge bases in development).
+    Uses pgvector's negative inner-product operator ``<#>`` when available
+    (embeddings are unit length, so this ranks exactly as cosine distance
+    would, without the per-row norms), otherwise falls back to a
+    Python-side dot-product ranking over all rows (suitable only for small
+    knowledge bases in development).
+
+    The ranked ids are cached per worker by whitespace-normalized query,
+    *limit* and *section_filter*, so a repeat query is one primary-key
+    lookup with no embedding or vector search.
 
     Parameters
     ----------
     query:          Natural-language query string.
     limit:          Maximum number of results to return.
-    db:             SQLAlchemy session.
+    db:             SQLAlchemy async session.
     section_filter: Optional topic tag to pre-filter results.
+    query_embedding: *query* already embedded (e.g. batched with other
+                    queries via :func:`embed_texts`); computed when omitted.
 
     Returns
     -------
@@ -183,64 +395,170 @@ async def search_similar(
         logger.warning("search_similar called without a DB session — returning empty list")
         return []
 
-    query_embedding = await embed_text(query)
+    cache_key = (" ".join(query.split()), limit, section_filter)
+    cached_ids = _cached_retrieval(cache_key)
+    if cached_ids is not None:
+        rows = (
+            await db.execute(select(FDAKnowledgeBase).where(FDAKnowledgeBase.id.in_(cached_ids)))
+        ).scalars().all()
+        by_id = {entry.id: entry for entry in rows}
+        return [by_id[i] for i in cached_ids if i in by_id]
+
+    if query_embedding is None:
+        query_embedding = await embed_text(query)
+    results = await search_similar_with_embedding(
+        query_embedding, limit=limit, db=db, section_filter=section_filter
+    )
+    if results:  # failed or empty searches are retried rather than cached
+        _store_retrieval(cache_key, [entry.id for entry in results])
+    if logger.isEnabledFor(logging.DEBUG):  # skip the query slice otherwise
+        logger.debug("search_similar returned %d results for query=%r", len(results), query[:60])
+    return results
+
+
+async def search_similar_with_embedding(
+    query_embedding: Embedding,
+    limit: int = _MAX_RAG_RESULTS,
+    db: Optional[AsyncSession] = None,
+    section_filter: Optional[str] = None,
+) -> List["FDAKnowledgeBase"]:  # type: ignore[name-defined]  # noqa: F821
+    """
+    :func:`search_similar` for a query that is already embedded.
+
+    *query_embedding* must be unit length, as :func:`embed_texts` returns
+    it.  Nothing is cached here; see :func:`search_similar`.
+    """
+    from ..models.fda_knowledge import FDAKnowledgeBase
 
-    # ---- Try pgvector native cosine similarity ----
+    if db is None:
+        logger.warning("search_similar_with_embedding called without a DB session — returning empty list")
+        return []
+
+    # ---- Try pgvector native inner-product similarity ----
     try:
         from pgvector.sqlalchemy import Vector  # noqa: F401
         import sqlalchemy as sa
 
         embedding_col = FDAKnowledgeBase.embedding
-        q = db.query(FDAKnowledgeBase)
-
-        if section_filter:
-            q = q.filter(FDAKnowledgeBase.section == section_filter)
-
-        # pgvector cosine distance (lower = more similar)
-        results = (
-            q.order_by(embedding_col.cosine_distance(query_embedding))
-            .limit(limit)
-            .all()
-        )
-        logger.debug(
-            "pgvector search returned %d results for query=%r", len(results), query[:60]
-        )
+        # The section is rendered as a literal, not a bind parameter, so the
+        # planner can match the query to that section's partial HNSW index
+        # (see core/schema.py); a generic plan never would
+        filters = [
+            FDAKnowledgeBase.section == sa.bindparam("section", section_filter, literal_execute=True)
+        ] if section_filter else []
+
+        # pgvector negative inner product (lower = more similar).  Run inside a
+        # SAVEPOINT so a failure (e.g. no vector extension) leaves the
+        # caller's transaction and loaded objects usable for the fallback.
+        async with db.begin_nested():
+            # SET LOCAL scopes the HNSW search width to this transaction
+            await db.execute(sa.text(f"SET LOCAL hnsw.ef_search = {_HNSW_EF_SEARCH}"))
+            fp32_distance = embedding_col.max_inner_product(query_embedding)
+            if settings.RAG_BINARY_QUANTIZED_SEARCH and await _halfvec_search_available(db):
+                # Large-knowledge-base path: Hamming distance over the 1-bit
+                # quantized index (1/32 of the fp32 bytes) picks a wider
+                # candidate set, re-ranked on the fp32 embeddings below
+                from pgvector.sqlalchemy import BIT
+
+                def quantized(vector):
+                    return sa.cast(sa.func.binary_quantize(vector), BIT(EMBEDDING_DIM))
+
+                candidates = (
+                    select(FDAKnowledgeBase.id)
+                    .where(*filters)
+                    .order_by(
+                        quantized(embedding_col).hamming_distance(
+                            quantized(sa.cast(query_embedding, Vector(EMBEDDING_DIM)))
+                        )
+                    )
+                    .limit(limit * _BINARY_RERANK_FACTOR)
+                )
+                q = select(FDAKnowledgeBase).where(FDAKnowledgeBase.id.in_(candidates))
+            elif await _halfvec_search_available(db):
+                # Two stages: the fp16 HNSW index (see core/schema.py) picks
+                # candidates touching half the bytes, then the few candidates
+                # are re-ranked on their exact fp32 embeddings.
+                from pgvector.sqlalchemy import HALFVEC
+                candidates = (
+                    select(FDAKnowledgeBase.id)
+                    .where(*filters)
+                    .order_by(
+                        sa.cast(embedding_col, HALFVEC(EMBEDDING_DIM)).max_inner_product(query_embedding)
+                    )
+                    .limit(limit * _RERANK_FACTOR)
+                )
+                q = select(FDAKnowledgeBase).where(FDAKnowledgeBase.id.in_(candidates))
+            else:
+                q = select(FDAKnowledgeBase).where(*filters)
+            # The fallback's similarity floor, on the exact fp32 scores:
+            # <#> is the negated inner product, so similarity >= T is
+            # distance <= -T.  Off-topic queries get nothing rather than
+            # the k least-bad entries.
+            results = (
+                await db.execute(
+                    q.where(fp32_distance <= -_SIMILARITY_THRESHOLD)
+                    .order_by(fp32_distance)
+                    .limit(limit)
+                )
+            ).scalars().all()
+        logger.debug("pgvector search returned %d results", len(results))
         return results
 
     except Exception as exc:
         logger.warning(
-            "pgvector cosine search failed (%s); falling back to Python-side ranking",
+            "pgvector similarity search failed (%s); falling back to Python-side ranking",
             exc,
         )
 
     # ---- Python-side fallback (no pgvector) ----
     try:
-        q = db.query(FDAKnowledgeBase)
+        # Only (id, embedding) is streamed, a batch at a time, keeping the
+        # running top k; the winners alone are then loaded in full
+        q = select(
+            FDAKnowledgeBase.id, FDAKnowledgeBase.embedding, FDAKnowledgeBase.embedding_normalized
+        ).execution_options(
+            yield_per=_FALLBACK_FETCH_SIZE
+        )
         if section_filter:
-            q = q.filter(FDAKnowledgeBase.section == section_filter)
-        all_entries = q.all()
-
-        if not all_entries:
+            q = q.where(FDAKnowledgeBase.section == section_filter)
+
+        query_vec = query_embedding
+        best_ids = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        async for rows in (await db.stream(q)).partitions():
+            # Rows without a usable vector (missing, or text from the
+            # non-pgvector column type) cannot match and are skipped
+            usable = [
+                row for row in rows
+                if row.embedding is not None
+                and not isinstance(row.embedding, str)
+                and len(row.embedding) == query_vec.size
+            ]
+            if not usable:
+                continue
+            # Stored embeddings are unit length, so one matrix-vector product
+            # gives every cosine similarity in the batch; only rows written
+            # before normalization (not yet upgraded) need their norms
+            matrix = np.asarray([row.embedding for row in usable], dtype=np.float32)
+            scores = matrix @ query_vec
+            legacy = np.fromiter((not row.embedding_normalized for row in usable), bool, len(usable))
+            if legacy.any():
+                scores[legacy] /= np.linalg.norm(matrix[legacy], axis=1).clip(min=1e-12)
+            keep = scores >= _SIMILARITY_THRESHOLD
+            best_ids = np.concatenate([best_ids, np.fromiter((row.id for row in usable), np.int64)[keep]])
+            best_scores = np.concatenate([best_scores, scores[keep]])
+            if best_scores.size > limit:
+                top = np.argpartition(-best_scores, limit - 1)[:limit]
+                best_ids, best_scores = best_ids[top], best_scores[top]
+
+        if not best_ids.size:
             return []
-
-        def _cosine_sim(a: List[float], b) -> float:
-            """Compute cosine similarity; b may be a pgvector type or plain list."""
-            if b is None:
-                return 0.0
-            b_list = list(b) if not isinstance(b, list) else b
-            if len(a) != len(b_list):
-                return 0.0
-            dot = sum(x * y for x, y in zip(a, b_list))
-            mag_a = math.sqrt(sum(x * x for x in a)) or 1.0
-            mag_b = math.sqrt(sum(y * y for y in b_list)) or 1.0
-            return dot / (mag_a * mag_b)
-
-        scored = [
-            (entry, _cosine_sim(query_embedding, entry.embedding))
-            for entry in all_entries
-        ]
-        scored.sort(key=lambda t: t[1], reverse=True)
-        return [entry for entry, score in scored[:limit] if score >= _SIMILARITY_THRESHOLD]
+        top_ids = best_ids[np.argsort(-best_scores)].tolist()
+        rows = (
+            await db.execute(select(FDAKnowledgeBase).where(FDAKnowledgeBase.id.in_(top_ids)))
+        ).scalars().all()
+        by_id = {entry.id: entry for entry in rows}
+        return [by_id[i] for i in top_ids if i in by_id]
 
     except Exception as exc:
         logger.error("Python-side RAG fallback also failed: %s", exc)
@@ -251,16 +569,81 @@ async def search_similar(
 # High-level RAG context builder
 # ---------------------------------------------------------------------------
 
-async def build_rag_context(submission, db: Session) -> str:
+def _format_entry(entry) -> str:
+    """One knowledge-base entry as a Markdown section of the RAG context."""
+    return (
+        f"### [{entry.content_type.upper()}] {entry.title}\n"
+        f"*Section: {entry.section}*\n\n"
+        f"{entry.content}"
+    )
+
+
+def _fit_token_budget(blocks: List[str], max_tokens: int = _MAX_RAG_TOKENS) -> List[str]:
+    """
+    Fit ranked context *blocks* into *max_tokens* of prompt.
+
+    The first (most similar) block is always kept whole.  A later block that
+    would overrun the budget is cut to its heading and first paragraph, and
+    dropped if even that does not fit.
+    """
+    kept: List[str] = []
+    used = 0
+    for block in blocks:
+        tokens = count_tokens(block)
+        if kept and used + tokens > max_tokens:
+            # heading + section line, then the content's first paragraph
+            parts = block.split("\n\n", 2)
+            if len(parts) < 3:
+                continue  # nothing shorter to offer
+            block = "\n\n".join(parts[:2]) + _TRUNCATION_MARK
+            tokens = count_tokens(block)
+            if used + tokens > max_tokens:
+                continue
+        kept.append(block)
+        used += tokens
+    return kept
+
+
+async def _procedural_guidance(generation: str) -> List[Tuple[int, str]]:
+    """
+    The 510(k) procedural guidance blocks appended to every RAG context.
+
+    Cache-augmented rather than retrieved per submission: the query does not
+    depend on the submission, so its entries are searched and formatted once
+    per worker and reused for ``RAG_PROCEDURAL_CONTEXT_TTL_SECONDS``, or
+    until a knowledge-base write in any worker moves on from *generation*
+    (see :func:`kb_generation`).  The refresh uses its own short-lived
+    session, as it may run alongside the caller's device search.
+    """
+    global _procedural_blocks
+    if (
+        _procedural_blocks is not None
+        and _procedural_blocks[0] > time.monotonic()
+        and _procedural_blocks[1] == generation
+    ):
+        return _procedural_blocks[2]
+    async with AsyncSessionLocal() as procedural_db:
+        entries = await search_similar(_PROCEDURAL_QUERY, limit=2, db=procedural_db)
+    blocks = [(entry.id, _format_entry(entry)) for entry in entries]
+    if blocks:  # an empty knowledge base is searched again next time
+        _procedural_blocks = (
+            time.monotonic() + settings.RAG_PROCEDURAL_CONTEXT_TTL_SECONDS, generation, blocks
+        )
+    return blocks
+
+
+async def build_rag_context(submission, db: AsyncSession) -> str:
     """
     Build a structured RAG context string for a given submission.
 
-    Runs two searches:
-    1. A broad query based on the device description and indications.
-    2. A 510(k)-specific query to surface relevant procedural guidance.
+    Combines two sets of guidance:
+    1. A search for the device description and indications, run per request.
+    2. The 510(k) procedural guidance, precomputed per worker
+       (see :func:`_procedural_guidance`).
 
     The results are deduplicated, ranked, and formatted as a Markdown block
-    ready to be appended to the generation prompt.
+    ready to be appended to the generation prompt, within ``_MAX_RAG_TOKENS``
+    (see :func:`_fit_token_budget`).
 
     Parameters
     ----------
@@ -268,7 +651,7 @@ async def build_rag_context(submission, db: Session) -> str:
         A ``Submission`` ORM instance (needs .device_name,
         .device_description, .indications_for_use).
     db:
-        Active SQLAlchemy session.
+        Active SQLAlchemy async session.
 
     Returns
     -------
@@ -283,43 +666,50 @@ async def build_rag_context(submission, db: Session) -> str:
             f"{submission.indications_for_use or ''}"
         ).strip()
 
-        procedural_query = (
-            f"510k premarket notification requirements substantial equivalence "
-            f"{submission.device_name or ''}"
-        )
+        # The context depends only on the device query and the knowledge
+        # base, so key on the query and the knowledge-base generation: repeat
+        # generations skip the embedding and vector search, while edits to
+        # the device fields, or a seed or reset in any worker, miss naturally.
+        generation = await kb_generation()
+        cache_key = f"{_RAG_CONTEXT_PREFIX}{generation}:" + hashlib.blake2b(
+            device_query.encode(), digest_size=16
+        ).hexdigest()
+        cached = await cache_get(cache_key)
+        if cached is not None:
+            logger.debug(
+                "RAG: context cache hit for submission_id=%s",
+                getattr(submission, "id", "?"),
+            )
+            return cached
 
-        # Parallel retrieval (sequential here for simplicity; could be gathered)
-        device_results = await search_similar(device_query, limit=3, db=db)
-        procedural_results = await search_similar(procedural_query, limit=2, db=db)
+        # A cold procedural cache refreshes alongside the device search
+        device_results, procedural_blocks = await asyncio.gather(
+            search_similar(device_query, limit=3, db=db),
+            _procedural_guidance(generation),
+        )
 
-        # Deduplicate by id
-        seen_ids: set = set()
-        combined: List["FDAKnowledgeBase"] = []  # type: ignore[name-defined]  # noqa: F821
-        for entry in device_results + procedural_results:
-            if entry.id not in seen_ids:
-                seen_ids.add(entry.id)
-                combined.append(entry)
+        # Deduplicate by id; the dict keeps first-seen order, and an entry
+        # found by both searches formats identically either way
+        blocks = dict(chain(
+            ((entry.id, _format_entry(entry)) for entry in device_results),
+            procedural_blocks,
+        ))
 
-        if not combined:
+        if not blocks:
             logger.info(
                 "RAG: no relevant guidance found for submission_id=%s",
                 getattr(submission, "id", "?"),
             )
             return ""
 
-        # Format as Markdown sections
-        blocks: List[str] = []
-        for entry in combined:
-            blocks.append(
-                f"### [{entry.content_type.upper()}] {entry.title}\n"
-                f"*Section: {entry.section}*\n\n"
-                f"{entry.content}"
-            )
-
-        rag_block = "\n\n---\n\n".join(blocks)
+        kept = _fit_token_budget(list(blocks.values()))
+        rag_block = "\n\n---\n\n".join(kept)
+        # Empty results are not cached, so seeding the knowledge base takes
+        # effect immediately
+        await cache_set(cache_key, rag_block, settings.RAG_CONTEXT_TTL_SECONDS)
         logger.info(
             "RAG: built context from %d chunks (%d chars) for submission_id=%s",
-            len(combined),
+            len(kept),
             len(rag_block),
             getattr(submission, "id", "?"),
         )
@@ -0,0 +1,120 @@
+"""Short-lived Redis cache for hot read endpoints.
+
+Caches the encoded JSON body of ``GET /submissions/{id}`` and
+``GET /admin/knowledge-base/stats`` for ``RESPONSE_CACHE_TTL_SECONDS``.
+``GET /similar-submissions`` bodies are held in a bounded in-process LRU
+instead (``SIMILAR_SEARCH_CACHE_*``): a hit skips the query embedding and
+the vector search without a Redis round trip.
+
+Submission entries are dropped whenever a session commits a change to that
+submission, whichever endpoint made it, via ORM events.  Writes issued as
+UPDATE/DELETE statements bypass those events, so their callers invalidate
+explicitly: :func:`invalidate_submission` for submissions and
+:func:`invalidate_kb_stats` for the knowledge-base bulk operations, which
+also clears this worker's similar-search entries and cached RAG retrievals
+(other workers' expire within their TTL) and bumps the knowledge-base
+generation that every worker's built RAG contexts are keyed on.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Set, Tuple
+
+from fastapi.responses import Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from ..core.cache import cache_delete, cache_get, cache_set
+from ..core.config import settings
+from ..models.submission import Submission
+from .rag_service import bump_kb_generation, invalidate_retrieval_cache
+
+logger = logging.getLogger(__name__)
+
+KB_STATS_KEY = "response:kb:stats"
+
+_DIRTY_SUBMISSIONS = "dirty_submission_ids"
+# Strong references so pending invalidations are not garbage-collected
+_pending: Set[asyncio.Task] = set()
+
+# (q, limit, section) -> (monotonic expiry, encoded body); LRU-ordered
+_similar: "OrderedDict[tuple, Tuple[float, bytes]]" = OrderedDict()
+
+
+def submission_key(submission_id: int) -> str:
+    return f"response:submission:{submission_id}"
+
+
+async def cached_json(key: str) -> Optional[Response]:
+    """Return the cached JSON response for *key*, or None on a miss."""
+    body = await cache_get(key)
+    if body is None:
+        return None
+    return Response(content=body, media_type="application/json")
+
+
+async def store_json(key: str, body: str) -> Response:
+    """Cache the encoded JSON *body* under *key* and return it as a response."""
+    await cache_set(key, body, settings.RESPONSE_CACHE_TTL_SECONDS)
+    return Response(content=body, media_type="application/json")
+
+
+def cached_similar_search(key: tuple) -> Optional[Response]:
+    """Return this worker's cached similar-search response for *key*, or None."""
+    entry = _similar.get(key)
+    if entry is None:
+        return None
+    expires_at, body = entry
+    if expires_at < time.monotonic():
+        del _similar[key]
+        return None
+    _similar.move_to_end(key)
+    return Response(content=body, media_type="application/json")
+
+
+def store_similar_search(key: tuple, body: bytes) -> Response:
+    """Cache the encoded similar-search *body* under *key* and return it."""
+    _similar[key] = (time.monotonic() + settings.SIMILAR_SEARCH_CACHE_TTL_SECONDS, body)
+    _similar.move_to_end(key)
+    while len(_similar) > settings.SIMILAR_SEARCH_CACHE_MAX_ENTRIES:
+        _similar.popitem(last=False)
+    return Response(content=body, media_type="application/json")
+
+
+async def invalidate_kb_stats() -> None:
+    _similar.clear()
+    invalidate_retrieval_cache()
+    await bump_kb_generation()
+    await cache_delete(KB_STATS_KEY)
+
+
+async def invalidate_submission(submission_id: int) -> None:
+    await cache_delete(submission_key(submission_id))
+
+
+@event.listens_for(Submission, "after_update")
+@event.listens_for(Submission, "after_delete")
+def _mark_submission_dirty(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_DIRTY_SUBMISSIONS, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_submissions(session: Session) -> None:
+    ids = session.info.pop(_DIRTY_SUBMISSIONS, None)
+    if not ids:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # committed outside the server (scripts); nothing is cached
+    task = loop.create_task(cache_delete(*(submission_key(i) for i in ids)))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_submissions(session: Session) -> None:
+    session.info.pop(_DIRTY_SUBMISSIONS, None)
@@ -127,21 +127,26 @@ def seed_predicate_devices():
         }
     ]
 
-    for device_data in sample_devices:
-        # Check if device already exists
-        existing = db.query(PredicateDevice).filter(
-            PredicateDevice.k_number == device_data["k_number"]
-        ).first()
+    try:
+        # One query for every k_number already present, then one batched INSERT
+        existing = {
+            k_number for (k_number,) in db.query(PredicateDevice.k_number).filter(
+                PredicateDevice.k_number.in_([d["k_number"] for d in sample_devices])
+            )
+        }
 
-        if not existing:
-            device = PredicateDevice(**device_data)
-            db.add(device)
-            print(f"Added predicate device: {device_data['device_name']} ({device_data['k_number']})")
-        else:
-            print(f"Device {device_data['k_number']} already exists, skipping...")
+        new_devices = []
+        for device_data in sample_devices:
+            if device_data["k_number"] not in existing:
+                new_devices.append(PredicateDevice(**device_data))
+                print(f"Added predicate device: {device_data['device_name']} ({device_data['k_number']})")
+            else:
+                print(f"Device {device_data['k_number']} already exists, skipping...")
 
-    db.commit()
-    db.close()
+        db.add_all(new_devices)
+        db.commit()
+    finally:
+        db.close()
     print("\n✅ Predicate device seeding complete!")
 
 